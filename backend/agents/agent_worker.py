@@ -6,13 +6,23 @@ Deployed as Lambda or ECS task
 
 import os
 import json
+import time
+import asyncio
 import boto3
+import httpx
 import requests
 from datetime import datetime
 from typing import Dict, List, Any
 import anthropic
 import google.generativeai as genai
 
+from events import progress_event  # shared with the API: backend/lambda/api/events.py
+from json_stream import ItemParser
+from llm_cache import acached_call, acached_get
+from prompt_plan import plan
+from rate_limit import RateLimit, Scheduler, shared_quota
+from records import Fix, issues_from_json, to_dicts
+
 # AWS Clients
 s3 = boto3.client('s3')
 dynamodb = boto3.resource('dynamodb')
@@ -21,16 +31,72 @@ dynamodb = boto3.resource('dynamodb')
 S3_BUCKET = os.environ.get('S3_BUCKET', 'vajraopz-prod-code-storage')
 DEPLOYMENTS_TABLE = os.environ.get('DEPLOYMENTS_TABLE', 'vajraopz-prod-deployments')
 PROJECTS_TABLE = os.environ.get('PROJECTS_TABLE', 'vajraopz-prod-projects')
+CONNECTIONS_TABLE = os.environ.get('CONNECTIONS_TABLE', 'vajraopz-prod-connections')
+ANALYSIS_CACHE_TABLE = os.environ.get('ANALYSIS_CACHE_TABLE', 'vajraopz-prod-analysis-cache')
+ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', str(30 * 24 * 3600)))
+
+# Progress events: pushed to the API's WebSocket connections in AWS, or posted
+# to the local dev server (e.g. http://localhost:3001/events) when set, with
+# PROGRESS_PUBLISH_SECRET if the dev server requires it
+WEBSOCKET_ENDPOINT = os.environ.get('WEBSOCKET_ENDPOINT')
+PROGRESS_PUBLISH_URL = os.environ.get('PROGRESS_PUBLISH_URL')
+PROGRESS_PUBLISH_SECRET = os.environ.get('PROGRESS_PUBLISH_SECRET')
+_management_client = None
 
 # AI API Keys
 CLAUDE_API_KEY = os.environ.get('CLAUDE_API_KEY')
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY')
 
-# Initialize AI clients
-claude_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY) if CLAUDE_API_KEY else None
+# Models, and the prompt revision: both are part of the analysis cache key,
+# so bump PROMPT_VERSION whenever a prompt changes
+CLAUDE_MODEL = 'claude-3-5-sonnet-20241022'
+GEMINI_MODEL = 'gemini-pro'
+OPENROUTER_MODEL = 'anthropic/claude-3.5-sonnet'
+PROMPT_VERSION = '2'
+
+# Files sent to the models per run; cached files don't count
+MAX_ANALYZED_FILES = int(os.environ.get('MAX_ANALYZED_FILES', '20'))
+# Provider calls in flight at once, across all files and providers
+LLM_CONCURRENCY = int(os.environ.get('LLM_CONCURRENCY', '8'))
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', '60'))
+# Responses stream in; past this many seconds a call keeps what arrived
+LLM_CALL_DEADLINE = float(os.environ.get('LLM_CALL_DEADLINE', '90'))
+# Per-provider limits, requests and input tokens per minute (0 = unlimited).
+# The defaults are entry tiers; raise them to match the accounts in use. They
+# are shared by every worker using the same keys (rate#* items in the
+# analysis-cache table), not granted to each one.
+RATE_LIMITS = {
+    'claude': RateLimit(int(os.environ.get('CLAUDE_RPM', '50')), int(os.environ.get('CLAUDE_TPM', '40000'))),
+    'gemini': RateLimit(int(os.environ.get('GEMINI_RPM', '360')), int(os.environ.get('GEMINI_TPM', '120000'))),
+    'openrouter': RateLimit(int(os.environ.get('OPENROUTER_RPM', '200')), int(os.environ.get('OPENROUTER_TPM', '0'))),
+}
+LLM_MAX_ATTEMPTS = int(os.environ.get('LLM_MAX_ATTEMPTS', '6'))
+
+# Initialize AI clients. They are long-lived and pooled: Claude and OpenRouter
+# share one httpx.AsyncClient, and every call runs on the one event loop in
+# run_async(), so kept-alive connections are reused across warm invocations.
+# Retries belong to the scheduler (rate_limit.py), not the SDKs.
+http_client = httpx.AsyncClient(
+    timeout=LLM_TIMEOUT,
+    limits=httpx.Limits(max_connections=LLM_CONCURRENCY * 2, max_keepalive_connections=LLM_CONCURRENCY)
+)
+claude_client = anthropic.AsyncAnthropic(api_key=CLAUDE_API_KEY, http_client=http_client, max_retries=0) if CLAUDE_API_KEY else None
+gemini_model = None
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
+    gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+scheduler = Scheduler(RATE_LIMITS, concurrency=LLM_CONCURRENCY, max_attempts=LLM_MAX_ATTEMPTS,
+                      transient=(httpx.TransportError, anthropic.APIConnectionError), quota=shared_quota())
+_loop = None
+
+
+def run_async(coro):
+    """Run a coroutine on the worker's event loop (kept for the container's lifetime)"""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
 
 
 def lambda_handler(event, context):
@@ -58,20 +124,24 @@ def lambda_handler(event, context):
         
         # Save results to DynamoDB
         save_deployment_results(deployment_id, result)
+        publish_progress(deployment_id, 'completed', message=f"Score {result['score'].get('total', 0)}")
         
         return {
             'statusCode': 200,
-            'body': json.dumps(result)
+            'body': json.dumps(serialize_result(result))
         }
         
     except Exception as e:
         print(f"[Worker] Error: {e}")
         import traceback
         traceback.print_exc()
+        publish_progress(event.get('deployment_id'), 'failed', message=str(e))
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
+    finally:
+        release_project_lock(event.get('project_id'), event.get('deployment_id'), 'fix')
 
 
 def run_analysis_and_fix(project_id, deployment_id, repo_url, branch_name, access_token, team_name, team_leader):
@@ -80,18 +150,22 @@ def run_analysis_and_fix(project_id, deployment_id, repo_url, branch_name, acces
     
     # Step 1: Clone repo to S3
     print(f"[Worker] Cloning {repo_url} to S3...")
-    code_files = clone_repo_to_s3(repo_url, deployment_id, access_token)
+    publish_progress(deployment_id, 'cloning')
+    code_files, blob_shas = clone_repo_to_s3(repo_url, deployment_id, access_token)
     
     # Step 2: Analyze with AI agents
     print(f"[Worker] Analyzing {len(code_files)} files...")
-    issues = analyze_with_agents(code_files)
+    publish_progress(deployment_id, 'analyzing', message=f"Analyzing {len(code_files)} files")
+    issues = analyze_with_agents(code_files, deployment_id, blob_shas)
     
     # Step 3: Generate fixes
     print(f"[Worker] Generating fixes for {len(issues)} issues...")
+    publish_progress(deployment_id, 'fixing', message=f"Generating fixes for {len(issues)} issues")
     fixes = generate_fixes(issues, code_files)
     
     # Step 4: Create branch and push fixes
     print(f"[Worker] Creating branch and pushing fixes...")
+    publish_progress(deployment_id, 'pushing', message=f"Pushing {len(fixes)} fixes")
     commits = push_fixes_to_github(
         repo_url=repo_url,
         branch_name=branch_name,
@@ -120,7 +194,8 @@ def run_analysis_and_fix(project_id, deployment_id, repo_url, branch_name, acces
 
 
 def clone_repo_to_s3(repo_url, deployment_id, access_token):
-    """Clone GitHub repo and upload to S3"""
+    """Clone GitHub repo and upload to S3. Returns the code files and the git
+    blob SHA of each"""
     import tempfile
     import shutil
     import subprocess
@@ -131,6 +206,7 @@ def clone_repo_to_s3(repo_url, deployment_id, access_token):
         # Clone repo
         auth_url = repo_url.replace('https://', f'https://{access_token}@')
         subprocess.run(['git', 'clone', '--depth', '1', auth_url, tmpdir], check=True)
+        blob_shas = list_blob_shas(tmpdir)
         
         # Upload to S3 and read code files
         s3_prefix = f"deployments/{deployment_id}/code/"
@@ -158,139 +234,330 @@ def clone_repo_to_s3(repo_url, deployment_id, access_token):
                         print(f"[S3] Error reading {relative_path}: {e}")
     
     print(f"[S3] Uploaded {len(code_files)} files to s3://{S3_BUCKET}/{s3_prefix}")
-    return code_files
+    return code_files, blob_shas
+
+
+def list_blob_shas(repo_dir):
+    """path -> git blob SHA for every file in a checkout"""
+    import subprocess
+    
+    result = subprocess.run(['git', 'ls-files', '-s'], cwd=repo_dir, capture_output=True, text=True, check=True)
+    shas = {}
+    for line in result.stdout.splitlines():
+        # "<mode> <sha> <stage>\t<path>"
+        meta, _, path = line.partition('\t')
+        shas[path] = meta.split()[1]
+    return shas
+
 
+def analyze_with_agents(code_files, deployment_id=None, blob_shas=None):
+    """Analyze code with multiple AI agents. Each provider's issues are cached
+    per blob SHA, so only files changed since an earlier run reach the models;
+    those (file, provider) calls all run concurrently."""
+    return run_async(analyze_with_agents_async(code_files, deployment_id, blob_shas))
 
-def analyze_with_agents(code_files):
-    """Analyze code with multiple AI agents"""
-    all_issues = []
+
+async def analyze_with_agents_async(code_files, deployment_id=None, blob_shas=None):
+    blob_shas = blob_shas or {}
     
-    # Limit to first 20 files for demo
-    files_to_analyze = list(code_files.items())[:20]
+    providers = []
+    if claude_client:
+        providers.append(('claude', CLAUDE_MODEL, analyze_with_claude))
+    if gemini_model:
+        providers.append(('gemini', GEMINI_MODEL, analyze_with_gemini))
+    if OPENROUTER_API_KEY:
+        providers.append(('openrouter', OPENROUTER_MODEL, analyze_with_openrouter))
     
-    for file_path, content in files_to_analyze:
-        print(f"[Analysis] Analyzing {file_path}...")
-        
-        # Claude Analysis
-        if claude_client:
-            claude_issues = analyze_with_claude(file_path, content)
-            all_issues.extend(claude_issues)
-        
-        # Gemini Analysis
-        if GEMINI_API_KEY:
-            gemini_issues = analyze_with_gemini(file_path, content)
-            all_issues.extend(gemini_issues)
-        
-        # OpenRouter Analysis
-        if OPENROUTER_API_KEY:
-            openrouter_issues = analyze_with_openrouter(file_path, content)
-            all_issues.extend(openrouter_issues)
+    files = list(code_files.items())
+    keys = {
+        (file_path, name): analysis_cache_key(name, model, blob_shas[file_path])
+        for file_path, _ in files if file_path in blob_shas
+        for name, model, _ in providers
+    }
+    cached = await asyncio.to_thread(load_cached_analyses, keys.values())
+    results = {}  # (file, provider) -> issues
+    misses = {}  # file -> providers without a cached result
+    
+    for file_path, _ in files:
+        missing = []
+        for name, _, _ in providers:
+            key = keys.get((file_path, name))
+            if key in cached:
+                results[(file_path, name)] = issues_from_json(cached[key], file_path)
+            else:
+                missing.append(name)
+        if missing and len(misses) < MAX_ANALYZED_FILES:
+            misses[file_path] = missing
+    
+    # Pack each provider's files into token-budgeted requests: small files
+    # share one, large ones are split at function or class boundaries
+    calls = []
+    for name, _, analyze in providers:
+        batches = plan((file_path, code_files[file_path]) for file_path in misses if name in misses[file_path])
+        calls.extend((priority, name, analyze, batch) for priority, batch in enumerate(batches))
+    
+    # Every request at once. The scheduler keeps each provider within its
+    # rate limits and starts the earliest batches first.
+    async def run(priority, name, analyze, batch):
+        return name, batch, await analyze(batch, priority, on_issue)
     
-    # Deduplicate issues
+    # Issues stream in before their requests finish: report the running count
+    streamed = 0
+    last_report = 0.0
+    reports = set()
+    
+    def on_issue(issue):
+        nonlocal streamed, last_report
+        streamed += 1
+        now = time.monotonic()
+        if deployment_id and now - last_report >= 1:
+            last_report = now
+            report = asyncio.get_running_loop().create_task(asyncio.to_thread(
+                publish_progress, deployment_id, 'analyzing',
+                message=f"Analyzed {finished}/{len(misses)} files, {streamed} issues so far"
+            ))
+            reports.add(report)
+            report.add_done_callback(reports.discard)
+    
+    tasks = [run(*call) for call in calls]
+    remaining = {}  # (file, provider) -> requests still out
+    for _, name, _, batch in calls:
+        for chunk in batch.chunks:
+            remaining[(chunk.path, name)] = remaining.get((chunk.path, name), 0) + 1
+    pending = {file_path: 0 for file_path in misses}
+    for file_path, _ in remaining:
+        pending[file_path] += 1
+    found = {key: [] for key in remaining}
+    failed = set()
+    throttled, retries = scheduler.throttled, scheduler.retries
+    fresh = {}
+    finished = 0
+    print(f"[Analysis] Sending {len(misses)} files to the models ({len(tasks)} requests)")
+    
+    for next_result in asyncio.as_completed(tasks):
+        name, batch, (issues, complete) = await next_result
+        if not complete:  # error or deadline: partial issues, not cached
+            failed.update((file_path, name) for file_path in batch.paths)
+        for issue in issues:
+            found[(issue.file, name)].append(issue)
+        for chunk in batch.chunks:
+            key = (chunk.path, name)
+            remaining[key] -= 1
+            if remaining[key]:
+                continue
+            # All of the file's chunks are back for this provider
+            results[key] = sorted(found.pop(key), key=lambda issue: issue.line)
+            if key not in failed and key in keys:
+                fresh[keys[key]] = to_dicts(results[key])
+            pending[chunk.path] -= 1
+            if pending[chunk.path] == 0:
+                finished += 1
+                if deployment_id:
+                    # Analysis spans the 20-70% band of the progress bar
+                    await asyncio.to_thread(publish_progress, deployment_id, 'analyzing',
+                                            progress=20 + 50 * finished // len(misses),
+                                            message=f"Analyzed {finished}/{len(misses)} files")
+    
+    # Empty files have no lines to send: nothing to find
+    for file_path in misses:
+        for name in misses[file_path]:
+            if (file_path, name) not in remaining and (file_path, name) in keys:
+                results[(file_path, name)] = []
+                fresh[keys[(file_path, name)]] = []
+    
+    if reports:
+        await asyncio.gather(*reports)
+    await asyncio.to_thread(store_cached_analyses, fresh)
+    
+    # Deduplicate issues, in file then provider order however they completed
+    all_issues = [
+        issue
+        for file_path, _ in files
+        for name, _, _ in providers
+        for issue in results.get((file_path, name), ())
+    ]
     unique_issues = deduplicate_issues(all_issues)
     
-    print(f"[Analysis] Found {len(unique_issues)} unique issues")
+    print(f"[Analysis] Found {len(unique_issues)} unique issues ({len(misses)} files sent to the models, "
+          f"{scheduler.throttled - throttled} throttled, {scheduler.retries - retries} retried)")
     return unique_issues
 
 
-def analyze_with_claude(file_path, content):
-    """Analyze code with Claude"""
-    try:
-        prompt = f"""Analyze this code file for issues. Return ONLY a JSON array of issues.
+def analysis_cache_key(provider, model, sha):
+    """Same layout as backend/lambda/api/analysis_cache.py"""
+    return f"{provider}#{model}:{PROMPT_VERSION}#{sha}"
 
-File: {file_path}
 
-Code:
-```
-{content[:3000]}
-```
+def load_cached_analyses(keys):
+    """cache key -> cached issue dicts, for every key with a live entry"""
+    keys = list(set(keys))
+    cached = {}
+    now = int(datetime.now().timestamp())
+    try:
+        for start in range(0, len(keys), 100):
+            request = {ANALYSIS_CACHE_TABLE: {'Keys': [{'cache_key': k} for k in keys[start:start + 100]]}}
+            for attempt in range(5):
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response['Responses'].get(ANALYSIS_CACHE_TABLE, []):
+                    if int(item.get('expires_at', now + 1)) > now:
+                        cached[item['cache_key']] = json.loads(item['result'])
+                request = response.get('UnprocessedKeys')
+                if not request:
+                    break
+                time.sleep(0.05 * 2 ** attempt)  # throttled: back off, retry the rest
+    except Exception as e:
+        print(f"[AnalysisCache] Read failed, analyzing everything: {e}")
+    return cached
 
-Return format:
-[
-  {{"file": "{file_path}", "line": 10, "type": "LINTING", "severity": "Medium", "message": "Issue description", "suggestion": "How to fix"}}
-]
 
-Types: LINTING, SYNTAX, LOGIC, STYLE
-Severity: Low, Medium, High, Critical"""
+def store_cached_analyses(results):
+    if not results:
+        return
+    expires_at = int(datetime.now().timestamp()) + ANALYSIS_CACHE_TTL
+    try:
+        with dynamodb.Table(ANALYSIS_CACHE_TABLE).batch_writer() as batch:
+            for key, issues in results.items():
+                batch.put_item(Item={
+                    'cache_key': key,
+                    'analyzer': key.split('#', 1)[0],
+                    'result': json.dumps(issues, separators=(',', ':')),
+                    'expires_at': expires_at
+                })
+    except Exception as e:
+        print(f"[AnalysisCache] Write failed: {e}")
+
+
+def issue_parser(batch, on_issue=None):
+    """Parser for a streamed response: each issue reaches on_issue as soon
+    as its object is complete"""
+    if on_issue is None:
+        return ItemParser()
+    return ItemParser(lambda item: [on_issue(issue) for issue in batch.issues([item])])
+
+
+async def cached_submit(provider, model, params, prompt, call, batch, priority, valid):
+    """acached_call() behind the rate-limit queue: a cached response skips
+    the queue, and the cache lease is only taken once the call is due, so
+    time spent queued never runs it out"""
+    text = await acached_get(provider, model, params, prompt, file_path=batch.single_path)
+    if text is not None:
+        return text
+    return await scheduler.submit(
+        provider,
+        lambda: acached_call(provider, model, params, prompt, call, file_path=batch.single_path, valid=valid),
+        batch.tokens, priority
+    )
+
 
-        message = claude_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2048,
-            messages=[{"role": "user", "content": prompt}]
-        )
+async def analyze_with_claude(batch, priority=0, on_issue=None):
+    """Analyze one planned request with Claude: (issues, complete). Issues
+    found before an error or the deadline are kept, but incomplete."""
+    parser = issue_parser(batch, on_issue)
+    try:
+        prompt = batch.prompt()
+        max_tokens = batch.max_tokens()
         
-        response_text = message.content[0].text
-        # Extract JSON from response
-        import re
-        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-        if json_match:
-            issues = json.loads(json_match.group())
-            return issues
-        return []
+        async def call():
+            parser.reset()  # a retry starts over
+            async with claude_client.messages.stream(
+                model=CLAUDE_MODEL,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                if not await parser.aconsume(stream.text_stream, LLM_CALL_DEADLINE):
+                    print(f"[Claude] Deadline of {LLM_CALL_DEADLINE:g}s hit, keeping {len(parser.items)} issues")
+            return parser.text
+        
+        # Only complete responses are cached
+        response_text = await cached_submit(
+            'claude', CLAUDE_MODEL, {'max_tokens': max_tokens}, prompt, call, batch, priority,
+            valid=lambda _: parser.complete
+        )
+        return batch.issues(parser.finish(response_text)), parser.complete
         
     except Exception as e:
         print(f"[Claude] Error: {e}")
-        return []
+        return batch.issues(parser.items), False
 
 
-def analyze_with_gemini(file_path, content):
-    """Analyze code with Gemini"""
+async def analyze_with_gemini(batch, priority=0, on_issue=None):
+    """Analyze one planned request with Gemini: (issues, complete)"""
+    parser = issue_parser(batch, on_issue)
     try:
-        model = genai.GenerativeModel('gemini-pro')
+        prompt = batch.prompt()
+        max_tokens = batch.max_tokens()
         
-        prompt = f"""Analyze this code for issues. Return ONLY a JSON array.
-
-File: {file_path}
-Code: {content[:3000]}
-
-Format: [{{"file": "{file_path}", "line": 10, "type": "LINTING", "severity": "Medium", "message": "...", "suggestion": "..."}}]"""
-
-        response = model.generate_content(prompt)
+        async def call():
+            parser.reset()
+            response = await gemini_model.generate_content_async(
+                prompt, generation_config={'max_output_tokens': max_tokens}, stream=True
+            )
+            
+            async def chunks():
+                async for chunk in response:
+                    yield chunk.text
+            
+            if not await parser.aconsume(chunks(), LLM_CALL_DEADLINE):
+                print(f"[Gemini] Deadline of {LLM_CALL_DEADLINE:g}s hit, keeping {len(parser.items)} issues")
+            return parser.text
         
-        import re
-        json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
-        if json_match:
-            issues = json.loads(json_match.group())
-            return issues
-        return []
+        response_text = await cached_submit(
+            'gemini', GEMINI_MODEL, {'max_output_tokens': max_tokens}, prompt, call, batch, priority,
+            valid=lambda _: parser.complete
+        )
+        return batch.issues(parser.finish(response_text)), parser.complete
         
     except Exception as e:
         print(f"[Gemini] Error: {e}")
-        return []
+        return batch.issues(parser.items), False
 
 
-def analyze_with_openrouter(file_path, content):
-    """Analyze code with OpenRouter"""
+async def analyze_with_openrouter(batch, priority=0, on_issue=None):
+    """Analyze one planned request with OpenRouter: (issues, complete)"""
+    parser = issue_parser(batch, on_issue)
     try:
-        response = requests.post(
-            'https://openrouter.ai/api/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENROUTER_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'anthropic/claude-3.5-sonnet',
-                'messages': [{
-                    'role': 'user',
-                    'content': f"Analyze {file_path} for code issues. Return JSON array: [{{'file': '{file_path}', 'line': 10, 'type': 'LINTING', 'severity': 'Medium', 'message': '...', 'suggestion': '...'}}]\n\nCode:\n{content[:3000]}"
-                }]
-            },
-            timeout=30
-        )
+        prompt = batch.prompt()
+        max_tokens = batch.max_tokens()
         
-        result = response.json()
-        content_text = result['choices'][0]['message']['content']
+        async def call():
+            parser.reset()
+            async with http_client.stream(
+                'POST',
+                'https://openrouter.ai/api/v1/chat/completions',
+                headers={
+                    'Authorization': f'Bearer {OPENROUTER_API_KEY}',
+                    'Content-Type': 'application/json'
+                },
+                json={
+                    'model': OPENROUTER_MODEL,
+                    'max_tokens': max_tokens,
+                    'stream': True,
+                    'messages': [{'role': 'user', 'content': prompt}]
+                },
+                timeout=30
+            ) as response:
+                response.raise_for_status()  # a 429 carries retry-after for the scheduler
+                
+                async def chunks():
+                    # Server-sent events: "data: {...}" per delta, then "data: [DONE]"
+                    async for line in response.aiter_lines():
+                        if line.startswith('data: ') and line != 'data: [DONE]':
+                            choices = json.loads(line[6:]).get('choices') or [{}]
+                            yield choices[0].get('delta', {}).get('content') or ''
+                
+                if not await parser.aconsume(chunks(), LLM_CALL_DEADLINE):
+                    print(f"[OpenRouter] Deadline of {LLM_CALL_DEADLINE:g}s hit, keeping {len(parser.items)} issues")
+            return parser.text
         
-        import re
-        json_match = re.search(r'\[.*\]', content_text, re.DOTALL)
-        if json_match:
-            issues = json.loads(json_match.group())
-            return issues
-        return []
+        content_text = await cached_submit(
+            'openrouter', OPENROUTER_MODEL, {'max_tokens': max_tokens}, prompt, call, batch, priority,
+            valid=lambda _: parser.complete
+        )
+        return batch.issues(parser.finish(content_text)), parser.complete
         
     except Exception as e:
         print(f"[OpenRouter] Error: {e}")
-        return []
+        return batch.issues(parser.items), False
 
 
 def deduplicate_issues(issues):
@@ -299,7 +566,7 @@ def deduplicate_issues(issues):
     unique = []
     
     for issue in issues:
-        key = (issue['file'], issue['line'], issue['message'])
+        key = issue.key()
         if key not in seen:
             seen.add(key)
             unique.append(issue)
@@ -312,34 +579,26 @@ def generate_fixes(issues, code_files):
     fixes = []
     
     for issue in issues[:10]:  # Limit to 10 fixes
-        file_path = issue['file']
+        file_path = issue.file
         if file_path not in code_files:
             continue
         
         content = code_files[file_path]
         lines = content.split('\n')
-        line_num = issue.get('line', 1)
+        line_num = issue.line
         
         if 0 < line_num <= len(lines):
             old_line = lines[line_num - 1]
             new_line = apply_fix_suggestion(old_line, issue)
             
-            fixes.append({
-                'file': file_path,
-                'line': line_num,
-                'type': issue['type'],
-                'severity': issue['severity'],
-                'message': issue['message'],
-                'old_code': old_line,
-                'new_code': new_line
-            })
+            fixes.append(Fix(issue, old_line, new_line))
     
     return fixes
 
 
 def apply_fix_suggestion(line, issue):
     """Apply simple fix based on issue type"""
-    suggestion = issue.get('suggestion', '')
+    suggestion = issue.suggestion or ''
     
     # Simple fixes
     if 'console.log' in line:
@@ -374,22 +633,22 @@ def push_fixes_to_github(repo_url, branch_name, fixes, access_token):
             
             # Apply each fix and commit
             for fix in fixes:
-                file_path = os.path.join(tmpdir, fix['file'])
+                file_path = os.path.join(tmpdir, fix.file)
                 
                 if os.path.exists(file_path):
                     with open(file_path, 'r') as f:
                         lines = f.readlines()
                     
-                    line_num = fix['line']
+                    line_num = fix.line
                     if 0 < line_num <= len(lines):
-                        lines[line_num - 1] = fix['new_code'] + '\n'
+                        lines[line_num - 1] = fix.new_code + '\n'
                         
                         with open(file_path, 'w') as f:
                             f.writelines(lines)
                         
                         # Commit
-                        subprocess.run(['git', 'add', fix['file']], check=True, capture_output=True)
-                        commit_msg = f"Fix {fix['type']}: {fix['message'][:50]}"
+                        subprocess.run(['git', 'add', fix.file], check=True, capture_output=True)
+                        commit_msg = f"Fix {fix.issue.type.name}: {fix.issue.message[:50]}"
                         subprocess.run(['git', 'commit', '-m', commit_msg], check=True, capture_output=True)
                         
                         # Get commit SHA
@@ -399,8 +658,8 @@ def push_fixes_to_github(repo_url, branch_name, fixes, access_token):
                         commits.append({
                             'sha': sha,
                             'message': commit_msg,
-                            'file': fix['file'],
-                            'line': fix['line']
+                            'file': fix.file,
+                            'line': fix.line
                         })
             
             # Push to GitHub
@@ -442,6 +701,11 @@ def calculate_score(total_issues, fixes_applied, commits_count, elapsed_minutes)
     }
 
 
+def serialize_result(result):
+    """Issue/Fix records back to the JSON shape clients and DynamoDB expect"""
+    return {**result, 'issues': to_dicts(result['issues']), 'fixes': to_dicts(result['fixes'])}
+
+
 def save_deployment_results(deployment_id, result):
     """Save results to DynamoDB"""
     deployments_table = dynamodb.Table(DEPLOYMENTS_TABLE)
@@ -452,8 +716,8 @@ def save_deployment_results(deployment_id, result):
         ExpressionAttributeNames={'#status': 'status'},
         ExpressionAttributeValues={
             ':status': 'completed',
-            ':issues': result['issues'],
-            ':fixes': result['fixes'],
+            ':issues': to_dicts(result['issues']),
+            ':fixes': to_dicts(result['fixes']),
             ':commits': result['commits'],
             ':score': result['score'],
             ':branch_url': result['branch_url'],
@@ -464,6 +728,83 @@ def save_deployment_results(deployment_id, result):
     print(f"[DynamoDB] Saved results for deployment {deployment_id}")
 
 
+def publish_progress(deployment_id, stage, progress=None, status=None, message=None):
+    """Record the stage on the deployment and push it to subscribers; never raises"""
+    if not deployment_id:
+        return
+    event = progress_event(deployment_id, stage, progress, status, message)
+    progress, status, now = event['progress'], event['status'], event['at']
+    
+    try:
+        # Late subscribers (and getDeployment) read the stage from the item
+        names = {'#stage': 'stage', '#progress': 'progress', '#updated_at': 'updated_at'}
+        values = {':stage': stage, ':progress': progress, ':updated_at': now}
+        expression = 'SET #stage = :stage, #progress = :progress, #updated_at = :updated_at'
+        if status == 'failed':
+            names['#status'] = 'status'
+            values[':status'] = status
+            expression += ', #status = :status'
+        dynamodb.Table(DEPLOYMENTS_TABLE).update_item(
+            Key={'deployment_id': deployment_id},
+            UpdateExpression=expression,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+    except Exception as e:
+        print(f"[Progress] Could not record stage {stage}: {e}")
+    
+    try:
+        if PROGRESS_PUBLISH_URL:
+            headers = {'X-Progress-Secret': PROGRESS_PUBLISH_SECRET} if PROGRESS_PUBLISH_SECRET else None
+            requests.post(f"{PROGRESS_PUBLISH_URL.rstrip('/')}/{deployment_id}", json=event,
+                          headers=headers, timeout=2)
+        elif WEBSOCKET_ENDPOINT:
+            _post_to_connections(deployment_id, event)
+    except Exception as e:
+        print(f"[Progress] Could not publish stage {stage}: {e}")
+
+
+def _post_to_connections(deployment_id, event):
+    """PostToConnection for every WebSocket subscribed to this deployment"""
+    global _management_client
+    if _management_client is None:
+        _management_client = boto3.client('apigatewaymanagementapi', endpoint_url=WEBSOCKET_ENDPOINT)
+    
+    connections_table = dynamodb.Table(CONNECTIONS_TABLE)
+    response = connections_table.query(
+        IndexName='deployment-id-index',
+        KeyConditionExpression='deployment_id = :did',
+        ExpressionAttributeValues={':did': deployment_id},
+        ProjectionExpression='connection_id'
+    )
+    data = json.dumps(event).encode()
+    for item in response.get('Items', []):
+        try:
+            _management_client.post_to_connection(ConnectionId=item['connection_id'], Data=data)
+        except _management_client.exceptions.GoneException:
+            connections_table.delete_item(Key={'connection_id': item['connection_id']})
+
+
+def release_project_lock(project_id, deployment_id, kind):
+    """Clear the project's single-flight lock for `kind` deployments ('fix'),
+    so the next trigger of that kind starts a new run"""
+    if not project_id or not deployment_id:
+        return
+    lock = f'active_{kind}_deployment'
+    projects_table = dynamodb.Table(PROJECTS_TABLE)
+    try:
+        projects_table.update_item(
+            Key={'project_id': project_id},
+            UpdateExpression=f'REMOVE {lock}, {lock}_at',
+            ConditionExpression=f'{lock} = :did',
+            ExpressionAttributeValues={':did': deployment_id}
+        )
+    except projects_table.meta.client.exceptions.ConditionalCheckFailedException:
+        pass
+    except Exception as e:
+        print(f"[Worker] Could not release project lock: {e}")
+
+
 if __name__ == '__main__':
     # For local testing
     event = {
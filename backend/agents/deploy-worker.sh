@@ -17,7 +17,7 @@ aws ecr create-repository --repository-name vajraopz-agent-worker --region $AWS_
 
 # Step 2: Build and push Docker image
 echo "🐳 Building Docker image..."
-docker build -f Dockerfile.worker -t $ECR_REPO:latest .
+docker build -f Dockerfile.worker -t $ECR_REPO:latest ..
 
 echo "🔐 Logging into ECR..."
 aws ecr get-login-password --region $AWS_REGION | docker login --username AWS --password-stdin $ECR_REPO
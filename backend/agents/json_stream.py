@@ -0,0 +1,155 @@
+"""
+Incremental parsing of streamed JSON responses
+The models answer with a JSON array of objects, either bare ([{...}, ...])
+or under a key ({"issues": [{...}, ...]}). ItemParser is fed the response
+as it streams in. Each object in that array is parsed and handed to
+`on_item` as soon as its closing brace arrives, without waiting for the
+rest of the completion.
+
+Prose or a ```json fence before the array is skipped. The array starts at
+the first '[' that is followed by '{' or ']', or that follows a ```json
+fence, so bracketed prose ("found [3] issues", a [docs] link) is not taken
+for it. An empty array in a response that has objects elsewhere is not
+trusted as the answer: parsing goes on to the next array. Brackets inside
+strings are ignored, and escapes may be split across chunks.
+
+consume() / aconsume() feed a provider's text stream to the parser with a
+per-call deadline. When it fires the stream is dropped, and the objects
+completed so far are kept in `items`. `complete` stays False, so callers
+know not to cache the result.
+"""
+
+import asyncio
+import json
+import re
+import time
+from typing import Any, AsyncIterable, Callable, Iterable, List, Optional
+
+# The only characters that change the parser's state
+_SPECIAL = re.compile(r'[\\"{}\[\]]')
+# What follows a '[' that opens the item array
+_NEXT = re.compile(r'\s*(\S)')
+_FENCE = re.compile(r'```json\s*\Z', re.IGNORECASE)
+
+
+class ItemParser:
+    """The objects of a streamed response's first JSON array"""
+
+    def __init__(self, on_item: Optional[Callable[[Any], None]] = None):
+        self.on_item = on_item
+        self.reset()
+
+    def reset(self):
+        """Start over, e.g. for a retried call"""
+        self.items: List[Any] = []
+        self.complete = False
+        self._buffer = ''
+        self._pos = 0
+        self._stack = []  # open '{' and '['
+        self._in_string = False
+        self._skip_until = 0  # past an escaped character
+        self._array_depth = None  # stack depth inside the item array
+        self._item_start = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return self._buffer
+
+    def feed(self, text: str):
+        if not text:
+            return
+        self._buffer += text
+        if self.complete:
+            if self.items or '{' not in text:
+                return
+            self.complete = False  # objects after an empty array: keep looking
+        for match in _SPECIAL.finditer(self._buffer, self._pos):
+            index = match.start()
+            if index < self._skip_until:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == '\\':
+                    self._skip_until = index + 2
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif self._array_depth is None and char in '[]':
+                if char == ']':
+                    continue  # prose
+                opens = self._opens_array(index)
+                if opens is None:
+                    self._pos = index  # decided by the next chunk
+                    return
+                if opens:
+                    self._stack.append(char)
+                    self._array_depth = len(self._stack)
+            elif char in '{[':
+                self._stack.append(char)
+                if char == '{' and len(self._stack) == (self._array_depth or 0) + 1:
+                    self._item_start = index
+            elif self._stack:
+                self._stack.pop()
+                depth = len(self._stack)
+                if char == '}' and depth == self._array_depth and self._item_start is not None:
+                    self._emit(self._buffer[self._item_start:index + 1])
+                    self._item_start = None
+                elif char == ']' and self._array_depth is not None and depth == self._array_depth - 1:
+                    self._array_depth = None
+                    # Objects outside the enclosing ones: that array was not the answer
+                    if self.items or self._buffer.count('{') <= self._stack.count('{'):
+                        self.complete = True
+                        self._pos = index + 1
+                        return
+        self._pos = len(self._buffer)
+
+    def _opens_array(self, index: int) -> Optional[bool]:
+        """Whether the '[' at `index` opens the item array; None until the
+        text after it has arrived"""
+        if _FENCE.search(self._buffer[max(0, index - 64):index]):
+            return True
+        following = _NEXT.match(self._buffer, index + 1)
+        if following is None:
+            return None
+        return following.group(1) in '{]'
+
+    def finish(self, text: str) -> List[Any]:
+        """Items of the final response `text`. A response served from the
+        LLM cache never streamed through this parser, so it is parsed now."""
+        if text != self._buffer:
+            self.reset()
+            self.feed(text)
+        return self.items
+
+    def _emit(self, raw: str):
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return  # malformed object: the rest of the array may still parse
+        self.items.append(item)
+        if self.on_item is not None:
+            self.on_item(item)
+
+    def consume(self, chunks: Iterable[str], deadline: float) -> bool:
+        """Feed a blocking text stream until it ends, or stop after `deadline`
+        seconds (checked between chunks). True if the stream ended in time."""
+        expires_at = time.monotonic() + deadline
+        for chunk in chunks:
+            self.feed(chunk)
+            if time.monotonic() >= expires_at:
+                return False
+        return True
+
+    async def aconsume(self, chunks: AsyncIterable[str], deadline: float) -> bool:
+        """consume() for async streams; the deadline interrupts a stalled read"""
+        async def read():
+            async for chunk in chunks:
+                self.feed(chunk)
+        try:
+            await asyncio.wait_for(read(), deadline)
+            return True
+        except asyncio.TimeoutError:
+            return False
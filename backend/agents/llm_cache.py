@@ -0,0 +1,396 @@
+"""
+LLM response cache shared by every provider call
+Re-triggered runs send the same prompts again, and duplicate files in a repo
+(vendored copies, generated code) produce identical prompts inside one run.
+Every provider call goes through LLMCache.call():
+
+  key      sha256 of provider, model, parameters and the normalized prompt
+           (line endings and trailing whitespace ignored; the analyzed
+           file's path masked, so identical files at different paths share
+           one entry)
+  memory   small per-container LRU in front of the backend
+  backend  DynamoDB: the analysis-cache table, "llm#" keys, zlib-compressed
+           bodies, TTL on expires_at
+           disk: one compressed file per entry with an expiry header;
+           least recently read entries are evicted past LLM_CACHE_MAX_BYTES
+  lock     a lease per key (DynamoDB conditional put / O_EXCL lock file), so
+           concurrent identical prompts across containers make one paid call;
+           the others wait for its result, and take over if the lease expires
+
+LLMCache.acall() is the asyncio flavour: backend I/O runs in threads and
+waiting for another caller's result never blocks the event loop. aget()
+only reads, so a rate-limited caller can check the cache before it queues
+and take the lease once its call is due.
+
+Only successful responses are cached: a provider error propagates, and a
+response the caller's `valid` check rejects (e.g. unparseable JSON) is
+returned once but not stored, so the next caller retries either way.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+LLM_CACHE_BACKEND = os.environ.get('LLM_CACHE_BACKEND') or (
+    'dynamodb' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else 'disk')
+LLM_CACHE_TABLE = os.environ.get('ANALYSIS_CACHE_TABLE', 'vajraopz-prod-analysis-cache')
+LLM_CACHE_DIR = os.environ.get('LLM_CACHE_DIR', '/tmp/vajraopz-llm-cache')
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+LLM_CACHE_MEMORY_ITEMS = int(os.environ.get('LLM_CACHE_MEMORY_ITEMS', '256'))
+# How long one caller may hold a key before others stop waiting for it
+LLM_LOCK_LEASE = int(os.environ.get('LLM_LOCK_LEASE', '120'))
+LLM_LOCK_POLL = float(os.environ.get('LLM_LOCK_POLL', '0.5'))
+
+_TRAILING_SPACE = re.compile(r'[ \t]+$', re.MULTILINE)
+
+
+def normalize_prompt(prompt: str, file_path: Optional[str] = None) -> str:
+    prompt = _TRAILING_SPACE.sub('', prompt.replace('\r\n', '\n')).strip()
+    if file_path:
+        ext = os.path.splitext(file_path)[1]
+        prompt = prompt.replace(file_path, f'<file>{ext}')
+    return prompt
+
+
+def prompt_key(provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+               file_path: Optional[str] = None) -> str:
+    identity = json.dumps([provider, model, params or {}, normalize_prompt(prompt, file_path)],
+                          sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+# =====================================================================
+#  BACKENDS
+# =====================================================================
+class DynamoBackend:
+    """Entries and leases as items of the analysis-cache table"""
+
+    def __init__(self, table_name: str = LLM_CACHE_TABLE):
+        import boto3
+        self.table = boto3.resource('dynamodb').Table(table_name)
+        self.owner = uuid.uuid4().hex
+
+    def get(self, key: str) -> Optional[bytes]:
+        item = self.table.get_item(Key={'cache_key': f'llm#{key}'},
+                                   ProjectionExpression='body, expires_at').get('Item')
+        if item is None or int(item['expires_at']) <= time.time():
+            return None
+        return bytes(item['body'].value if hasattr(item['body'], 'value') else item['body'])
+
+    def put(self, key: str, body: bytes, ttl: int):
+        self.table.put_item(Item={
+            'cache_key': f'llm#{key}',
+            'analyzer': 'llm',
+            'body': body,
+            'expires_at': int(time.time()) + ttl,
+        })
+
+    def acquire(self, key: str, lease: int) -> bool:
+        now = int(time.time())
+        try:
+            self.table.put_item(
+                Item={'cache_key': f'lock#{key}', 'owner': self.owner,
+                      'lease_until': now + lease, 'expires_at': now + lease + 3600},
+                ConditionExpression='attribute_not_exists(cache_key) OR lease_until < :now',
+                ExpressionAttributeValues={':now': now},
+            )
+            return True
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def release(self, key: str):
+        try:
+            self.table.delete_item(Key={'cache_key': f'lock#{key}'},
+                                   ConditionExpression='#owner = :owner',
+                                   ExpressionAttributeNames={'#owner': 'owner'},
+                                   ExpressionAttributeValues={':owner': self.owner})
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass  # lease expired and was taken over
+
+
+class DiskBackend:
+    """Local stand-in: <dir>/<key[:2]>/<key> holds an 8-byte expiry followed by
+    the body. Reads bump the file's mtime, which orders eviction."""
+
+    def __init__(self, root: str = LLM_CACHE_DIR, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._written = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str, suffix: str = '') -> str:
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if int.from_bytes(data[:8], 'big') <= time.time():
+            self._remove(path)
+            return None
+        os.utime(path)
+        return data[8:]
+
+    def put(self, key: str, body: bytes, ttl: int):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(int(time.time() + ttl).to_bytes(8, 'big') + body)
+        os.replace(tmp, path)
+        self._written += len(body) + 8
+        if self._written > self.max_bytes // 16:
+            self._written = 0
+            self.evict()
+
+    def evict(self):
+        """Drop least recently read entries until the cache fits in max_bytes
+        (expired ones are removed when next read)"""
+        entries = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(('.lock', '.tmp')):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def acquire(self, key: str, lease: int) -> bool:
+        path = self._path(key, '.lock')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    stale = os.stat(path).st_mtime + lease < time.time()
+                except FileNotFoundError:
+                    continue
+                if not stale:
+                    return False
+                self._remove(path)
+                continue
+            os.close(fd)
+            return True
+        return False
+
+    def release(self, key: str):
+        self._remove(self._path(key, '.lock'))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# =====================================================================
+#  CACHE
+# =====================================================================
+class LLMCache:
+    def __init__(self, backend: Any, ttl: int = LLM_CACHE_TTL, memory_items: int = LLM_CACHE_MEMORY_ITEMS,
+                 lease: int = LLM_LOCK_LEASE, poll: float = LLM_LOCK_POLL):
+        self.backend = backend
+        self.ttl = ttl
+        self.lease = lease
+        self.poll = poll
+        self.memory_items = memory_items
+        self.hits = 0
+        self.misses = 0
+        self._memory: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def call(self, provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+             fn: Callable[[], str], file_path: Optional[str] = None,
+             valid: Optional[Callable[[str], bool]] = None) -> str:
+        """Response text for this request: cached, awaited from another
+        caller already making it, or `fn()` (the paid call)"""
+        key = prompt_key(provider, model, params, prompt, file_path)
+        text = self._lookup(key)
+        if text is not None:
+            return self._counted(text)
+
+        waited_until = time.time() + self.lease
+        locked = self._acquire(key)
+        while not locked:
+            time.sleep(self.poll)
+            text = self._lookup(key)
+            if text is not None:
+                return self._counted(text)
+            # Once the wait is over the holder's lease has expired too, so
+            # this takes it over unless the backend is failing
+            locked = self._acquire(key)
+            if not locked and time.time() > waited_until:
+                print(f'[LLMCache] Gave up waiting on {provider}/{model} {key[:12]}, calling without the lock')
+                break
+        try:
+            if locked:
+                # The previous holder may have finished between lookup and acquire
+                text = self._lookup(key)
+                if text is not None:
+                    return self._counted(text)
+            self._counted(None)
+            text = fn()
+            self._save(key, text, valid)
+            return text
+        finally:
+            if locked:
+                self._release(key)
+
+    async def acall(self, provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+                    fn: Callable[[], Awaitable[str]], file_path: Optional[str] = None,
+                    valid: Optional[Callable[[str], bool]] = None) -> str:
+        """call() for coroutines: `fn()` is awaited"""
+        key = prompt_key(provider, model, params, prompt, file_path)
+        text = await asyncio.to_thread(self._lookup, key)
+        if text is not None:
+            return self._counted(text)
+
+        waited_until = time.time() + self.lease
+        locked = await asyncio.to_thread(self._acquire, key)
+        while not locked:
+            await asyncio.sleep(self.poll)
+            text = await asyncio.to_thread(self._lookup, key)
+            if text is not None:
+                return self._counted(text)
+            locked = await asyncio.to_thread(self._acquire, key)
+            if not locked and time.time() > waited_until:
+                print(f'[LLMCache] Gave up waiting on {provider}/{model} {key[:12]}, calling without the lock')
+                break
+        try:
+            if locked:
+                text = await asyncio.to_thread(self._lookup, key)
+                if text is not None:
+                    return self._counted(text)
+            self._counted(None)
+            text = await fn()
+            await asyncio.to_thread(self._save, key, text, valid)
+            return text
+        finally:
+            if locked:
+                await asyncio.to_thread(self._release, key)
+
+    async def aget(self, provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+                   file_path: Optional[str] = None) -> Optional[str]:
+        """The cached response, or None without taking the lock; lets a caller
+        skip queueing for a call that acall() would answer from the cache"""
+        text = await asyncio.to_thread(self._lookup, prompt_key(provider, model, params, prompt, file_path))
+        return self._counted(text) if text is not None else None
+
+    def _counted(self, text: Optional[str]) -> Optional[str]:
+        """Record the outcome of one call's lookup, once: a hit (from memory,
+        the backend, or another caller's fill) or a miss (None)"""
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return text
+
+    def _save(self, key: str, text: str, valid: Optional[Callable[[str], bool]]):
+        if valid is not None and not valid(text):
+            return
+        self._remember(key, text)
+        try:
+            self.backend.put(key, zlib.compress(text.encode(), 6), self.ttl)
+        except Exception as e:
+            print(f'[LLMCache] Write failed: {e}')
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+        try:
+            body = self.backend.get(key)
+        except Exception as e:
+            print(f'[LLMCache] Read failed: {e}')
+            return None
+        if body is None:
+            return None
+        text = zlib.decompress(body).decode()
+        self._remember(key, text)
+        return text
+
+    def _remember(self, key: str, text: str):
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _acquire(self, key: str) -> bool:
+        try:
+            return self.backend.acquire(key, self.lease)
+        except Exception as e:
+            print(f'[LLMCache] Lock failed, calling without it: {e}')
+            return True
+
+    def _release(self, key: str):
+        try:
+            self.backend.release(key)
+        except Exception as e:
+            print(f'[LLMCache] Unlock failed: {e}')
+
+
+_default: Optional[LLMCache] = None
+_default_lock = threading.Lock()
+
+
+def llm_cache() -> LLMCache:
+    """Process-wide cache on the configured backend (created on first use)"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                backend = DynamoBackend() if LLM_CACHE_BACKEND == 'dynamodb' else DiskBackend()
+                _default = LLMCache(backend)
+    return _default
+
+
+def cached_call(provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+                fn: Callable[[], str], file_path: Optional[str] = None,
+                valid: Optional[Callable[[str], bool]] = None) -> str:
+    return llm_cache().call(provider, model, params, prompt, fn, file_path, valid)
+
+
+async def acached_call(provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+                       fn: Callable[[], Awaitable[str]], file_path: Optional[str] = None,
+                       valid: Optional[Callable[[str], bool]] = None) -> str:
+    return await llm_cache().acall(provider, model, params, prompt, fn, file_path, valid)
+
+
+async def acached_get(provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+                      file_path: Optional[str] = None) -> Optional[str]:
+    return await llm_cache().aget(provider, model, params, prompt, file_path)
+
+
+def is_json(text: str) -> bool:
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
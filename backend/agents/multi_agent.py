@@ -13,18 +13,38 @@ import google.generativeai as genai
 import openai
 from datetime import datetime
 
+from json_stream import ItemParser
+from llm_cache import cached_call
+
 # API Keys (set via environment variables)
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY')
 CLAUDE_API_KEY = os.environ.get('CLAUDE_API_KEY')
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 
+# Responses stream in; past this many seconds a call keeps the issues that
+# arrived (and is not cached)
+LLM_CALL_DEADLINE = float(os.environ.get('LLM_CALL_DEADLINE', '90'))
+
 # Initialize clients
 genai.configure(api_key=GEMINI_API_KEY)
 claude_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
 openai.api_key = OPENAI_API_KEY
 
 
+def stream_claude(prompt: str, parser: ItemParser) -> str:
+    """Stream a Claude completion into `parser`, stopping at the deadline"""
+    parser.reset()
+    with claude_client.messages.stream(
+        model="claude-3-5-sonnet-20241022",
+        max_tokens=4096,
+        messages=[{"role": "user", "content": prompt}]
+    ) as stream:
+        if not parser.consume(stream.text_stream, LLM_CALL_DEADLINE):
+            print(f"[Claude] Deadline hit, keeping {len(parser.items)} items")
+    return parser.text
+
+
 class AgentState(TypedDict):
     """State shared across all agents"""
     code_files: Dict[str, str]
@@ -49,18 +69,27 @@ class OpenRouterAgent:
         
         for file_path, content in state['code_files'].items():
             try:
-                response = openai.ChatCompletion.create(
-                    model="anthropic/claude-3.5-sonnet",
-                    messages=[{
-                        "role": "user",
-                        "content": f"Analyze this code for errors (LINTING, SYNTAX, LOGIC):\n\nFile: {file_path}\n\n{content}\n\nReturn JSON: {{\"issues\": [{{\"type\": \"LINTING|SYNTAX|LOGIC\", \"line\": 10, \"message\": \"...\", \"fix\": \"...\"}}]}}"
-                    }],
-                    api_key=OPENROUTER_API_KEY,
-                    base_url="https://openrouter.ai/api/v1"
-                )
+                prompt = f"Analyze this code for errors (LINTING, SYNTAX, LOGIC):\n\nFile: {file_path}\n\n{content}\n\nReturn JSON: {{\"issues\": [{{\"type\": \"LINTING|SYNTAX|LOGIC\", \"line\": 10, \"message\": \"...\", \"fix\": \"...\"}}]}}"
+                parser = ItemParser()
+                
+                def stream():
+                    parser.reset()
+                    chunks = openai.ChatCompletion.create(
+                        model="anthropic/claude-3.5-sonnet",
+                        messages=[{"role": "user", "content": prompt}],
+                        api_key=OPENROUTER_API_KEY,
+                        base_url="https://openrouter.ai/api/v1",
+                        stream=True
+                    )
+                    deltas = (getattr(chunk.choices[0].delta, 'content', None) or '' for chunk in chunks if chunk.choices)
+                    if not parser.consume(deltas, LLM_CALL_DEADLINE):
+                        print(f"[OpenRouter] Deadline hit on {file_path}, keeping {len(parser.items)} issues")
+                    return parser.text
                 
-                result = json.loads(response.choices[0].message.content)
-                for issue in result.get('issues', []):
+                text = cached_call('openrouter', "anthropic/claude-3.5-sonnet", None, prompt, stream,
+                                   file_path=file_path, valid=lambda _: parser.complete)
+                
+                for issue in parser.finish(text):
                     fixes.append({
                         'agent': 'openrouter',
                         'file': file_path,
@@ -85,17 +114,13 @@ class ClaudeAgent:
         
         for file_path, content in state['code_files'].items():
             try:
-                message = claude_client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=4096,
-                    messages=[{
-                        "role": "user",
-                        "content": f"Analyze this code for errors (LINTING, SYNTAX, LOGIC):\n\nFile: {file_path}\n\n{content}\n\nReturn JSON: {{\"issues\": [{{\"type\": \"LINTING|SYNTAX|LOGIC\", \"line\": 10, \"message\": \"...\", \"fix\": \"...\"}}]}}"
-                    }]
-                )
+                prompt = f"Analyze this code for errors (LINTING, SYNTAX, LOGIC):\n\nFile: {file_path}\n\n{content}\n\nReturn JSON: {{\"issues\": [{{\"type\": \"LINTING|SYNTAX|LOGIC\", \"line\": 10, \"message\": \"...\", \"fix\": \"...\"}}]}}"
+                parser = ItemParser()
+                text = cached_call('claude', "claude-3-5-sonnet-20241022", {'max_tokens': 4096}, prompt,
+                                   lambda: stream_claude(prompt, parser), file_path=file_path,
+                                   valid=lambda _: parser.complete)
                 
-                result = json.loads(message.content[0].text)
-                for issue in result.get('issues', []):
+                for issue in parser.finish(text):
                     fixes.append({
                         'agent': 'claude',
                         'file': file_path,
@@ -122,10 +147,19 @@ class GeminiAgent:
         for file_path, content in state['code_files'].items():
             try:
                 prompt = f"Analyze this code for errors (LINTING, SYNTAX, LOGIC):\n\nFile: {file_path}\n\n{content}\n\nReturn JSON: {{\"issues\": [{{\"type\": \"LINTING|SYNTAX|LOGIC\", \"line\": 10, \"message\": \"...\", \"fix\": \"...\"}}]}}"
-                response = model.generate_content(prompt)
+                parser = ItemParser()
+                
+                def stream():
+                    parser.reset()
+                    chunks = (chunk.text for chunk in model.generate_content(prompt, stream=True))
+                    if not parser.consume(chunks, LLM_CALL_DEADLINE):
+                        print(f"[Gemini] Deadline hit on {file_path}, keeping {len(parser.items)} issues")
+                    return parser.text
                 
-                result = json.loads(response.text)
-                for issue in result.get('issues', []):
+                text = cached_call('gemini', 'gemini-pro', None, prompt, stream, file_path=file_path,
+                                   valid=lambda _: parser.complete)
+                
+                for issue in parser.finish(text):
                     fixes.append({
                         'agent': 'gemini',
                         'file': file_path,
@@ -175,17 +209,11 @@ class CTOAgent:
         # Use Claude to decide which fixes to apply
         try:
             fixes_summary = json.dumps(all_fixes, indent=2)
-            message = claude_client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=4096,
-                messages=[{
-                    "role": "user",
-                    "content": f"You are a CTO reviewing code fixes from multiple AI agents. Select the best fixes to apply.\n\nAll proposed fixes:\n{fixes_summary}\n\nReturn JSON: {{\"selected_fixes\": [{{\"file\": \"...\", \"line\": 10, \"type\": \"...\", \"message\": \"...\", \"fix\": \"...\", \"agent\": \"...\"}}]}}"
-                }]
-            )
-            
-            result = json.loads(message.content[0].text)
-            state['selected_fixes'] = result.get('selected_fixes', [])
+            prompt = f"You are a CTO reviewing code fixes from multiple AI agents. Select the best fixes to apply.\n\nAll proposed fixes:\n{fixes_summary}\n\nReturn JSON: {{\"selected_fixes\": [{{\"file\": \"...\", \"line\": 10, \"type\": \"...\", \"message\": \"...\", \"fix\": \"...\", \"agent\": \"...\"}}]}}"
+            parser = ItemParser()
+            text = cached_call('claude', "claude-3-5-sonnet-20241022", {'max_tokens': 4096}, prompt,
+                               lambda: stream_claude(prompt, parser), valid=lambda _: parser.complete)
+            state['selected_fixes'] = parser.finish(text)
             
         except Exception as e:
             print(f"[CTO] Error: {e}")
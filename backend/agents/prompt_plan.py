@@ -0,0 +1,288 @@
+"""
+Prompt planning for the agent worker's LLM analysis
+Every file used to be its own request, cut to its first 3000 characters:
+small files each paid a full round trip, and the rest of a large file was
+never analyzed. plan() turns files into token-budgeted requests instead:
+
+  - small files are packed together into one request, up to the budget
+  - a file over the budget is split into chunks at function or class
+    boundaries: from `ast` for Python, from bracket matching for JS/TS and
+    the other brace languages, from indentation for anything else
+  - every line of every file lands in exactly one chunk
+
+Lines are sent with their file line numbers, so issues come back with real
+line numbers whichever chunk they were found in. Batch.issues() maps each
+returned issue to its file. Token counts are estimated (about three
+characters of code per token, plus the line-number prefix), not exact.
+"""
+
+import ast
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from records import Issue
+
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', '8000'))
+MIN_OUTPUT_TOKENS = 512
+MAX_OUTPUT_TOKENS = int(os.environ.get('MAX_OUTPUT_TOKENS', '4096'))
+
+# Estimated cost of the instructions, of each chunk's header and of each
+# line's number prefix
+PROMPT_OVERHEAD = 200
+CHUNK_OVERHEAD = 20
+LINE_OVERHEAD = 3
+
+BRACE_LANGUAGES = {'.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.java', '.go', '.c', '.h',
+                   '.cpp', '.hpp', '.cc', '.cs', '.rs', '.php', '.swift', '.kt', '.scala'}
+
+PROMPT = """Analyze the code below for issues. Each line starts with its line number in the file.
+Return ONLY a JSON array of issues, one object per issue:
+
+[
+  {{"file": "src/app.js", "line": 10, "type": "LINTING", "severity": "Medium", "message": "Issue description", "suggestion": "How to fix"}}
+]
+
+"file" is the path from the header above the code and "line" the number before the code line.
+Types: LINTING, SYNTAX, LOGIC, STYLE
+Severity: Low, Medium, High, Critical
+
+{code}"""
+
+# Strings, comments and brackets of C-like languages; a string or comment
+# may span lines, so its newlines are counted separately
+_BRACE_TOKEN = re.compile(
+    r'//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?|`(?:\\.|[^`\\])*`?|[\n({[\]})]',
+    re.DOTALL
+)
+_COMMENT_LINE = re.compile(r'\s*(?:#|//|/\*|\*)')
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast upper-end token estimate for source code (about three characters
+    per token; prose runs closer to four)"""
+    return (len(text) + 2) // 3
+
+
+class Chunk:
+    """Lines start..start+len(lines)-1 (1-based) of one file"""
+    __slots__ = ('path', 'start', 'lines', 'tokens')
+
+    def __init__(self, path: str, start: int, lines: List[str], tokens: int):
+        self.path = path
+        self.start = start
+        self.lines = lines
+        self.tokens = tokens
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.lines) - 1
+
+    def render(self) -> str:
+        width = len(str(self.end))
+        body = '\n'.join(f'{self.start + i:>{width}}| {line.rstrip()}' for i, line in enumerate(self.lines))
+        return f'=== {self.path} (lines {self.start}-{self.end}) ===\n{body}'
+
+    def __repr__(self):
+        return f'Chunk({self.path}:{self.start}-{self.end}, ~{self.tokens} tokens)'
+
+
+class Batch:
+    """Chunks sent to the models as one request"""
+    __slots__ = ('chunks', 'tokens')
+
+    def __init__(self):
+        self.chunks: List[Chunk] = []
+        self.tokens = PROMPT_OVERHEAD
+
+    def add(self, chunk: Chunk):
+        self.chunks.append(chunk)
+        self.tokens += chunk.tokens + CHUNK_OVERHEAD
+
+    @property
+    def paths(self) -> List[str]:
+        return list(dict.fromkeys(chunk.path for chunk in self.chunks))
+
+    @property
+    def single_path(self) -> Optional[str]:
+        """The file, when the batch holds only one"""
+        paths = self.paths
+        return paths[0] if len(paths) == 1 else None
+
+    def prompt(self) -> str:
+        return PROMPT.format(code='\n\n'.join(chunk.render() for chunk in self.chunks))
+
+    def max_tokens(self) -> int:
+        """Output budget, scaled with the input: more code, more issues"""
+        return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, MIN_OUTPUT_TOKENS + self.tokens // 4))
+
+    def issues(self, items) -> List[Issue]:
+        """Issue records for a parsed response, each matched to a file of the
+        batch. Items naming no file of the batch are dropped."""
+        if not isinstance(items, list):
+            return []
+        paths = self.paths
+        issues = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            path = paths[0] if len(paths) == 1 else _match_path(item.get('file'), paths)
+            if path is not None:
+                issues.append(Issue.from_dict(item, path))
+        return issues
+
+    def __repr__(self):
+        return f'Batch({len(self.chunks)} chunks, ~{self.tokens} tokens)'
+
+
+def _match_path(name, paths: List[str]) -> Optional[str]:
+    """The batch path a model meant: exact, else the only path ending in it"""
+    name = str(name or '').strip()
+    if name.startswith('./'):
+        name = name[2:]
+    if name in paths:
+        return name
+    matches = [path for path in paths if name and (path.endswith('/' + name) or name.endswith('/' + path))]
+    return matches[0] if len(matches) == 1 else None
+
+
+# =====================================================================
+#  SPLITTING
+# =====================================================================
+def boundaries(path: str, content: str, lines: List[str]) -> Dict[int, int]:
+    """Lines (0-based) where a chunk may start, with their nesting depth:
+    0 for top-level definitions, 1 for methods, and so on"""
+    ext = os.path.splitext(path)[1].lower()
+    depths = None
+    if ext == '.py':
+        depths = _python_boundaries(content)
+    elif ext in BRACE_LANGUAGES:
+        depths = _brace_boundaries(content)
+    if depths is None:
+        depths = _indent_boundaries(lines)
+    return _with_leading_comments(depths, lines)
+
+
+def _python_boundaries(content: str) -> Optional[Dict[int, int]]:
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None  # not valid Python: indentation still works
+    depths = {}
+
+    def visit(body, depth):
+        for node in body:
+            decorators = getattr(node, 'decorator_list', ())
+            start = min([node.lineno] + [decorator.lineno for decorator in decorators]) - 1
+            depths.setdefault(start, depth)
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(node.body, depth + 1)
+
+    visit(tree.body, 0)
+    return depths
+
+
+def _brace_boundaries(content: str) -> Dict[int, int]:
+    """Bracket depth at the start of each line, skipping brackets inside
+    strings and comments"""
+    depths = {0: 0}
+    depth = line = 0
+    for match in _BRACE_TOKEN.finditer(content):
+        token = match.group()
+        if token == '\n':
+            line += 1
+            depths[line] = depth
+        elif token in '({[':
+            depth += 1
+        elif token in ')}]':
+            depth = max(0, depth - 1)
+        else:
+            line += token.count('\n')  # inside a comment or template string
+    return depths
+
+
+def _indent_boundaries(lines: List[str]) -> Dict[int, int]:
+    depths = {}
+    for index, line in enumerate(lines):
+        stripped = line.lstrip()
+        if stripped:
+            depths[index] = (len(line) - len(stripped)) // 2
+    return depths
+
+
+def _with_leading_comments(depths: Dict[int, int], lines: List[str]) -> Dict[int, int]:
+    """Move each boundary up over the comment lines directly above it, so a
+    definition keeps its doc comment"""
+    moved = {}
+    for index in sorted(depths):
+        start = index
+        while start > 0 and start - 1 not in depths and _COMMENT_LINE.match(lines[start - 1]):
+            start -= 1
+        moved.setdefault(start, depths[index])
+    return moved
+
+
+def _cut(depths: Dict[int, int], start: int, end: int) -> int:
+    """Where the next chunk starts, in (start, end]: the shallowest boundary,
+    preferring the later half of the range so chunks stay full"""
+    for low in (start + (end - start) // 2, start):
+        best = None
+        for index in range(end, low, -1):
+            depth = depths.get(index)
+            if depth is not None and (best is None or depth < best[0]):
+                best = (depth, index)
+        if best is not None:
+            return best[1]
+    return end  # no boundary at all: cut mid-definition
+
+
+def split_file(path: str, content: str, budget: int) -> List[Chunk]:
+    """Chunks of at most `budget` estimated tokens covering every line. A
+    single line over the budget (minified code) is shortened to fit."""
+    lines = content.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()  # the final newline
+    costs = [estimate_tokens(line) + LINE_OVERHEAD for line in lines]
+    total = sum(costs)
+    if total <= budget:
+        return [Chunk(path, 1, lines, total)] if lines else []
+    depths = boundaries(path, content, lines)
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = start
+        tokens = 0
+        while end < len(lines) and tokens + costs[end] <= budget:
+            tokens += costs[end]
+            end += 1
+        if end == start:
+            shortened = lines[start][:(budget - LINE_OVERHEAD) * 3]
+            chunks.append(Chunk(path, start + 1, [shortened], budget))
+            start += 1
+            continue
+        if end < len(lines):
+            end = _cut(depths, start, end)
+            tokens = sum(costs[start:end])
+        chunks.append(Chunk(path, start + 1, lines[start:end], tokens))
+        start = end
+    return chunks
+
+
+# =====================================================================
+#  PACKING
+# =====================================================================
+def plan(files: Iterable[Tuple[str, str]], budget: int = PROMPT_TOKEN_BUDGET) -> List[Batch]:
+    """Requests covering every line of `files` ((path, content) pairs), each
+    within `budget` estimated input tokens. Chunks go into the first batch
+    with room (first fit), so batches fill up in file order."""
+    room = budget - PROMPT_OVERHEAD
+    batches: List[Batch] = []
+    for path, content in files:
+        for chunk in split_file(path, content, room - CHUNK_OVERHEAD):
+            cost = chunk.tokens + CHUNK_OVERHEAD
+            batch = next((batch for batch in batches if batch.tokens + cost <= budget), None)
+            if batch is None:
+                batch = Batch()
+                batches.append(batch)
+            batch.add(chunk)
+    return batches
@@ -0,0 +1,400 @@
+"""
+Per-provider rate limiting for the agent worker's LLM calls
+With every (file, provider) call in flight at once, Anthropic, Gemini and
+OpenRouter all start answering 429. The Scheduler keeps each provider under
+its limits instead of losing those files' results:
+
+  - two token buckets per provider, requests and input tokens per minute;
+    a call starts only when both have room for it
+  - pending calls wait in a priority queue per provider, so the files picked
+    first finish first, and a retried call keeps its place in the queue
+  - a 429 (or Anthropic's 529 overload) pauses the provider for the
+    response's retry-after, or a jittered exponential backoff, and halves
+    its request rate; each success moves the rate back towards the limit
+  - other transient failures (5xx, timeouts, dropped connections) are
+    retried with the same backoff, up to max_attempts calls in total
+
+One semaphore still caps the calls in flight across all providers.
+
+The buckets only see one process, and ten deployments running at once share
+the same API keys. With a `quota`, each call must also get a grant from a
+fixed-window counter shared by every worker: DynamoQuota, one item per
+provider per RATE_LIMIT_WINDOW seconds in the analysis-cache table
+(rate#{provider}#{window}), incremented atomically under a condition. When
+the window's share is spent, the provider waits for the next window, plus
+jitter so the workers don't all come back together. A 429 blocks the
+windows up to its retry-after for every worker. MemoryQuota is the
+in-process stand-in for tests and local dev. If the shared store fails,
+calls fall back to the local limits alone.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND') or (
+    'dynamodb' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else 'memory')
+RATE_LIMIT_TABLE = os.environ.get('ANALYSIS_CACHE_TABLE', 'vajraopz-prod-analysis-cache')
+RATE_LIMIT_WINDOW = int(os.environ.get('RATE_LIMIT_WINDOW', '10'))
+# A long retry-after blocks at most this many windows ahead
+MAX_BLOCKED_WINDOWS = 30
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+THROTTLED_STATUS = {429, 529}
+
+
+class RateLimit:
+    """Requests and input tokens per minute; 0 means unlimited"""
+    __slots__ = ('rpm', 'tpm')
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+
+
+class TokenBucket:
+    """Refills `rate` units per minute, up to one minute's worth. The rate
+    starts at the limit; throttled() and recovered() move it (AIMD)."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.limit = per_minute
+        self.rate = per_minute
+        self.level = per_minute
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.level = min(self.limit, self.level + (now - self.updated) * self.rate / 60)
+        self.updated = now
+
+    def wait(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken"""
+        if not self.limit:
+            return 0.0
+        self._refill(now)
+        # A call larger than the whole bucket waits for a full one
+        missing = min(amount, self.limit) - self.level
+        return missing * 60 / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float, now: float):
+        if self.limit:
+            self._refill(now)
+            self.level -= min(amount, self.limit)
+
+    def throttled(self, now: float):
+        """The provider pushed back: empty the bucket, halve the rate"""
+        if self.limit:
+            self._refill(now)
+            self.level = 0.0
+            self.rate = max(self.limit / 16, self.rate / 2)
+
+    def recovered(self, now: float):
+        if self.limit and self.rate < self.limit:
+            self._refill(now)
+            self.rate = min(self.limit, self.rate + self.limit / 20)
+
+
+def window_limits(limit: RateLimit, window: int) -> Tuple[int, int]:
+    """Requests and tokens allowed per shared window (0 = unlimited)"""
+    return (math.ceil(limit.rpm * window / 60) if limit.rpm else 0,
+            math.ceil(limit.tpm * window / 60) if limit.tpm else 0)
+
+
+class DynamoQuota:
+    """Per-window counters as items of the analysis-cache table, shared by
+    every worker. reserve() and block() return or raise like MemoryQuota."""
+
+    def __init__(self, table_name: str = RATE_LIMIT_TABLE, window: int = RATE_LIMIT_WINDOW):
+        import boto3
+        self.table = boto3.resource('dynamodb').Table(table_name)
+        self.window = window
+
+    def reserve(self, provider: str, limit: RateLimit, tokens: int, now: Optional[float] = None) -> float:
+        """Count one call of `tokens` against the current window. 0.0 if
+        granted, otherwise the seconds until the next window."""
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        requests, budget = window_limits(limit, self.window)
+        if not (requests or budget):
+            return 0.0
+        tokens = min(tokens, budget) if budget else tokens
+        condition = '(attribute_not_exists(blocked_until) OR blocked_until <= :now)'
+        values = {':one': 1, ':tokens': tokens, ':now': int(now), ':analyzer': 'rate',
+                  ':expires': (index + 1) * self.window + 3600}
+        if requests:
+            condition += ' AND (attribute_not_exists(#requests) OR #requests < :requests)'
+            values[':requests'] = requests
+        if budget:
+            condition += ' AND (attribute_not_exists(#tokens) OR #tokens <= :room)'
+            values[':room'] = budget - tokens
+        try:
+            self.table.update_item(
+                Key={'cache_key': f'rate#{provider}#{index}'},
+                UpdateExpression='ADD #requests :one, #tokens :tokens SET analyzer = :analyzer, expires_at = :expires',
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#requests': 'requests', '#tokens': 'tokens'},
+                ExpressionAttributeValues=values,
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return (index + 1) * self.window - now
+        return 0.0
+
+    def block(self, provider: str, until: float, now: Optional[float] = None):
+        """Refuse every worker's calls to `provider` until `until`"""
+        now = time.time() if now is None else now
+        first = int(now // self.window)
+        for index in range(first, min(int(until // self.window), first + MAX_BLOCKED_WINDOWS) + 1):
+            try:
+                self.table.update_item(
+                    Key={'cache_key': f'rate#{provider}#{index}'},
+                    UpdateExpression='SET blocked_until = :until, analyzer = :analyzer, expires_at = :expires',
+                    ConditionExpression='attribute_not_exists(blocked_until) OR blocked_until < :until',
+                    ExpressionAttributeValues={':until': math.ceil(until), ':analyzer': 'rate',
+                                               ':expires': (index + 1) * self.window + 3600},
+                )
+            except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+                pass  # another worker already blocked it for longer
+
+
+class MemoryQuota:
+    """Local stand-in for DynamoQuota: the same window counters in a dict,
+    shared by the schedulers of one process"""
+
+    def __init__(self, window: int = RATE_LIMIT_WINDOW):
+        self.window = window
+        self.windows: Dict[Tuple[str, int], list] = {}  # -> [requests, tokens, blocked_until]
+        self.lock = threading.Lock()
+
+    def reserve(self, provider: str, limit: RateLimit, tokens: int, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        requests, budget = window_limits(limit, self.window)
+        if not (requests or budget):
+            return 0.0
+        tokens = min(tokens, budget) if budget else tokens
+        with self.lock:
+            counter = self._window(provider, index, index)
+            if (counter[2] > now or (requests and counter[0] >= requests)
+                    or (budget and counter[1] + tokens > budget)):
+                return (index + 1) * self.window - now
+            counter[0] += 1
+            counter[1] += tokens
+        return 0.0
+
+    def block(self, provider: str, until: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        first = int(now // self.window)
+        with self.lock:
+            for index in range(first, min(int(until // self.window), first + MAX_BLOCKED_WINDOWS) + 1):
+                counter = self._window(provider, index, first)
+                counter[2] = max(counter[2], until)
+
+    def _window(self, provider: str, index: int, current: int) -> list:
+        counter = self.windows.get((provider, index))
+        if counter is None:
+            for key in [key for key in self.windows if key[1] < current]:
+                del self.windows[key]
+            counter = self.windows[(provider, index)] = [0, 0, 0.0]
+        return counter
+
+
+def shared_quota():
+    """The configured quota store: DynamoDB in AWS, the stand-in elsewhere"""
+    return DynamoQuota() if RATE_LIMIT_BACKEND == 'dynamodb' else MemoryQuota()
+
+
+class _Provider:
+    def __init__(self, name: str, limit: RateLimit, now: float):
+        self.name = name
+        self.limit = limit
+        self.requests = TokenBucket(limit.rpm, now)
+        self.tokens = TokenBucket(limit.tpm, now)
+        self.queue = []  # heap of [priority, seq, tokens, fn, future, attempt]
+        self.paused_until = 0.0
+        self.wakeup = asyncio.Event()
+        self.dispatcher = None
+
+    def wait(self, tokens: int, now: float) -> float:
+        return max(self.paused_until - now, self.requests.wait(1, now), self.tokens.wait(tokens, now))
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider error. anthropic errors carry status_code,
+    httpx errors their response, google.api_core errors an int `code`."""
+    for value in (getattr(exc, 'status_code', None),
+                  getattr(getattr(exc, 'response', None), 'status_code', None),
+                  getattr(exc, 'code', None)):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds to wait from the error response's retry-after-ms or
+    retry-after header (delta-seconds or an HTTP date), if it sent one"""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after-ms')
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Scheduler:
+    """Runs provider calls within each provider's RateLimit. Providers
+    missing from `limits` are only bounded by `concurrency`. `transient`
+    adds client exception types (e.g. httpx.TransportError) to retry.
+    `quota` (DynamoQuota or MemoryQuota) shares the limits across workers."""
+
+    def __init__(self, limits: Dict[str, RateLimit], concurrency: int = 8, max_attempts: int = 6,
+                 base_delay: float = 1.0, max_delay: float = 60.0, transient: tuple = (), quota=None):
+        self.limits = limits
+        self.quota = quota
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.transient = (asyncio.TimeoutError, ConnectionError) + tuple(transient)
+        self.throttled = 0
+        self.retries = 0
+        self._providers: Dict[str, _Provider] = {}
+        self._semaphore = None
+        self._seq = itertools.count()
+        self._running = set()
+
+    async def submit(self, provider: str, fn: Callable[[], Awaitable[Any]],
+                     tokens: int = 0, priority: int = 0) -> Any:
+        """Await fn() once `provider` has room for a call of `tokens` input
+        tokens. Lower priorities run first; equal ones in submission order.
+        Raises fn's exception once it is not retryable or attempts run out."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        state = self._providers.get(provider)
+        if state is None:
+            state = self._providers[provider] = _Provider(provider, self.limits.get(provider, RateLimit()), time.monotonic())
+        future = asyncio.get_running_loop().create_future()
+        self._push(state, [priority, next(self._seq), tokens, fn, future, 0])
+        try:
+            return await future
+        except asyncio.CancelledError:
+            state.wakeup.set()  # don't leave the dispatcher asleep for a dropped job
+            raise
+
+    def _push(self, provider: _Provider, job: list):
+        if job[4].done():  # the caller gave up while the job waited to retry
+            return
+        heapq.heappush(provider.queue, job)
+        provider.wakeup.set()
+        if provider.dispatcher is None or provider.dispatcher.done():
+            provider.dispatcher = asyncio.get_running_loop().create_task(self._dispatch(provider))
+
+    async def _dispatch(self, provider: _Provider):
+        """Start the provider's queued calls in priority order as its buckets
+        allow; exits when the queue is empty"""
+        queue = provider.queue
+        while queue:
+            if queue[0][4].done():
+                heapq.heappop(queue)
+                continue
+            delay = provider.wait(queue[0][2], time.monotonic())
+            if delay > 0:
+                # Sleep, but wake for a new job: it may outrank this one
+                provider.wakeup.clear()
+                try:
+                    await asyncio.wait_for(provider.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._semaphore.acquire()
+            now = time.monotonic()
+            # A 429 may have paused the provider while this waited for a slot
+            if not queue or queue[0][4].done() or provider.wait(queue[0][2], now) > 0:
+                self._semaphore.release()
+                continue
+            job = heapq.heappop(queue)
+            if self.quota is not None:
+                wait = await self._shared(self.quota.reserve, provider.name, provider.limit, job[2])
+                if wait > 0:
+                    # Every worker's share of this window is spent
+                    jitter = random.uniform(0, self.quota.window / 4)
+                    provider.paused_until = max(provider.paused_until, time.monotonic() + wait + jitter)
+                    heapq.heappush(queue, job)
+                    self._semaphore.release()
+                    continue
+                now = time.monotonic()
+            provider.requests.take(1, now)
+            provider.tokens.take(job[2], now)
+            task = asyncio.get_running_loop().create_task(self._run(provider, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            job[4].add_done_callback(lambda future, task=task: future.cancelled() and task.cancel())
+
+    async def _run(self, provider: _Provider, job: list):
+        future, attempt = job[4], job[5]
+        try:
+            result = await job[3]()
+        except Exception as e:
+            delay = None if future.done() else self._retry_delay(provider, e, attempt)
+            if delay is None:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                job[5] = attempt + 1
+                self.retries += 1
+                if self.quota is not None and status_code(e) in THROTTLED_STATUS:
+                    await self._shared(self.quota.block, provider.name, time.time() + delay)
+                print(f"[RateLimit] {provider.name}: {type(e).__name__} (status {status_code(e)}), "
+                      f"retry {attempt + 1} in {delay:.1f}s")
+                asyncio.get_running_loop().call_later(delay, self._push, provider, job)
+        else:
+            now = time.monotonic()
+            provider.requests.recovered(now)
+            provider.tokens.recovered(now)
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._semaphore.release()
+
+    async def _shared(self, method, *args) -> float:
+        """Call the quota store off the event loop. A failure only costs the
+        cross-worker limit: the local buckets still apply."""
+        try:
+            return await asyncio.to_thread(method, *args) or 0.0
+        except Exception as e:
+            print(f"[RateLimit] Shared quota unavailable, using local limits: {e}")
+            return 0.0
+
+    def _retry_delay(self, provider: _Provider, exc: Exception, attempt: int) -> Optional[float]:
+        """Seconds before retrying, or None to give up"""
+        status = status_code(exc)
+        if status not in RETRYABLE_STATUS and not isinstance(exc, self.transient):
+            return None
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = retry_after(exc)
+        if delay is None:
+            # Full jitter, so calls that failed together don't retry together
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if status in THROTTLED_STATUS:
+            now = time.monotonic()
+            provider.paused_until = max(provider.paused_until, now + delay)
+            provider.requests.throttled(now)
+            provider.tokens.throttled(now)
+            self.throttled += 1
+        return delay
@@ -0,0 +1,137 @@
+"""
+Compact issue and fix records for the agent worker
+Every provider returns issues as JSON objects that repeat the same file,
+type and severity strings. Held as dicts, a large repo means hundreds of
+thousands of them in Lambda memory. Here:
+
+  - Issue and Fix use __slots__ (no per-instance __dict__)
+  - file paths are interned, so every issue in a file shares one string
+  - type and severity are small IntEnums instead of strings
+  - a Fix references its Issue instead of copying its fields
+
+to_dict() restores the existing JSON shape. Call it only where results
+leave the worker (the DynamoDB write and the Lambda response).
+"""
+
+import sys
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class IssueType(IntEnum):
+    LINTING = 0
+    SYNTAX = 1
+    LOGIC = 2
+    STYLE = 3
+    OTHER = 4
+
+    @classmethod
+    def parse(cls, value: Any) -> 'IssueType':
+        return cls.__members__.get(str(value or '').strip().upper(), cls.OTHER)
+
+
+class Severity(IntEnum):
+    Low = 0
+    Medium = 1
+    High = 2
+    Critical = 3
+
+    @classmethod
+    def parse(cls, value: Any) -> 'Severity':
+        return cls.__members__.get(str(value or '').strip().capitalize(), cls.Medium)
+
+
+def _line_number(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 1
+
+
+class Issue:
+    __slots__ = ('file', 'line', 'type', 'severity', 'message', 'suggestion')
+
+    def __init__(self, file: str, line: int, type: IssueType, severity: Severity,
+                 message: str, suggestion: Optional[str] = None):
+        self.file = sys.intern(file)
+        self.line = line
+        self.type = type
+        self.severity = severity
+        self.message = message
+        self.suggestion = suggestion
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], file: str) -> 'Issue':
+        """Build from one provider JSON object. `file` is the path that was
+        analyzed; models sometimes echo it back mangled."""
+        return cls(
+            file=file,
+            line=_line_number(data.get('line', 1)),
+            type=IssueType.parse(data.get('type')),
+            severity=Severity.parse(data.get('severity')),
+            message=str(data.get('message', '')),
+            suggestion=data.get('suggestion'),
+        )
+
+    def key(self):
+        """Identity used for deduplication across providers"""
+        return (self.file, self.line, self.message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        issue = {
+            'file': self.file,
+            'line': self.line,
+            'type': self.type.name,
+            'severity': self.severity.name,
+            'message': self.message,
+        }
+        if self.suggestion is not None:
+            issue['suggestion'] = self.suggestion
+        return issue
+
+    def __repr__(self):
+        return f'Issue({self.file}:{self.line} {self.type.name}/{self.severity.name})'
+
+
+class Fix:
+    __slots__ = ('issue', 'old_code', 'new_code')
+
+    def __init__(self, issue: Issue, old_code: str, new_code: str):
+        self.issue = issue
+        self.old_code = old_code
+        self.new_code = new_code
+
+    @property
+    def file(self) -> str:
+        return self.issue.file
+
+    @property
+    def line(self) -> int:
+        return self.issue.line
+
+    def to_dict(self) -> Dict[str, Any]:
+        issue = self.issue
+        return {
+            'file': issue.file,
+            'line': issue.line,
+            'type': issue.type.name,
+            'severity': issue.severity.name,
+            'message': issue.message,
+            'old_code': self.old_code,
+            'new_code': self.new_code,
+        }
+
+    def __repr__(self):
+        return f'Fix({self.issue.file}:{self.issue.line})'
+
+
+def issues_from_json(items: Any, file: str) -> List[Issue]:
+    """Issue records for a parsed provider response, skipping anything that
+    is not an object"""
+    if not isinstance(items, list):
+        return []
+    return [Issue.from_dict(item, file) for item in items if isinstance(item, dict)]
+
+
+def to_dicts(records: Iterable[Any]) -> List[Dict[str, Any]]:
+    return [record.to_dict() for record in records]
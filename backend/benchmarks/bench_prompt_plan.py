@@ -0,0 +1,63 @@
+"""
+Micro-benchmark: LLM requests and line coverage for the worker's analysis.
+Compares the old scheme (one request per file, cut to content[:3000])
+against prompt_plan.plan on this repository's own source files:
+  requests - provider calls per analyzer
+  coverage - share of source lines the models actually see
+  tokens   - estimated input tokens sent
+Run: python backend/benchmarks/bench_prompt_plan.py [budget]
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agents'))
+
+from prompt_plan import estimate_tokens, plan  # noqa: E402
+
+EXTENSIONS = {'.py', '.js', '.jsx', '.ts', '.tsx'}
+SKIP_DIRS = {'node_modules', 'dist', 'build', 'package', 'python'}
+
+
+def source_files():
+    """Project sources only: the packages vendored into lambda/api are skipped"""
+    files = {}
+    api = os.path.join('backend', 'lambda', 'api')
+    for top in ('src', os.path.join('backend', 'agents'), api):
+        for directory, dirs, names in os.walk(os.path.join(ROOT, top)):
+            dirs[:] = [] if top == api else [d for d in dirs if d not in SKIP_DIRS]
+            for name in names:
+                if os.path.splitext(name)[1] in EXTENSIONS:
+                    path = os.path.join(directory, name)
+                    with open(path, encoding='utf-8', errors='replace') as f:
+                        files[os.path.relpath(path, ROOT)] = f.read()
+    return files
+
+
+def line_count(content):
+    return content.count('\n') + (not content.endswith('\n'))
+
+
+def main():
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    files = source_files()
+    total_lines = sum(line_count(content) for content in files.values())
+
+    seen_lines = sum(line_count(content[:3000]) for content in files.values())
+    legacy_tokens = sum(estimate_tokens(content[:3000]) + 150 for content in files.values())
+
+    start = time.perf_counter()
+    batches = plan(files.items(), budget)
+    elapsed = time.perf_counter() - start
+    planned_lines = sum(len(chunk.lines) for batch in batches for chunk in batch.chunks)
+
+    print(f"{len(files)} files, {total_lines} lines, budget {budget} tokens")
+    print(f"  legacy : {len(files):5d} requests, {seen_lines / total_lines:6.1%} of lines, ~{legacy_tokens} tokens")
+    print(f"  planned: {len(batches):5d} requests, {planned_lines / total_lines:6.1%} of lines, "
+          f"~{sum(batch.tokens for batch in batches)} tokens ({elapsed * 1000:.1f} ms to plan)")
+
+
+if __name__ == '__main__':
+    main()
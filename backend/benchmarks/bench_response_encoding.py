@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: GraphQL response encoding for a large deployment.
+Compares the old path (decimal_to_native deep copy + json.dumps, then the dev
+server's json.loads + jsonify round trip) against the single-pass encoder.
+Run: python backend/benchmarks/bench_response_encoding.py [issues]
+"""
+
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'api'))
+os.environ.setdefault('IS_LOCAL', 'true')
+
+from handler import create_response  # noqa: E402
+
+
+def decimal_to_native(obj):
+    if isinstance(obj, list):
+        return [decimal_to_native(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: decimal_to_native(v) for k, v in obj.items()}
+    elif isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    return obj
+
+
+def legacy_response(status_code, body):
+    if status_code >= 400:
+        json.dumps(body)
+    body = decimal_to_native(body)
+    encoded = json.dumps(body)
+    # dev_server.py: json.loads + jsonify
+    return json.dumps(json.loads(encoded))
+
+
+def deployment(n_issues):
+    issues = [{
+        'file': f'src/components/module_{i % 120}.js',
+        'line': Decimal(i % 400 + 1),
+        'type': ['LINTING', 'BUG', 'SECURITY', 'PERFORMANCE'][i % 4],
+        'severity': ['Low', 'Medium', 'High', 'Critical'][i % 4],
+        'message': f'Issue {i}: unused variable or unsafe call detected',
+        'suggestion': 'Remove the unused binding or guard the call',
+        'confidence': Decimal('0.87'),
+    } for i in range(n_issues)]
+    fixes = [{
+        'fix_id': f'fix-{i}',
+        'file': issue['file'],
+        'line': issue['line'],
+        'original_code': 'const unused = compute(value);',
+        'fixed_code': 'compute(value);',
+        'status': 'pending',
+    } for i, issue in enumerate(issues)]
+    return {'data': {'getDeployment': {
+        'deployment_id': 'bench',
+        'status': 'completed',
+        'total_issues': Decimal(n_issues),
+        'issues': issues,
+        'fixes': fixes,
+    }}}
+
+
+def main():
+    n_issues = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    body = deployment(n_issues)
+    assert json.loads(legacy_response(200, body)) == json.loads(create_response(200, body)['body'])
+
+    runs = 50
+    legacy = min(timeit.repeat(lambda: legacy_response(200, body), number=runs, repeat=5)) / runs
+    single = min(timeit.repeat(lambda: create_response(200, body), number=runs, repeat=5)) / runs
+    print(f'{n_issues} issues')
+    print(f'  legacy (copy + dumps + loads + dumps): {legacy * 1000:8.2f} ms')
+    print(f'  single-pass encoder:                   {single * 1000:8.2f} ms')
+    print(f'  speedup: {legacy / single:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
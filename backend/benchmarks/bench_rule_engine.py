@@ -0,0 +1,143 @@
+"""
+Micro-benchmark: lint throughput of the analyzer on a synthetic repository.
+Compares the old per-line checks (a function call, strip + substring tests
+and a dict per line) against rules.scan over whole file buffers, on two corpora:
+  dense   - flagged constructs on ~1 line in 5 of every file
+  typical - 1 file in 10 has any; the rest are clean code
+rules.scan runs the same substring tests by default, inline over the split
+buffer, and must stay at least as fast as the old checks; that is the
+relative throughput printed. scan(exact=True) tokenizes strings and
+comments, which the substring tests never did, and is slower: its ratio is
+printed alongside. All three must find the same issues on input where they
+should agree.
+Run: python backend/benchmarks/bench_rule_engine.py [lines]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'api'))
+
+from rules import scan  # noqa: E402
+
+
+def legacy_check_line(line, line_num, file_path, ext):
+    """The per-line checker as it was before the rule engine"""
+    issues = []
+    if ext in {'.js', '.jsx', '.ts', '.tsx'}:
+        if 'console.log' in line:
+            issues.append({'file': file_path, 'line': line_num, 'type': 'LINTING', 'severity': 'Low',
+                           'message': 'Remove console.log statement', 'fixable': True,
+                           'fix': line.replace('console.log', '// console.log')})
+        if 'var ' in line and not line.strip().startswith('//'):
+            issues.append({'file': file_path, 'line': line_num, 'type': 'LINTING', 'severity': 'Medium',
+                           'message': 'Use const or let instead of var', 'fixable': True,
+                           'fix': line.replace('var ', 'const ')})
+        if '==' in line and '===' not in line and not line.strip().startswith('//'):
+            issues.append({'file': file_path, 'line': line_num, 'type': 'LINTING', 'severity': 'Medium',
+                           'message': 'Use === instead of ==', 'fixable': True,
+                           'fix': line.replace('==', '===')})
+    elif ext == '.py':
+        if 'print(' in line and not line.strip().startswith('#'):
+            issues.append({'file': file_path, 'line': line_num, 'type': 'LINTING', 'severity': 'Low',
+                           'message': 'Remove debug print statement', 'fixable': True, 'fix': '# ' + line})
+    if len(line) > 120 and not line.strip().startswith(('//', '#', '/*', '*')):
+        issues.append({'file': file_path, 'line': line_num, 'type': 'STYLE', 'severity': 'Low',
+                       'message': f'Line too long ({len(line)} characters)', 'fixable': False})
+    if line.rstrip() != line.rstrip(' \t'):
+        issues.append({'file': file_path, 'line': line_num, 'type': 'STYLE', 'severity': 'Low',
+                       'message': 'Trailing whitespace', 'fixable': True, 'fix': line.rstrip() + '\n'})
+    return issues
+
+
+def legacy_scan(file_path, text):
+    ext = '.' + file_path.split('.')[-1]
+    issues = []
+    for line_num, line in enumerate(text.split('\n'), 1):
+        issues.extend(legacy_check_line(line, line_num, file_path, ext))
+    return issues
+
+
+JS_LINES = [
+    "import React, { useState } from 'react';",
+    'export function Widget({ items, onSelect }) {',
+    '  const [open, setOpen] = useState(false);',
+    '  if (items.length === 0) return null;',
+    "  const label = open ? 'Close' : 'Open';",
+    '  // toggles the panel when clicked',
+    '  return items.map((item) => <Item key={item.id} {...item} onClick={() => onSelect(item)} />);',
+    '}',
+    '  console.log("rendered", items.length);',
+    '  var legacy = compute(value);',
+    "  if (mode == 'dark') { applyTheme(mode); }",
+    '',
+]
+PY_LINES = [
+    'import os',
+    'from typing import Dict, List',
+    '',
+    'def load(path: str) -> Dict[str, str]:',
+    '    """Read key=value pairs from a file"""',
+    '    with open(path) as f:',
+    "        return dict(line.split('=', 1) for line in f if '=' in line)",
+    '    # fall through',
+    "    print(f'loaded {path}')",
+    '',
+]
+
+
+# Lines no rule flags
+CLEAN = {
+    id(JS_LINES): [line for line in JS_LINES if not any(s in line for s in ('console.', 'var ', ' == '))],
+    id(PY_LINES): [line for line in PY_LINES if 'print(' not in line],
+}
+
+
+def synthetic_repo(total_lines, lines_per_file=400, seed=7, dirty_every=1):
+    rng = random.Random(seed)
+    files = {}
+    produced = 0
+    i = 0
+    while produced < total_lines:
+        js = i % 3 != 2
+        source = JS_LINES if js else PY_LINES
+        if i % dirty_every:
+            source = CLEAN[id(source)]
+        lines = [rng.choice(source) for _ in range(lines_per_file)]
+        files[f'src/module_{i}.{"js" if js else "py"}'] = '\n'.join(lines)
+        produced += lines_per_file
+        i += 1
+    return files, produced
+
+
+def throughput(fn, files, lines, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = sum(len(fn(path, text)) for path, text in files.items())
+        best = min(best, time.perf_counter() - start)
+    return lines / best, found
+
+
+def exact_scan(path, text):
+    return scan(path, text, exact=True)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for corpus, dirty_every in (('dense', 1), ('typical', 10)):
+        files, lines = synthetic_repo(total, dirty_every=dirty_every)
+        legacy, legacy_found = throughput(legacy_scan, files, lines)
+        default, default_found = throughput(scan, files, lines)
+        exact, exact_found = throughput(exact_scan, files, lines)
+        print(f'{corpus}: {lines} lines in {len(files)} files')
+        print(f'  per-line checks:  {legacy:12,.0f} lines/s  ({legacy_found} issues)')
+        print(f'  scan:             {default:12,.0f} lines/s  ({default_found} issues)')
+        print(f'  scan(exact=True): {exact:12,.0f} lines/s  ({exact_found} issues)')
+        print(f'  relative throughput: {default / legacy:.1f}x (exact: {exact / legacy:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Cold-start check for the API Lambda: imports `handler` in fresh interpreters
+(Lambda mode, IS_LOCAL=false) and fails if the import exceeds the time budget
+or pulls in modules that should only load on first use.
+Run: python backend/benchmarks/check_import_budget.py [budget_ms]
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'api')
+DEFAULT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', '150'))
+RUNS = 5
+
+# Heavy dependencies that must stay out of the import path
+LAZY_MODULES = ('boto3', 'botocore', 'requests')
+
+_PROBE = (
+    'import sys, handler; '
+    'print(",".join(m for m in %r if m in sys.modules))' % (LAZY_MODULES,)
+)
+_IMPORTTIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| handler$', re.M)
+
+
+def measure():
+    """One fresh interpreter: (cumulative handler import in ms, eager heavy modules)"""
+    env = dict(os.environ, IS_LOCAL='false', PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=API_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    match = _IMPORTTIME_RE.search(proc.stderr)
+    if not match:
+        raise RuntimeError('handler import time not found in -X importtime output')
+    loaded = [m for m in proc.stdout.strip().split(',') if m]
+    return int(match.group(1)) / 1000, loaded
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    # First run warms the bytecode/page cache; keep the best of the rest
+    samples = [measure() for _ in range(RUNS + 1)][1:]
+    best = min(ms for ms, _ in samples)
+    loaded = sorted({m for _, found in samples for m in found})
+
+    print(f'handler import: {best:.1f} ms (budget {budget:.0f} ms)')
+    failed = False
+    if loaded:
+        print(f'FAIL: imported eagerly: {", ".join(loaded)}')
+        failed = True
+    if best > budget:
+        print('FAIL: import-time budget exceeded')
+        failed = True
+    if not failed:
+        print('OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,7 +21,7 @@ echo "📦 Installing dependencies..."
 pip3 install -r requirements.txt -t package/ --quiet
 
 echo "📄 Copying handler..."
-cp handler.py package/
+cp handler.py graphql_engine.py loaders.py cache.py github_client.py pagination.py repository.py events.py concurrency.py repo_fetch.py rules.py analysis_cache.py package/
 
 echo "🗜️  Creating zip file..."
 cd package
@@ -29,10 +29,11 @@ aws dynamodb create-table \
   --attribute-definitions \
     AttributeName=project_id,AttributeType=S \
     AttributeName=user_id,AttributeType=S \
+    AttributeName=created_at,AttributeType=S \
   --key-schema \
     AttributeName=project_id,KeyType=HASH \
   --global-secondary-indexes \
-    "IndexName=user-id-index,KeySchema=[{AttributeName=user_id,KeyType=HASH}],Projection={ProjectionType=ALL},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}" \
+    "IndexName=user-id-index,KeySchema=[{AttributeName=user_id,KeyType=HASH},{AttributeName=created_at,KeyType=RANGE}],Projection={ProjectionType=ALL},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}" \
   --billing-mode PAY_PER_REQUEST \
   --region $AWS_REGION 2>/dev/null || echo "Table already exists"
 
@@ -54,13 +55,47 @@ aws dynamodb create-table \
   --attribute-definitions \
     AttributeName=run_id,AttributeType=S \
     AttributeName=deployment_id,AttributeType=S \
+    AttributeName=created_at,AttributeType=S \
   --key-schema \
     AttributeName=run_id,KeyType=HASH \
   --global-secondary-indexes \
-    "IndexName=deployment-id-index,KeySchema=[{AttributeName=deployment_id,KeyType=HASH}],Projection={ProjectionType=ALL},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}" \
+    "IndexName=deployment-id-index,KeySchema=[{AttributeName=deployment_id,KeyType=HASH},{AttributeName=created_at,KeyType=RANGE}],Projection={ProjectionType=ALL},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}" \
   --billing-mode PAY_PER_REQUEST \
   --region $AWS_REGION 2>/dev/null || echo "Table already exists"
 
+# Create connections table (WebSocket subscribers to deployment progress)
+echo "Creating vajraopz-prod-connections..."
+aws dynamodb create-table \
+  --table-name vajraopz-prod-connections \
+  --attribute-definitions \
+    AttributeName=connection_id,AttributeType=S \
+    AttributeName=deployment_id,AttributeType=S \
+  --key-schema \
+    AttributeName=connection_id,KeyType=HASH \
+  --global-secondary-indexes \
+    "IndexName=deployment-id-index,KeySchema=[{AttributeName=deployment_id,KeyType=HASH}],Projection={ProjectionType=KEYS_ONLY},ProvisionedThroughput={ReadCapacityUnits=5,WriteCapacityUnits=5}" \
+  --billing-mode PAY_PER_REQUEST \
+  --region $AWS_REGION 2>/dev/null || echo "Table already exists"
+aws dynamodb update-time-to-live \
+  --table-name vajraopz-prod-connections \
+  --time-to-live-specification "Enabled=true,AttributeName=expires_at" \
+  --region $AWS_REGION >/dev/null 2>&1 || true
+
+# Create analysis cache table (per-file results keyed by analyzer, version and blob SHA)
+echo "Creating vajraopz-prod-analysis-cache..."
+aws dynamodb create-table \
+  --table-name vajraopz-prod-analysis-cache \
+  --attribute-definitions \
+    AttributeName=cache_key,AttributeType=S \
+  --key-schema \
+    AttributeName=cache_key,KeyType=HASH \
+  --billing-mode PAY_PER_REQUEST \
+  --region $AWS_REGION 2>/dev/null || echo "Table already exists"
+aws dynamodb update-time-to-live \
+  --table-name vajraopz-prod-analysis-cache \
+  --time-to-live-specification "Enabled=true,AttributeName=expires_at" \
+  --region $AWS_REGION >/dev/null 2>&1 || true
+
 echo ""
 echo "✅ DynamoDB tables created!"
 echo ""
@@ -62,7 +62,7 @@ aws ecr describe-repositories --repository-names vajraopz-agent-worker --region
 aws ecr create-repository --repository-name vajraopz-agent-worker --region $AWS_REGION
 
 echo "Building Docker image..."
-docker build -f Dockerfile.worker -t $WORKER_REPO:latest .
+docker build -f Dockerfile.worker -t $WORKER_REPO:latest ..
 
 echo "Pushing to ECR..."
 aws ecr get-login-password --region $AWS_REGION | docker login --username AWS --password-stdin $WORKER_REPO
@@ -130,7 +130,7 @@ mkdir -p package
 pip3 install -r requirements.txt -t package/ --upgrade
 
 # Copy handler
-cp handler.py package/
+cp handler.py graphql_engine.py loaders.py cache.py github_client.py pagination.py repository.py events.py concurrency.py repo_fetch.py rules.py analysis_cache.py package/
 
 # Create zip
 cd package
@@ -18,7 +18,7 @@ mkdir -p package
 pip install -r requirements.txt -t package/
 
 # Copy handler
-cp handler.py package/
+cp handler.py graphql_engine.py loaders.py cache.py github_client.py pagination.py repository.py events.py concurrency.py repo_fetch.py rules.py analysis_cache.py package/
 
 # Create zip
 cd package
@@ -46,7 +46,7 @@ echo "✅ Layer ARN: $LAYER_ARN"
 echo "Creating worker package..."
 rm -rf package worker.zip
 mkdir -p package
-cp agent_worker.py package/
+cp agent_worker.py records.py llm_cache.py rate_limit.py prompt_plan.py json_stream.py ../lambda/api/events.py package/
 cp dynamodb_helper.py package/ 2>/dev/null || true
 cp github_integration.py package/ 2>/dev/null || true
 
@@ -104,7 +104,7 @@ mkdir -p package
 
 echo "Installing API dependencies..."
 pip3 install -r requirements.txt -t package/ --upgrade --platform manylinux2014_x86_64 --only-binary=:all: 2>/dev/null || pip3 install -r requirements.txt -t package/ --upgrade
-cp handler.py package/
+cp handler.py graphql_engine.py loaders.py cache.py github_client.py pagination.py repository.py events.py concurrency.py repo_fetch.py rules.py analysis_cache.py package/
 
 cd package
 zip -r ../deployment.zip . -q
@@ -28,7 +28,7 @@ echo "Installing minimal dependencies..."
 pip3 install boto3 anthropic google-generativeai requests -t package/ --upgrade --platform manylinux2014_x86_64 --only-binary=:all: 2>/dev/null || pip3 install boto3 anthropic google-generativeai requests -t package/ --upgrade
 
 # Copy worker code
-cp agent_worker.py package/
+cp agent_worker.py records.py llm_cache.py rate_limit.py prompt_plan.py json_stream.py ../lambda/api/events.py package/
 
 # Remove unnecessary files to reduce size
 cd package
@@ -86,7 +86,7 @@ mkdir -p package
 echo "Installing API dependencies..."
 pip3 install boto3 requests -t package/ --upgrade --platform manylinux2014_x86_64 --only-binary=:all: 2>/dev/null || pip3 install boto3 requests -t package/ --upgrade
 
-cp handler.py package/
+cp handler.py graphql_engine.py loaders.py cache.py github_client.py pagination.py repository.py events.py concurrency.py repo_fetch.py rules.py analysis_cache.py package/
 
 cd package
 find . -type d -name "tests" -exec rm -rf {} + 2>/dev/null || true
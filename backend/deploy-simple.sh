@@ -37,7 +37,7 @@ aws ecr create-repository --repository-name vajraopz-agent-worker --region $AWS_
 
 # Build and push
 echo "Building Docker image..."
-docker build -f Dockerfile.worker -t $WORKER_REPO:latest .
+docker build -f Dockerfile.worker -t $WORKER_REPO:latest ..
 
 echo "Pushing to ECR..."
 aws ecr get-login-password --region $AWS_REGION | docker login --username AWS --password-stdin $WORKER_REPO
@@ -100,7 +100,7 @@ rm -rf package deployment.zip
 mkdir -p package
 
 pip3 install -r requirements.txt -t package/ --upgrade
-cp handler.py package/
+cp handler.py graphql_engine.py loaders.py cache.py github_client.py pagination.py repository.py events.py concurrency.py repo_fetch.py rules.py analysis_cache.py package/
 
 cd package
 zip -r ../deployment.zip . -q
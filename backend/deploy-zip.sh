@@ -23,7 +23,7 @@ mkdir -p package
 pip3 install -r requirements_simple.txt -t package/ --upgrade
 
 # Copy worker code
-cp agent_worker.py package/
+cp agent_worker.py records.py llm_cache.py rate_limit.py prompt_plan.py json_stream.py ../lambda/api/events.py package/
 
 # Create zip
 cd package
@@ -90,7 +90,7 @@ rm -rf package deployment.zip
 mkdir -p package
 
 pip3 install -r requirements.txt -t package/ --upgrade
-cp handler.py package/
+cp handler.py graphql_engine.py loaders.py cache.py github_client.py pagination.py repository.py events.py concurrency.py repo_fetch.py rules.py analysis_cache.py package/
 
 cd package
 zip -r ../deployment.zip . -q
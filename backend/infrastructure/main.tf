@@ -43,6 +43,12 @@ variable "project_name" {
   default     = "vajraopz"
 }
 
+variable "api_lambda_name" {
+  description = "Name of the GraphQL API Lambda that also serves the WebSocket routes"
+  type        = string
+  default     = "vajraopz-prod-api"
+}
+
 # GitHub OAuth App Configuration
 resource "aws_ssm_parameter" "github_client_id" {
   name  = "/${var.project_name}/${var.environment}/github/client_id"
@@ -99,9 +105,16 @@ resource "aws_dynamodb_table" "projects" {
     type = "S"
   }
 
+  attribute {
+    name = "created_at"
+    type = "S"
+  }
+
+  # created_at range key gives cursor pagination a stable order
   global_secondary_index {
     name            = "user-id-index"
     hash_key        = "user_id"
+    range_key       = "created_at"
     projection_type = "ALL"
   }
 
@@ -153,9 +166,16 @@ resource "aws_dynamodb_table" "agent_runs" {
     type = "S"
   }
 
+  attribute {
+    name = "created_at"
+    type = "S"
+  }
+
+  # created_at range key gives cursor pagination a stable order
   global_secondary_index {
     name            = "deployment-id-index"
     hash_key        = "deployment_id"
+    range_key       = "created_at"
     projection_type = "ALL"
   }
 
@@ -165,6 +185,62 @@ resource "aws_dynamodb_table" "agent_runs" {
   }
 }
 
+# WebSocket connections subscribed to deployment progress
+resource "aws_dynamodb_table" "connections" {
+  name           = "${var.project_name}-${var.environment}-connections"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "connection_id"
+
+  attribute {
+    name = "connection_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "deployment_id"
+    type = "S"
+  }
+
+  global_secondary_index {
+    name            = "deployment-id-index"
+    hash_key        = "deployment_id"
+    projection_type = "KEYS_ONLY"
+  }
+
+  # Connections API Gateway never reported as closed age out on their own
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
+
+# Per-file analysis results keyed by analyzer, version and git blob SHA
+resource "aws_dynamodb_table" "analysis_cache" {
+  name           = "${var.project_name}-${var.environment}-analysis-cache"
+  billing_mode   = "PAY_PER_REQUEST"
+  hash_key       = "cache_key"
+
+  attribute {
+    name = "cache_key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
+
 # S3 Bucket for code storage
 resource "aws_s3_bucket" "code_storage" {
   bucket = "${var.project_name}-${var.environment}-code-storage-${random_id.bucket_suffix.hex}"
@@ -303,6 +379,29 @@ resource "aws_iam_role_policy_attachment" "ecs_task_execution_role_policy" {
   policy_arn = "arn:aws:iam::aws:policy/service-role/AmazonECSTaskExecutionRolePolicy"
 }
 
+# Agent tasks share the LLM response cache (and its locks) and the provider
+# rate-limit counters with the worker
+resource "aws_iam_role_policy" "ecs_llm_cache_policy" {
+  name = "${var.project_name}-${var.environment}-ecs-llm-cache-policy"
+  role = aws_iam_role.ecs_task_execution_role.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem"
+        ]
+        Resource = aws_dynamodb_table.analysis_cache.arn
+      }
+    ]
+  })
+}
+
 # IAM Role for Lambda functions
 resource "aws_iam_role" "lambda_execution_role" {
   name = "${var.project_name}-${var.environment}-lambda-execution-role"
@@ -341,18 +440,30 @@ resource "aws_iam_role_policy" "lambda_dynamodb_policy" {
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
           "dynamodb:Query",
-          "dynamodb:Scan"
+          "dynamodb:Scan",
+          "dynamodb:BatchGetItem",
+          "dynamodb:BatchWriteItem"
         ]
         Resource = [
           aws_dynamodb_table.users.arn,
           aws_dynamodb_table.projects.arn,
           aws_dynamodb_table.deployments.arn,
           aws_dynamodb_table.agent_runs.arn,
+          aws_dynamodb_table.connections.arn,
+          aws_dynamodb_table.analysis_cache.arn,
           "${aws_dynamodb_table.users.arn}/index/*",
           "${aws_dynamodb_table.projects.arn}/index/*",
           "${aws_dynamodb_table.deployments.arn}/index/*",
-          "${aws_dynamodb_table.agent_runs.arn}/index/*"
+          "${aws_dynamodb_table.agent_runs.arn}/index/*",
+          "${aws_dynamodb_table.connections.arn}/index/*"
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "execute-api:ManageConnections"
         ]
+        Resource = "${aws_apigatewayv2_api.progress.execution_arn}/*"
       },
       {
         Effect = "Allow"
@@ -386,6 +497,46 @@ resource "aws_iam_role_policy" "lambda_dynamodb_policy" {
   })
 }
 
+# WebSocket API for deployment progress. Routes are served by the API Lambda
+# (route selection on the "action" field of each message).
+data "aws_lambda_function" "api" {
+  function_name = var.api_lambda_name
+}
+
+resource "aws_apigatewayv2_api" "progress" {
+  name                       = "${var.project_name}-${var.environment}-progress"
+  protocol_type              = "WEBSOCKET"
+  route_selection_expression = "$request.body.action"
+}
+
+resource "aws_apigatewayv2_integration" "progress" {
+  api_id             = aws_apigatewayv2_api.progress.id
+  integration_type   = "AWS_PROXY"
+  integration_uri    = data.aws_lambda_function.api.invoke_arn
+  integration_method = "POST"
+}
+
+resource "aws_apigatewayv2_route" "progress" {
+  for_each  = toset(["$connect", "$disconnect", "subscribe", "unsubscribe"])
+  api_id    = aws_apigatewayv2_api.progress.id
+  route_key = each.value
+  target    = "integrations/${aws_apigatewayv2_integration.progress.id}"
+}
+
+resource "aws_apigatewayv2_stage" "progress" {
+  api_id      = aws_apigatewayv2_api.progress.id
+  name        = var.environment
+  auto_deploy = true
+}
+
+resource "aws_lambda_permission" "progress" {
+  statement_id  = "AllowWebSocketInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = var.api_lambda_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.progress.execution_arn}/*/*"
+}
+
 # ECS Task Definition for the Agent
 resource "aws_cloudwatch_log_group" "agent_log_group" {
   name              = "/ecs/${var.project_name}-${var.environment}-agent"
@@ -455,9 +606,15 @@ output "lambda_role_arn" {
 
 output "dynamodb_tables" {
   value = {
-    users       = aws_dynamodb_table.users.name
-    projects    = aws_dynamodb_table.projects.name
-    deployments = aws_dynamodb_table.deployments.name
-    agent_runs  = aws_dynamodb_table.agent_runs.name
+    users          = aws_dynamodb_table.users.name
+    projects       = aws_dynamodb_table.projects.name
+    deployments    = aws_dynamodb_table.deployments.name
+    agent_runs     = aws_dynamodb_table.agent_runs.name
+    connections    = aws_dynamodb_table.connections.name
+    analysis_cache = aws_dynamodb_table.analysis_cache.name
   }
-}
\ No newline at end of file
+}
+
+output "websocket_endpoint" {
+  value = "https://${aws_apigatewayv2_api.progress.id}.execute-api.${var.aws_region}.amazonaws.com/${aws_apigatewayv2_stage.progress.name}"
+}
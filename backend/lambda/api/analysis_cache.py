@@ -0,0 +1,74 @@
+"""
+VajraOpz per-file analysis cache
+Results are content-addressed. The key is the analyzer, its version and the
+file's git blob SHA:
+
+  {analyzer}#{version}#{sha}
+
+A file that has not changed is analyzed once, whatever project, branch or
+deployment it appears in. Changing a version (new rules, a new prompt or
+model) invalidates only that analyzer's entries.
+
+Entries live in the analysis-cache table. That is DynamoDB in AWS; local dev
+uses the memory store, or the SQLite file with LOCAL_STORE=sqlite. Entries
+are read and written in batches. Each expires ANALYSIS_CACHE_TTL seconds
+after it was written. The agent worker writes the same item shape to the
+same table.
+
+The cache is best effort: a failed read is treated as a miss, and a failed
+write only costs a re-analysis next time.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable
+
+ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', str(30 * 24 * 3600)))
+
+
+def cache_key(analyzer: str, version: str, sha: str) -> str:
+    return f'{analyzer}#{version}#{sha}'
+
+
+class AnalysisCache:
+    """Results of one analyzer version, keyed by blob SHA. `table` is a
+    repository table keyed by cache_key."""
+
+    def __init__(self, table, analyzer: str, version: str, ttl: int = ANALYSIS_CACHE_TTL):
+        self.table = table
+        self.analyzer = analyzer
+        self.version = version
+        self.ttl = ttl
+
+    def get_many(self, shas: Iterable[str]) -> Dict[str, Any]:
+        """sha -> cached result for every SHA with a live entry"""
+        keys = {cache_key(self.analyzer, self.version, sha): sha for sha in set(shas)}
+        if not keys:
+            return {}
+        try:
+            items = self.table.batch_get(list(keys), attributes=['cache_key', 'result', 'expires_at'])
+        except Exception as e:
+            print(f'[AnalysisCache] Read failed, analyzing everything: {e}')
+            return {}
+        now = int(time.time())
+        # DynamoDB deletes expired items lazily, so check the expiry here too
+        return {
+            keys[item['cache_key']]: json.loads(item['result'])
+            for item in items
+            if int(item.get('expires_at', now + 1)) > now
+        }
+
+    def put_many(self, results: Dict[str, Any]):
+        if not results:
+            return
+        expires_at = int(time.time()) + self.ttl
+        try:
+            self.table.batch_put({
+                'cache_key': cache_key(self.analyzer, self.version, sha),
+                'analyzer': self.analyzer,
+                'result': json.dumps(result, separators=(',', ':')),
+                'expires_at': expires_at,
+            } for sha, result in results.items())
+        except Exception as e:
+            print(f'[AnalysisCache] Write failed: {e}')
@@ -0,0 +1,112 @@
+"""
+VajraOpz resolver concurrency
+Independent outbound calls inside one resolver (GitHub lookups, a DynamoDB
+write next to a GitHub call) run side by side on a small shared thread pool,
+so a resolver waits for its slowest call instead of the sum of all of them.
+
+Every request carries a Deadline. gather() never waits past it, and
+Deadline.timeout() shrinks per-call HTTP timeouts so nothing started late
+can outlive the request either.
+"""
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+
+POOL_SIZE = int(os.environ.get('RESOLVER_POOL_SIZE', '8'))
+
+_pool: Optional['ThreadPoolExecutor'] = None
+_pool_lock = threading.Lock()
+_worker = threading.local()
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Absolute point in time shared by everything a request does"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """Per-call timeout: `cap`, or less if the request is nearly out of time"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f'Request deadline of {self.seconds:g}s exceeded')
+        return min(cap, remaining)
+
+
+def _executor() -> 'ThreadPoolExecutor':
+    """Started on first use so importing this module stays cheap"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='resolver',
+                                           initializer=_mark_worker)
+    return _pool
+
+
+def _mark_worker():
+    _worker.active = True
+
+
+def gather(*calls: Callable[[], Any], deadline: Optional[Deadline] = None,
+           return_exceptions: bool = False) -> List[Any]:
+    """Run zero-argument callables concurrently and return their results in
+    order. The first call runs on the calling thread (it can safely use
+    clients owned by the request); the rest go to the pool. The first error
+    is re-raised unless `return_exceptions` is set, in which case it takes
+    that call's place in the list. Raises DeadlineExceeded if the calls have
+    not all finished when the deadline passes."""
+    if len(calls) <= 1 or getattr(_worker, 'active', False):
+        # Nothing to overlap, or already on a pool thread (nesting could
+        # exhaust the bounded pool and deadlock): run inline
+        return _run_inline(calls, deadline, return_exceptions)
+
+    from concurrent.futures import wait
+    futures = [_executor().submit(call) for call in calls[1:]]
+    results = _run_inline(calls[:1], None, return_exceptions)
+    timeout = deadline.remaining() if deadline is not None else None
+    _, pending = wait(futures, timeout=timeout)
+    if pending:
+        for future in pending:
+            future.cancel()
+        raise DeadlineExceeded(f'Request deadline of {deadline.seconds:g}s exceeded')
+
+    for future in futures:
+        error = future.exception()
+        if error is not None and not return_exceptions:
+            raise error
+        results.append(error if error is not None else future.result())
+    return results
+
+
+def _run_inline(calls, deadline: Optional[Deadline], return_exceptions: bool) -> List[Any]:
+    results = []
+    for call in calls:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded(f'Request deadline of {deadline.seconds:g}s exceeded')
+        try:
+            results.append(call())
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
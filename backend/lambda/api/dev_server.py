@@ -3,10 +3,21 @@ VajraOpz Local Development Server
 Wraps the Lambda handler in a Flask server for local dev.
 Run: python dev_server.py
 Serves GraphQL at http://localhost:3001/graphql
+
+Data lives in an in-memory store by default; set LOCAL_STORE=sqlite (and
+optionally LOCAL_STORE_PATH) to keep it in a SQLite file between restarts.
+
+Deployment progress is streamed as Server-Sent Events from
+GET /events/<deployment_id>?token=... (the local stand-in for the WebSocket
+API). A worker run locally with PROGRESS_PUBLISH_URL=http://localhost:3001/events
+posts its events back to POST /events/<deployment_id>. That route only
+accepts requests from this machine, or, when PROGRESS_PUBLISH_SECRET is set
+(on both sides), requests carrying it in X-Progress-Secret.
 """
 
+import base64
+import hmac
 import os
-import json
 import sys
 
 # Set local mode BEFORE importing handler
@@ -16,13 +27,18 @@ os.environ.setdefault('GITHUB_CLIENT_SECRET', '991ec85a058dbfad3b9bdfab5f6bd290f
 os.environ.setdefault('FRONTEND_URL', 'http://localhost:3000')
 os.environ.setdefault('CALLBACK_URL', 'http://localhost:3000/auth/callback')
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from handler import route_graphql
+from events import sse_stream
+from graphql_engine import GraphQLError
+from handler import bus, deployment_snapshot, route_graphql, _get_user_from_token
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+PROGRESS_PUBLISH_SECRET = os.environ.get('PROGRESS_PUBLISH_SECRET')
+_LOOPBACK = ('127.0.0.1', '::1')
+
 
 @app.route('/graphql', methods=['POST', 'OPTIONS'])
 def graphql_endpoint():
@@ -31,10 +47,49 @@ def graphql_endpoint():
         return '', 200
 
     body = request.get_json(force=True, silent=True) or {}
-    result = route_graphql(body)
+    result = route_graphql(body, request.headers.get('Accept-Encoding'))
+
+    # The handler already produced the (possibly compressed) body; hand it
+    # to the client as-is
+    response_body = result.get('body', '{}')
+    if result.get('isBase64Encoded'):
+        response_body = base64.b64decode(response_body)
+    return Response(
+        response_body,
+        status=result.get('statusCode', 200),
+        headers=result.get('headers'),
+    )
+
+
+@app.route('/events/<deployment_id>', methods=['GET'])
+def deployment_events(deployment_id):
+    """SSE stream of a deployment's progress; closes once it completes or fails"""
+    user_id = _get_user_from_token(request.args.get('token'))
+    try:
+        snapshot = deployment_snapshot(user_id, deployment_id)
+    except GraphQLError as e:
+        return jsonify({'message': e.message}), e.status_code
+
+    subscription = bus.subscribe(deployment_id)
+    return Response(
+        stream_with_context(sse_stream(subscription, first=snapshot)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
 
-    response_body = json.loads(result.get('body', '{}'))
-    return jsonify(response_body), result.get('statusCode', 200)
+@app.route('/events/<deployment_id>', methods=['POST'])
+def publish_event(deployment_id):
+    """Entry point for a locally run worker's progress events"""
+    if PROGRESS_PUBLISH_SECRET:
+        allowed = hmac.compare_digest(request.headers.get('X-Progress-Secret', ''), PROGRESS_PUBLISH_SECRET)
+    else:
+        allowed = request.remote_addr in _LOOPBACK
+    if not allowed:
+        return jsonify({'message': 'Forbidden'}), 403
+    event = request.get_json(force=True, silent=True) or {}
+    event['deploymentId'] = deployment_id
+    return jsonify({'delivered': bus.publish(deployment_id, event)})
 
 
 @app.route('/health', methods=['GET'])
@@ -53,6 +108,7 @@ if __name__ == '__main__':
     print("  VajraOpz Backend — Local Development Server")
     print("=" * 60)
     print(f"  GraphQL:  http://localhost:3001/graphql")
+    print(f"  Events:   http://localhost:3001/events/<deployment_id>")
     print(f"  Health:   http://localhost:3001/health")
     print(f"  Frontend: {os.environ.get('FRONTEND_URL')}")
     print(f"  Callback: {os.environ.get('CALLBACK_URL')}")
@@ -0,0 +1,224 @@
+"""
+VajraOpz deployment progress events
+The agent worker publishes a small event at every stage of a run (cloning,
+analyzing, fixing, pushing, completed/failed) so clients can subscribe
+instead of polling getDeployment.
+
+  WebSocketPublisher - API Gateway WebSocket connections, stored in the
+                       connections table and reached via PostToConnection
+  LocalBus           - in-process pub/sub standing in for it in local dev;
+                       dev_server.py streams it to the browser as SSE
+
+Every event is a flat JSON object:
+  {"type": "progress", "deploymentId": ..., "stage": ..., "progress": 0-100,
+   "status": ..., "message": ..., "at": ISO-8601}
+"""
+
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Stages in run order, with the progress each one starts at
+STAGES = {
+    'queued': 0,
+    'cloning': 5,
+    'analyzing': 20,
+    'fixing': 70,
+    'pushing': 85,
+    'completed': 100,
+    'failed': 100,
+}
+TERMINAL_STATUSES = ('completed', 'failed')
+
+CONNECTION_TTL = int(os.environ.get('WEBSOCKET_CONNECTION_TTL', '7200'))
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get('EVENT_QUEUE_SIZE', '256'))
+
+
+def progress_event(deployment_id: str, stage: str, progress: Optional[int] = None,
+                   status: Optional[str] = None, message: Optional[str] = None,
+                   event_type: str = 'progress') -> Dict[str, Any]:
+    return {
+        'type': event_type,
+        'deploymentId': deployment_id,
+        'stage': stage,
+        'progress': STAGES.get(stage, 0) if progress is None else int(progress),
+        'status': status or (stage if stage in TERMINAL_STATUSES else 'processing'),
+        'message': message,
+        'at': datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def snapshot_event(deployment: Dict[str, Any]) -> Dict[str, Any]:
+    """Current state of a stored deployment, sent first to every new subscriber"""
+    status = deployment.get('status')
+    stage = deployment.get('stage') or (status if status in TERMINAL_STATUSES else 'queued')
+    event = progress_event(deployment['deployment_id'], stage, deployment.get('progress'),
+                           status=status, event_type='snapshot')
+    event['at'] = deployment.get('updated_at') or event['at']
+    return event
+
+
+def is_final(event: Dict[str, Any]) -> bool:
+    return event.get('status') in TERMINAL_STATUSES
+
+
+# =====================================================================
+#  LOCAL PUB/SUB
+# =====================================================================
+class Subscription:
+    """Bounded queue of events for one deployment; iterate to consume"""
+
+    def __init__(self, bus: 'LocalBus', deployment_id: str):
+        self.bus = bus
+        self.deployment_id = deployment_id
+        self.queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event: Dict[str, Any]):
+        # A slow reader loses the oldest events, never blocks the publisher
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class LocalBus:
+    """Thread-safe in-process pub/sub keyed by deployment id. The last event
+    of each deployment is replayed to late subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, deployment_id: str) -> Subscription:
+        subscription = Subscription(self, deployment_id)
+        with self._lock:
+            self._subscribers.setdefault(deployment_id, []).append(subscription)
+            last = self._last.get(deployment_id)
+        if last is not None:
+            subscription.offer(last)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.deployment_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.deployment_id, None)
+
+    def publish(self, deployment_id: str, event: Dict[str, Any]) -> int:
+        with self._lock:
+            self._last[deployment_id] = event
+            subscribers = list(self._subscribers.get(deployment_id, ()))
+        for subscription in subscribers:
+            subscription.offer(event)
+        return len(subscribers)
+
+
+# =====================================================================
+#  API GATEWAY WEBSOCKET
+# =====================================================================
+class WebSocketPublisher:
+    """Pushes events to every connection subscribed to a deployment.
+    `connections` is a repository table keyed by connection_id with a
+    deployment-id-index; `client` builds an apigatewaymanagementapi client."""
+
+    def __init__(self, connections, client: Callable[[], Any]):
+        self.connections = connections
+        self._client = client
+
+    def connect(self, connection_id: str, user_id: str, now: int):
+        self.connections.put({
+            'connection_id': connection_id,
+            'user_id': user_id,
+            'connected_at': now,
+            'expires_at': now + CONNECTION_TTL,
+        })
+
+    def disconnect(self, connection_id: str):
+        self.connections.delete(connection_id)
+
+    def subscribe(self, connection_id: str, deployment_id: str):
+        self.connections.update({'connection_id': connection_id}, {'deployment_id': deployment_id})
+
+    def unsubscribe(self, connection_id: str):
+        self.connections.update({'connection_id': connection_id}, remove=('deployment_id',))
+
+    def send(self, connection_id: str, event: Dict[str, Any]) -> bool:
+        """Post one event; drops the connection record if the client is gone"""
+        client = self._client()
+        try:
+            client.post_to_connection(ConnectionId=connection_id,
+                                      Data=json.dumps(event, separators=(',', ':')).encode())
+            return True
+        except client.exceptions.GoneException:
+            self.disconnect(connection_id)
+            return False
+
+    def publish(self, deployment_id: str, event: Dict[str, Any]) -> int:
+        items, _ = self.connections.query('deployment-id-index', deployment_id,
+                                          attributes=['connection_id'])
+        sent = 0
+        for item in items:
+            try:
+                sent += self.send(item['connection_id'], event)
+            except Exception as e:
+                print(f"[Events] PostToConnection failed for {item['connection_id']}: {e}")
+        return sent
+
+
+def sse_format(event: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """One Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f"event: {event.get('type', 'message')}")
+    lines.append('data: ' + json.dumps(event, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+def sse_stream(subscription: Subscription, first: Optional[Dict[str, Any]] = None,
+               heartbeat: float = 15.0) -> Iterator[str]:
+    """Frames for one SSE response; ends after a completed/failed event"""
+    event_id = 0
+    with subscription:
+        if first is not None:
+            event_id += 1
+            yield sse_format(first, event_id)
+            if is_final(first):
+                return
+        while True:
+            event = subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+            event_id += 1
+            yield sse_format(event, event_id)
+            if is_final(event):
+                return
@@ -0,0 +1,279 @@
+"""
+VajraOpz GitHub API client
+One keep-alive connection pool for every outbound GitHub call, plus a
+conditional-request cache: GET responses are stored with their ETag /
+Last-Modified (keyed by URL and a hash of the caller's token) and revalidated
+with If-None-Match, so unchanged resources come back as fast 304s that do not
+count against the rate limit.
+
+Identical GETs that are in flight at the same time (same URL, params, Accept
+and token) are coalesced: one request goes out and every caller gets its
+response. Calls with different tokens are never merged, since what GitHub
+returns depends on who is asking.
+
+The in-memory LRU can be backed by an optional second tier shared between
+containers: a directory (GITHUB_CACHE_DIR) or a DynamoDB table
+(GITHUB_CACHE_TABLE, partition key `cache_key`, TTL attribute `expires_at`).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import urlencode
+
+from cache import SingleFlight, TTLCache
+
+if TYPE_CHECKING:
+    import requests
+
+
+GITHUB_API = 'https://api.github.com'
+DEFAULT_ACCEPT = 'application/vnd.github.v3+json'
+
+RESPONSE_CACHE_SIZE = int(os.environ.get('GITHUB_CACHE_SIZE', '512'))
+RESPONSE_CACHE_TTL = float(os.environ.get('GITHUB_CACHE_TTL', '86400'))
+REPO_METADATA_TTL = float(os.environ.get('GITHUB_REPO_TTL', '300'))
+POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', '16'))
+
+# Response headers worth replaying from a cached entry
+_KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+
+# =====================================================================
+#  SECOND-TIER CACHES
+# =====================================================================
+class DiskCacheTier:
+    """JSON file per entry under `directory` (e.g. /tmp on Lambda)"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('expires_at', 0) < time.time():
+            return None
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        tmp = self._path(key) + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            print(f'[GitHubCache] Disk write failed: {e}')
+
+
+class DynamoCacheTier:
+    """Entries as items of a DynamoDB table with TTL on `expires_at`"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = self.table.get_item(Key={'cache_key': key}).get('Item')
+        except Exception as e:
+            print(f'[GitHubCache] DynamoDB read failed: {e}')
+            return None
+        if not item or int(item.get('expires_at', 0)) < time.time():
+            return None
+        return json.loads(item['entry'])
+
+    def set(self, key: str, entry: Dict[str, Any]):
+        try:
+            self.table.put_item(Item={
+                'cache_key': key,
+                'entry': json.dumps(entry),
+                'expires_at': int(entry['expires_at']),
+            })
+        except Exception as e:
+            print(f'[GitHubCache] DynamoDB write failed: {e}')
+
+
+# =====================================================================
+#  CLIENT
+# =====================================================================
+class GitHubClient:
+    """Pooled session + ETag-aware response cache for the GitHub REST API"""
+
+    def __init__(self, session: Optional['requests.Session'] = None,
+                 cache: Optional[TTLCache] = None, tier: Any = None,
+                 pool_size: int = POOL_SIZE):
+        self._session = session
+        self._session_lock = threading.Lock()
+        self.pool_size = pool_size
+        self.cache = cache if cache is not None else TTLCache(RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+        self.tier = tier
+        self.repo_cache = TTLCache(RESPONSE_CACHE_SIZE, ttl=REPO_METADATA_TTL)
+        self.flights = SingleFlight()
+        self.not_modified = 0
+
+    # ─── plumbing ───────────────────────────────────────────────────
+    @property
+    def session(self) -> 'requests.Session':
+        """Created on the first call so importing the client stays cheap"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    @staticmethod
+    def _url(path_or_url: str) -> str:
+        return path_or_url if path_or_url.startswith('http') else GITHUB_API + path_or_url
+
+    @staticmethod
+    def _headers(token: Optional[str], headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        merged = {'Accept': DEFAULT_ACCEPT}
+        if token:
+            merged['Authorization'] = f'token {token}'
+        if headers:
+            merged.update(headers)
+        return merged
+
+    @staticmethod
+    def cache_key(url: str, params: Optional[Dict[str, Any]], token: Optional[str],
+                  accept: str = DEFAULT_ACCEPT) -> str:
+        query = urlencode(sorted((params or {}).items()))
+        token_hash = hashlib.sha256((token or '').encode()).hexdigest()[:16]
+        raw = f'{url}?{query}|{accept}|{token_hash}'
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.cache.get(key)
+        if entry is None and self.tier is not None:
+            entry = self.tier.get(key)
+            if entry is not None:
+                self.cache.set(key, entry)
+        return entry
+
+    def _store(self, key: str, response: 'requests.Response'):
+        entry = {
+            'status': response.status_code,
+            'url': response.url,
+            'headers': {h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers},
+            'body': response.text,
+            'expires_at': time.time() + RESPONSE_CACHE_TTL,
+        }
+        self.cache.set(key, entry)
+        if self.tier is not None:
+            self.tier.set(key, entry)
+
+    @staticmethod
+    def _replay(entry: Dict[str, Any], live: 'requests.Response') -> 'requests.Response':
+        """Turn a cached entry into a Response, as if GitHub had sent it again"""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        for h in ('X-RateLimit-Remaining', 'X-RateLimit-Reset'):
+            if h in live.headers:
+                response.headers[h] = live.headers[h]
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.request = live.request
+        response.from_cache = True
+        return response
+
+    # ─── public API ─────────────────────────────────────────────────
+    def get(self, path_or_url: str, token: Optional[str] = None,
+            params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: float = 10, conditional: bool = True) -> 'requests.Response':
+        """GET with If-None-Match revalidation against the response cache;
+        concurrent identical calls share a single request"""
+        url = self._url(path_or_url)
+        req_headers = self._headers(token, headers)
+        key = self.cache_key(url, params, token, req_headers.get('Accept', ''))
+        if not conditional:
+            return self.flights.do(('get', key), lambda: self.session.get(
+                url, params=params, headers=req_headers, timeout=timeout))
+        return self.flights.do(('conditional', key), lambda: self._conditional_get(
+            key, url, params, req_headers, timeout))
+
+    def _conditional_get(self, key: str, url: str, params: Optional[Dict[str, Any]],
+                         req_headers: Dict[str, str], timeout: float) -> 'requests.Response':
+        entry = self._lookup(key)
+        if entry is not None:
+            if 'ETag' in entry['headers']:
+                req_headers['If-None-Match'] = entry['headers']['ETag']
+            elif 'Last-Modified' in entry['headers']:
+                req_headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+
+        response = self.session.get(url, params=params, headers=req_headers, timeout=timeout)
+        if response.status_code == 304 and entry is not None:
+            self.not_modified += 1
+            return self._replay(entry, response)
+        if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            self._store(key, response)
+        return response
+
+    def post(self, path_or_url: str, token: Optional[str] = None,
+             json: Any = None, headers: Optional[Dict[str, str]] = None,
+             timeout: float = 10) -> 'requests.Response':
+        return self.session.post(self._url(path_or_url), json=json,
+                                 headers=self._headers(token, headers), timeout=timeout)
+
+    def stream(self, path_or_url: str, token: Optional[str] = None,
+               headers: Optional[Dict[str, str]] = None,
+               timeout: float = 30) -> 'requests.Response':
+        """Uncached GET whose body is read incrementally from `response.raw`
+        (archives); the caller must close the response"""
+        return self.session.get(self._url(path_or_url), headers=self._headers(token, headers),
+                                timeout=timeout, stream=True)
+
+    def repo(self, owner: str, repo: str, token: Optional[str] = None,
+             timeout: float = 10) -> Dict[str, Any]:
+        """Repository metadata, served from memory for GITHUB_REPO_TTL seconds.
+        Raises requests.HTTPError when GitHub refuses the lookup."""
+        key = self.cache_key(f'{GITHUB_API}/repos/{owner}/{repo}', None, token)
+        data = self.repo_cache.get(key)
+        if data is not None:
+            return data
+        return self.flights.do(('repo', key), lambda: self._fetch_repo(key, owner, repo, token, timeout))
+
+    def _fetch_repo(self, key: str, owner: str, repo: str, token: Optional[str],
+                    timeout: float) -> Dict[str, Any]:
+        response = self.get(f'/repos/{owner}/{repo}', token=token, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        self.repo_cache.set(key, data)
+        return data
+
+    def default_branch(self, owner: str, repo: str, token: Optional[str] = None) -> str:
+        return self.repo(owner, repo, token)['default_branch']
+
+
+def _default_tier():
+    cache_dir = os.environ.get('GITHUB_CACHE_DIR')
+    if cache_dir:
+        return DiskCacheTier(cache_dir)
+    table_name = os.environ.get('GITHUB_CACHE_TABLE')
+    if table_name:
+        import boto3
+        return DynamoCacheTier(boto3.resource('dynamodb').Table(table_name))
+    return None
+
+
+# Shared by every resolver in this container
+github = GitHubClient(tier=_default_tier())
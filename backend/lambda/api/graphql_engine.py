@@ -0,0 +1,655 @@
+"""
+VajraOpz GraphQL front end
+Parses and validates GraphQL documents once, caches the resulting operation
+plans by document hash for the life of the (warm) Lambda container, and
+dispatches every root field of an operation to its resolver.
+
+Clients may also use Automatic Persisted Queries: they send only the SHA-256
+of a document in `extensions.persistedQuery` and the server looks it up among
+registered and previously seen documents, skipping both upload and parse.
+
+Only the subset of GraphQL the API needs is executed: root fields with
+arguments, aliases, variables (with defaults), fragments / inline fragments
+and the @skip / @include directives. Nested selection sets are parsed and kept
+on the plan so resolvers can inspect what the client asked for.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+PLAN_CACHE_SIZE = 256
+PERSISTED_QUERY_CACHE_SIZE = 1024
+
+
+# =====================================================================
+#  ERRORS
+# =====================================================================
+class GraphQLError(Exception):
+    """Error surfaced to the client in the `errors` list of the response"""
+
+    def __init__(self, message: str, status_code: int = 400, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.code = code
+
+    def to_dict(self) -> Dict[str, Any]:
+        error = {'message': self.message}
+        if self.code:
+            error['extensions'] = {'code': self.code}
+        return error
+
+
+class GraphQLSyntaxError(GraphQLError):
+    """Document could not be parsed"""
+
+    def __init__(self, message: str, pos: int):
+        super().__init__(f'Syntax Error: {message} (at offset {pos})', 400)
+        self.pos = pos
+
+
+class PersistedQueryNotFound(GraphQLError):
+    """Hash-only request for a document this container has not seen yet.
+    Returned with 200 so APQ clients simply retry with the full text."""
+
+    def __init__(self):
+        super().__init__('PersistedQueryNotFound', 200, 'PERSISTED_QUERY_NOT_FOUND')
+
+
+# =====================================================================
+#  LEXER
+# =====================================================================
+_TOKEN_RE = re.compile(r'''
+    (?P<ignored>[\s,\ufeff]+|\#[^\n\r]*)
+  | (?P<spread>\.\.\.)
+  | (?P<punct>[!$&()\:=@\[\]{|}])
+  | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+  | (?P<number>-?(?:0|[1-9][0-9]*)(?P<frac>\.[0-9]+)?(?P<exp>[eE][+-]?[0-9]+)?)
+  | (?P<block>"""(?:\\"""|[^"]|"(?!""))*""")
+  | (?P<string>"(?:[^"\\\n\r]|\\(?:["\\/bfnrt]|u[0-9A-Fa-f]{4}))*")
+''', re.VERBOSE)
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_ESCAPE_RE = re.compile(r'\\(u[0-9A-Fa-f]{4}|.)')
+
+
+def _unescape(raw: str) -> str:
+    def repl(m):
+        seq = m.group(1)
+        if seq[0] == 'u':
+            return chr(int(seq[1:], 16))
+        return _ESCAPES[seq]
+    return _ESCAPE_RE.sub(repl, raw)
+
+
+def _block_string_value(raw: str) -> str:
+    """Dedent a block string the way the GraphQL spec describes"""
+    lines = raw.replace('\\"""', '"""').splitlines()
+    indents = [len(l) - len(l.lstrip(' \t')) for l in lines[1:] if l.strip(' \t')]
+    common = min(indents) if indents else 0
+    lines = lines[:1] + [l[common:] for l in lines[1:]]
+    while lines and not lines[0].strip(' \t'):
+        lines.pop(0)
+    while lines and not lines[-1].strip(' \t'):
+        lines.pop()
+    return '\n'.join(lines)
+
+
+def _tokenize(source: str) -> List[Tuple[str, Any, int]]:
+    tokens = []
+    pos = 0
+    end = len(source)
+    while pos < end:
+        m = _TOKEN_RE.match(source, pos)
+        if not m:
+            raise GraphQLSyntaxError(f'Unexpected character {source[pos]!r}', pos)
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == 'number':
+            kind = 'float' if m.group('frac') or m.group('exp') else 'int'
+        if kind == 'punct':
+            tokens.append((text, text, pos))
+        elif kind == 'spread':
+            tokens.append(('...', text, pos))
+        elif kind == 'int':
+            tokens.append(('value', int(text), pos))
+        elif kind == 'float':
+            tokens.append(('value', float(text), pos))
+        elif kind == 'string':
+            tokens.append(('value', _unescape(text[1:-1]), pos))
+        elif kind == 'block':
+            tokens.append(('value', _block_string_value(text[3:-3]), pos))
+        elif kind == 'name':
+            tokens.append(('name', text, pos))
+        pos = m.end()
+    tokens.append(('<EOF>', None, end))
+    return tokens
+
+
+# =====================================================================
+#  AST / PLAN NODES
+# =====================================================================
+class Variable:
+    """Reference to an operation variable inside an argument value"""
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f'${self.name}'
+
+
+class EnumValue(str):
+    """Bare enum literal; behaves like its name"""
+
+
+class Field:
+    """A selected field: `alias: name(args) @directives { selection }`"""
+    __slots__ = ('name', 'alias', 'arguments', 'directives', 'selection')
+
+    def __init__(self, name, alias, arguments, directives, selection):
+        self.name = name
+        self.alias = alias or name
+        self.arguments = arguments
+        self.directives = directives
+        self.selection = selection
+
+    def field_names(self) -> List[str]:
+        """Names of the sub-fields the client selected (fragments flattened)"""
+        return [f.name for f in (self.selection or [])]
+
+    def child(self, name: str) -> Optional['Field']:
+        """The selected sub-field `name` (first occurrence), if any"""
+        for f in self.selection or []:
+            if f.name == name:
+                return f
+        return None
+
+
+class Operation:
+    """A validated, executable operation plan"""
+    __slots__ = ('type', 'name', 'variables', 'fields')
+
+    def __init__(self, op_type, name, variables, fields):
+        self.type = op_type
+        self.name = name
+        self.variables = variables          # {name: (type_str, non_null, default)}
+        self.fields = fields                # flattened root fields
+
+
+class Document:
+    """All operations of one parsed document, keyed by operation name"""
+    __slots__ = ('operations',)
+
+    def __init__(self, operations: List[Operation]):
+        self.operations = operations
+
+    def get_operation(self, operation_name: Optional[str]) -> Operation:
+        if operation_name:
+            for op in self.operations:
+                if op.name == operation_name:
+                    return op
+            raise GraphQLError(f'Unknown operation named "{operation_name}"')
+        if len(self.operations) != 1:
+            raise GraphQLError('Must provide operation name if query contains multiple operations')
+        return self.operations[0]
+
+
+# =====================================================================
+#  PARSER
+# =====================================================================
+class _Parser:
+    def __init__(self, source: str):
+        self.tokens = _tokenize(source)
+        self.i = 0
+
+    # ─── token helpers ──────────────────────────────────────────────
+    def peek(self, kind: str, value: Any = None) -> bool:
+        tok = self.tokens[self.i]
+        return tok[0] == kind and (value is None or tok[1] == value)
+
+    def skip(self, kind: str, value: Any = None) -> bool:
+        if self.peek(kind, value):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: Any = None):
+        tok = self.tokens[self.i]
+        if tok[0] != kind or (value is not None and tok[1] != value):
+            wanted = value if value is not None else kind
+            got = tok[1] if tok[0] != '<EOF>' else '<EOF>'
+            raise GraphQLSyntaxError(f'Expected {wanted}, found {got}', tok[2])
+        self.i += 1
+        return tok[1]
+
+    def name(self) -> str:
+        return self.expect('name')
+
+    # ─── document ───────────────────────────────────────────────────
+    def parse_document(self):
+        operations = []
+        fragments = {}
+        while not self.peek('<EOF>'):
+            if self.peek('{'):
+                operations.append(('query', None, {}, self.selection_set()))
+            elif self.peek('name', 'fragment'):
+                self.i += 1
+                frag_name = self.name()
+                if frag_name == 'on':
+                    raise GraphQLSyntaxError('Unexpected name "on"', self.tokens[self.i - 1][2])
+                self.expect('name', 'on')
+                self.name()
+                self.directives()
+                if frag_name in fragments:
+                    raise GraphQLError(f'There can be only one fragment named "{frag_name}"')
+                fragments[frag_name] = self.selection_set()
+            elif self.peek('name') and self.tokens[self.i][1] in ('query', 'mutation', 'subscription'):
+                op_type = self.name()
+                op_name = self.name() if self.peek('name') else None
+                variables = self.variable_definitions()
+                self.directives()
+                operations.append((op_type, op_name, variables, self.selection_set()))
+            else:
+                tok = self.tokens[self.i]
+                raise GraphQLSyntaxError(f'Unexpected {tok[1]}', tok[2])
+        if not operations:
+            raise GraphQLError('Document does not contain any operations')
+        return operations, fragments
+
+    def variable_definitions(self) -> Dict[str, Tuple[str, bool, Any]]:
+        definitions = {}
+        if not self.skip('('):
+            return definitions
+        while not self.skip(')'):
+            self.expect('$')
+            var_name = self.name()
+            self.expect(':')
+            type_str = self.type_ref()
+            default = self.value(const=True) if self.skip('=') else None
+            self.directives()
+            if var_name in definitions:
+                raise GraphQLError(f'There can be only one variable named "${var_name}"')
+            definitions[var_name] = (type_str, type_str.endswith('!'), default)
+        return definitions
+
+    def type_ref(self) -> str:
+        if self.skip('['):
+            inner = self.type_ref()
+            self.expect(']')
+            type_str = f'[{inner}]'
+        else:
+            type_str = self.name()
+        if self.skip('!'):
+            type_str += '!'
+        return type_str
+
+    # ─── selections ─────────────────────────────────────────────────
+    def selection_set(self) -> list:
+        self.expect('{')
+        selections = []
+        while not self.skip('}'):
+            if self.skip('...'):
+                if self.peek('name') and self.tokens[self.i][1] != 'on':
+                    selections.append(('spread', self.name(), self.directives()))
+                else:
+                    if self.skip('name', 'on'):
+                        self.name()
+                    directives = self.directives()
+                    selections.append(('inline', self.selection_set(), directives))
+            else:
+                selections.append(('field', self.field()))
+        if not selections:
+            raise GraphQLSyntaxError('Selection set cannot be empty', self.tokens[self.i - 1][2])
+        return selections
+
+    def field(self) -> tuple:
+        name = self.name()
+        alias = None
+        if self.skip(':'):
+            alias, name = name, self.name()
+        arguments = self.arguments()
+        directives = self.directives()
+        selection = self.selection_set() if self.peek('{') else None
+        return (name, alias, arguments, directives, selection)
+
+    def arguments(self) -> Dict[str, Any]:
+        args = {}
+        if not self.skip('('):
+            return args
+        while not self.skip(')'):
+            arg_name = self.name()
+            self.expect(':')
+            args[arg_name] = self.value()
+        return args
+
+    def directives(self) -> List[Tuple[str, Dict[str, Any]]]:
+        directives = []
+        while self.skip('@'):
+            directives.append((self.name(), self.arguments()))
+        return directives
+
+    def value(self, const: bool = False) -> Any:
+        tok = self.tokens[self.i]
+        if tok[0] == '$':
+            if const:
+                raise GraphQLSyntaxError('Unexpected variable in constant value', tok[2])
+            self.i += 1
+            return Variable(self.name())
+        if tok[0] == 'value':
+            self.i += 1
+            return tok[1]
+        if tok[0] == '[':
+            self.i += 1
+            items = []
+            while not self.skip(']'):
+                items.append(self.value(const))
+            return items
+        if tok[0] == '{':
+            self.i += 1
+            obj = {}
+            while not self.skip('}'):
+                key = self.name()
+                self.expect(':')
+                obj[key] = self.value(const)
+            return obj
+        if tok[0] == 'name':
+            self.i += 1
+            if tok[1] == 'true':
+                return True
+            if tok[1] == 'false':
+                return False
+            if tok[1] == 'null':
+                return None
+            return EnumValue(tok[1])
+        raise GraphQLSyntaxError(f'Unexpected {tok[1]}', tok[2])
+
+
+def _build_fields(selections: list, fragments: Dict[str, list], seen: Tuple[str, ...] = ()) -> List[Field]:
+    """Turn raw selections into Field plans, inlining fragments"""
+    fields = []
+    for sel in selections:
+        if sel[0] == 'field':
+            name, alias, arguments, directives, sub = sel[1]
+            sub_fields = _build_fields(sub, fragments, seen) if sub is not None else None
+            fields.append(Field(name, alias, arguments, directives, sub_fields))
+            continue
+
+        if sel[0] == 'spread':
+            frag_name = sel[1]
+            if frag_name not in fragments:
+                raise GraphQLError(f'Unknown fragment "{frag_name}"')
+            if frag_name in seen:
+                raise GraphQLError(f'Cannot spread fragment "{frag_name}" within itself')
+            inner = _build_fields(fragments[frag_name], fragments, seen + (frag_name,))
+        else:
+            inner = _build_fields(sel[1], fragments, seen)
+
+        # Directives on a fragment apply to every field it contributes
+        for f in inner:
+            fields.append(Field(f.name, f.alias, f.arguments, sel[2] + f.directives, f.selection))
+    return fields
+
+
+def _collect_variables(value: Any, out: set):
+    if isinstance(value, Variable):
+        out.add(value.name)
+    elif isinstance(value, list):
+        for v in value:
+            _collect_variables(v, out)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _collect_variables(v, out)
+
+
+def _field_variables(fields: List[Field], out: set):
+    for f in fields:
+        for v in f.arguments.values():
+            _collect_variables(v, out)
+        for _, args in f.directives:
+            for v in args.values():
+                _collect_variables(v, out)
+        if f.selection:
+            _field_variables(f.selection, out)
+
+
+def resolve_value(value: Any, variables: Dict[str, Any]) -> Any:
+    """Substitute variables into a parsed argument value"""
+    if isinstance(value, Variable):
+        return variables.get(value.name)
+    if isinstance(value, list):
+        return [resolve_value(v, variables) for v in value]
+    if isinstance(value, dict):
+        return {k: resolve_value(v, variables) for k, v in value.items()}
+    return value
+
+
+# =====================================================================
+#  SCHEMA / EXECUTION
+# =====================================================================
+class Resolver:
+    """Root field resolver: `fn(args, field) -> value`, errors labelled for logs.
+
+    `prefetch(args, field)` is an optional hint run for every root field
+    before any resolver executes, so data loaders can queue the keys (and
+    attributes) the whole document needs and fetch them in one batch.
+    """
+    __slots__ = ('fn', 'label', 'prefetch')
+
+    def __init__(self, fn: Callable[[Dict[str, Any], Field], Any], label: str,
+                 prefetch: Optional[Callable[[Dict[str, Any], Field], None]] = None):
+        self.fn = fn
+        self.label = label
+        self.prefetch = prefetch
+
+
+class Schema:
+    """Root fields per operation type plus a warm-container plan cache"""
+
+    def __init__(self, query: Dict[str, Resolver], mutation: Dict[str, Resolver],
+                 cache_size: int = PLAN_CACHE_SIZE,
+                 persisted_cache_size: int = PERSISTED_QUERY_CACHE_SIZE):
+        self.roots = {'query': query, 'mutation': mutation}
+        self.cache_size = cache_size
+        self.persisted_cache_size = persisted_cache_size
+        self._plans: 'OrderedDict[str, Any]' = OrderedDict()
+        self._registered: Dict[str, str] = {}
+        self._seen: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ─── persisted queries ──────────────────────────────────────────
+    def register(self, query: str) -> str:
+        """Pin a known document (e.g. from the frontend build) and return its hash"""
+        digest = query_hash(query)
+        self._registered[digest] = query
+        return digest
+
+    def _remember(self, digest: str, query: str):
+        with self._lock:
+            self._seen[digest] = query
+            self._seen.move_to_end(digest)
+            if len(self._seen) > self.persisted_cache_size:
+                self._seen.popitem(last=False)
+
+    def _lookup(self, digest: str) -> Optional[str]:
+        query = self._registered.get(digest)
+        if query is not None:
+            return query
+        with self._lock:
+            query = self._seen.get(digest)
+            if query is not None:
+                self._seen.move_to_end(digest)
+        return query
+
+    def load(self, query: Optional[str], extensions: Optional[Dict[str, Any]] = None) -> Document:
+        """Resolve the request's document, honouring `extensions.persistedQuery`"""
+        persisted = (extensions or {}).get('persistedQuery')
+        if not persisted:
+            if not query:
+                raise GraphQLError('Must provide query string')
+            return self.plan(query)
+
+        if persisted.get('version', 1) != 1:
+            raise GraphQLError('Unsupported persisted query version', 400, 'PERSISTED_QUERY_NOT_SUPPORTED')
+        digest = str(persisted.get('sha256Hash') or '').lower()
+        if query:
+            if query_hash(query) != digest:
+                raise GraphQLError('provided sha does not match query', 400, 'BAD_USER_INPUT')
+            self._remember(digest, query)
+            return self.plan(query, digest)
+
+        # Hash-only: a cached plan needs neither the text nor a parse
+        plan = self._cached_plan(digest)
+        if plan is None:
+            query = self._lookup(digest)
+            if query is None:
+                raise PersistedQueryNotFound()
+            plan = self.plan(query, digest)
+        if isinstance(plan, GraphQLError):
+            raise plan
+        return plan
+
+    # ─── planning ───────────────────────────────────────────────────
+    def _cached_plan(self, key: str) -> Any:
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None:
+                self._plans.move_to_end(key)
+        return cached
+
+    def plan(self, query: str, key: Optional[str] = None) -> Document:
+        """Parse + validate `query`, memoized by SHA-256 of the document text"""
+        key = key or query_hash(query)
+        cached = self._cached_plan(key)
+        if cached is None:
+            try:
+                cached = self._build_plan(query)
+            except GraphQLError as e:
+                # Invalid documents are cached too so retries stay cheap
+                cached = e
+            with self._lock:
+                self._plans[key] = cached
+                if len(self._plans) > self.cache_size:
+                    self._plans.popitem(last=False)
+        if isinstance(cached, GraphQLError):
+            raise cached
+        return cached
+
+    def _build_plan(self, query: str) -> Document:
+        raw_operations, fragments = _Parser(query).parse_document()
+        operations = []
+        names = set()
+        for op_type, op_name, variables, selections in raw_operations:
+            if op_name in names:
+                raise GraphQLError(f'There can be only one operation named "{op_name}"')
+            names.add(op_name)
+            if op_name is None and len(raw_operations) > 1:
+                raise GraphQLError('This anonymous operation must be the only defined operation')
+
+            root = self.roots.get(op_type)
+            if root is None:
+                raise GraphQLError(f'Schema is not configured for {op_type}s')
+            type_name = op_type.capitalize()
+            fields = _build_fields(selections, fragments)
+            for f in fields:
+                if f.name != '__typename' and f.name not in root:
+                    raise GraphQLError(f'Cannot query field "{f.name}" on type "{type_name}"')
+
+            used = set()
+            _field_variables(fields, used)
+            for var_name in used:
+                if var_name not in variables:
+                    raise GraphQLError(f'Variable "${var_name}" is not defined by operation "{op_name or "anonymous"}"')
+
+            operations.append(Operation(op_type, op_name, variables, fields))
+        return Document(operations)
+
+    # ─── execution ──────────────────────────────────────────────────
+    def execute(self, query: Optional[str], variables: Optional[Dict[str, Any]] = None,
+                operation_name: Optional[str] = None,
+                extensions: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+        """Run one request; returns (http_status, {'data': ..., 'errors': [...]})"""
+        try:
+            operation = self.load(query, extensions).get_operation(operation_name)
+            values = self._coerce_variables(operation, variables or {})
+        except GraphQLError as e:
+            return e.status_code, {'errors': [e.to_dict()]}
+
+        root = self.roots[operation.type]
+        data = {}
+        errors = []
+        status_code = 200
+        planned = []
+        for f in operation.fields:
+            if not _should_include(f, values):
+                continue
+            if f.name == '__typename':
+                planned.append((f, None, None))
+                continue
+            resolver = root[f.name]
+            args = {k: resolve_value(v, values) for k, v in f.arguments.items()}
+            if resolver.prefetch:
+                try:
+                    resolver.prefetch(args, f)
+                except Exception as e:
+                    print(f"{resolver.label} prefetch error: {e}")
+            planned.append((f, resolver, args))
+
+        for f, resolver, args in planned:
+            if resolver is None:
+                data[f.alias] = operation.type.capitalize()
+                continue
+            try:
+                data[f.alias] = resolver.fn(args, f)
+            except GraphQLError as e:
+                errors.append(dict(e.to_dict(), path=[f.alias]))
+                status_code = e.status_code if status_code == 200 else status_code
+            except Exception as e:
+                print(f"{resolver.label} error: {e}")
+                errors.append({'message': f'{resolver.label} error: {str(e)}', 'path': [f.alias]})
+                status_code = 500 if status_code == 200 else status_code
+
+        if not errors:
+            return 200, {'data': data}
+        if not data:
+            return status_code, {'errors': errors}
+        # Partial success: keep the data, report the failed fields
+        for err in errors:
+            data[err['path'][0]] = None
+        return 200, {'data': data, 'errors': errors}
+
+    @staticmethod
+    def _coerce_variables(operation: Operation, provided: Dict[str, Any]) -> Dict[str, Any]:
+        values = {}
+        for var_name, (type_str, non_null, default) in operation.variables.items():
+            if var_name in provided:
+                value = provided[var_name]
+            elif default is not None:
+                value = default
+            else:
+                if non_null:
+                    raise GraphQLError(f'Variable "${var_name}" of required type "{type_str}" was not provided.')
+                continue
+            if value is None and non_null:
+                raise GraphQLError(f'Variable "${var_name}" of non-null type "{type_str}" must not be null.')
+            values[var_name] = value
+        return values
+
+
+def query_hash(query: str) -> str:
+    """APQ document id: hex SHA-256 of the exact query text"""
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+def _should_include(field: Field, variables: Dict[str, Any]) -> bool:
+    for name, args in field.directives:
+        if name in ('skip', 'include'):
+            cond = bool(resolve_value(args.get('if'), variables))
+            if (name == 'skip') == cond:
+                return False
+    return True
@@ -4,55 +4,150 @@ import uuid
 import hmac
 import hashlib
 import time
-import requests
 from datetime import datetime, timezone
 import base64
-from typing import Dict, Any, Optional
+import gzip
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
 
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+from analysis_cache import AnalysisCache
+from cache import TTLCache
+from concurrency import Deadline, DeadlineExceeded, gather
+from events import LocalBus, WebSocketPublisher, progress_event, snapshot_event
+from github_client import github
+from graphql_engine import Field, GraphQLError, Resolver, Schema
+from loaders import DataLoader
+from pagination import connection, query_all, query_page
+from repo_fetch import iter_repo_files, list_files, path_filter
+from rules import dump as dump_issues, load as load_issues, ruleset_version, scan as scan_issues
+from repository import ConditionFailed, attr_below, attr_equals, attr_missing, open_repository
+
 # ─── Detect environment ──────────────────────────────────────────────
 IS_LOCAL = os.environ.get('IS_LOCAL', 'false').lower() == 'true'
 
-# ─── In-memory stores for local dev ─────────────────────────────────
-_local_users = {}
-_local_projects = {}
-_local_deployments = {}
-_local_agent_runs = {}
+# ─── OAuth state (in-memory; only written, never validated yet) ────
 _oauth_states = {}
 
 # ─── JWT secret (use a proper secret in production) ─────────────────
 JWT_SECRET = os.environ.get('JWT_SECRET', 'vajraopz-dev-secret-key-change-in-production')
 
-# ─── AWS clients (only when running in Lambda) ──────────────────────
-dynamodb = None
-s3 = None
-ecs = None
-ssm = None
-users_table = None
-projects_table = None
-deployments_table = None
-agent_runs_table = None
-
-if not IS_LOCAL:
-    import boto3
-    dynamodb = boto3.resource('dynamodb')
-    s3 = boto3.client('s3')
-    ecs = boto3.client('ecs')
-    ssm = boto3.client('ssm')
-
-    USERS_TABLE = os.environ.get('USERS_TABLE', 'vajraopz-prod-users')
-    PROJECTS_TABLE = os.environ.get('PROJECTS_TABLE', 'vajraopz-prod-projects')
-    DEPLOYMENTS_TABLE = os.environ.get('DEPLOYMENTS_TABLE', 'vajraopz-prod-deployments')
-    AGENT_RUNS_TABLE = os.environ.get('AGENT_RUNS_TABLE', 'vajraopz-prod-agent-runs')
-    S3_BUCKET = os.environ.get('S3_BUCKET', 'vajraopz-prod-code-storage')
-    ECS_CLUSTER = os.environ.get('ECS_CLUSTER', 'vajraopz-prod-agents')
-    GITHUB_CLIENT_ID_PARAM = os.environ.get('GITHUB_CLIENT_ID_PARAM', '/vajraopz/prod/github/client_id')
-    GITHUB_CLIENT_SECRET_PARAM = os.environ.get('GITHUB_CLIENT_SECRET_PARAM', '/vajraopz/prod/github/client_secret')
-
-    users_table = dynamodb.Table(USERS_TABLE)
-    projects_table = dynamodb.Table(PROJECTS_TABLE)
-    deployments_table = dynamodb.Table(DEPLOYMENTS_TABLE)
-    agent_runs_table = dynamodb.Table(AGENT_RUNS_TABLE)
+# ─── Warm-container caches ──────────────────────────────────────────
+# Verified token -> user_id, each entry expiring with the token itself
+_token_cache = TTLCache(maxsize=int(os.environ.get('TOKEN_CACHE_SIZE', '2048')))
+# user_id -> user item; short TTL, invalidated by _upsert_user
+_user_cache = TTLCache(
+    maxsize=int(os.environ.get('USER_CACHE_SIZE', '512')),
+    ttl=float(os.environ.get('USER_CACHE_TTL', '60')),
+)
+
+# ─── AWS resources ──────────────────────────────────────────────────
+USERS_TABLE = os.environ.get('USERS_TABLE', 'vajraopz-prod-users')
+PROJECTS_TABLE = os.environ.get('PROJECTS_TABLE', 'vajraopz-prod-projects')
+DEPLOYMENTS_TABLE = os.environ.get('DEPLOYMENTS_TABLE', 'vajraopz-prod-deployments')
+AGENT_RUNS_TABLE = os.environ.get('AGENT_RUNS_TABLE', 'vajraopz-prod-agent-runs')
+FIXES_TABLE = os.environ.get('FIXES_TABLE', 'vajraopz-fixes')
+CONNECTIONS_TABLE = os.environ.get('CONNECTIONS_TABLE', 'vajraopz-prod-connections')
+ANALYSIS_CACHE_TABLE = os.environ.get('ANALYSIS_CACHE_TABLE', 'vajraopz-prod-analysis-cache')
+# https://{api-id}.execute-api.{region}.amazonaws.com/{stage} of the WebSocket API
+WEBSOCKET_ENDPOINT = os.environ.get('WEBSOCKET_ENDPOINT', '')
+S3_BUCKET = os.environ.get('S3_BUCKET', 'vajraopz-prod-code-storage')
+ECS_CLUSTER = os.environ.get('ECS_CLUSTER', 'vajraopz-prod-agents')
+GITHUB_CLIENT_ID_PARAM = os.environ.get('GITHUB_CLIENT_ID_PARAM', '/vajraopz/prod/github/client_id')
+GITHUB_CLIENT_SECRET_PARAM = os.environ.get('GITHUB_CLIENT_SECRET_PARAM', '/vajraopz/prod/github/client_secret')
+
+# boto3 and every client/table are created on first use and then reused by
+# the warm container, so importing this module stays cheap on a cold start
+_aws_handles: Dict[Tuple[str, str], Any] = {}
+_aws_lock = threading.RLock()
+
+
+def _aws(kind: str, name: str) -> Any:
+    handle = _aws_handles.get((kind, name))
+    if handle is None:
+        with _aws_lock:
+            handle = _aws_handles.get((kind, name))
+            if handle is None:
+                import boto3
+                if kind == 'client':
+                    handle = boto3.client(name)
+                elif kind == 'resource':
+                    handle = boto3.resource(name)
+                elif kind == 'management':
+                    handle = boto3.client('apigatewaymanagementapi', endpoint_url=name)
+                else:
+                    handle = _dynamodb().Table(name)
+                _aws_handles[(kind, name)] = handle
+    return handle
+
+
+def _aws_client(service: str):
+    return _aws('client', service)
+
+
+def _dynamodb():
+    return _aws('resource', 'dynamodb')
+
+
+def _table(table_name: str):
+    return _aws('table', table_name)
+
+
+# ─── Storage ─────────────────────────────────────────────────────────
+# DynamoDB in Lambda. Local dev gets the same tables and GSIs backed by an
+# indexed in-memory store, or by a SQLite file with LOCAL_STORE=sqlite.
+store = open_repository(
+    os.environ.get('LOCAL_STORE', 'memory') if IS_LOCAL else 'dynamodb',
+    {
+        'users': USERS_TABLE,
+        'projects': PROJECTS_TABLE,
+        'deployments': DEPLOYMENTS_TABLE,
+        'agent_runs': AGENT_RUNS_TABLE,
+        'fixes': FIXES_TABLE,
+        'connections': CONNECTIONS_TABLE,
+        'analysis_cache': ANALYSIS_CACHE_TABLE,
+    },
+    table_factory=_table,
+    path=os.environ.get('LOCAL_STORE_PATH', 'vajraopz-local.db'),
+)
+
+# ─── Deployment progress events ─────────────────────────────────────
+# Local dev publishes to an in-process bus (streamed as SSE by dev_server.py);
+# Lambda pushes to the WebSocket connections subscribed to the deployment
+bus = LocalBus()
+
+
+def _websocket(endpoint: str) -> WebSocketPublisher:
+    return WebSocketPublisher(store.connections, lambda: _aws('management', endpoint))
+
+
+def _publish(deployment_id: str, stage: str, **kwargs):
+    """Best effort: a lost progress event must never fail the mutation"""
+    event = progress_event(deployment_id, stage, **kwargs)
+    try:
+        if IS_LOCAL:
+            bus.publish(deployment_id, event)
+        elif WEBSOCKET_ENDPOINT:
+            _websocket(WEBSOCKET_ENDPOINT).publish(deployment_id, event)
+    except Exception as e:
+        print(f'[Events] Publish failed for {deployment_id}: {e}')
+
+
+def _invoke_worker(payload: Dict[str, Any]):
+    """Fire-and-forget the agent worker Lambda (no worker runs in local dev)"""
+    if IS_LOCAL:
+        print(f"[Worker] Local mode, not invoking worker for {payload}")
+        return
+    _aws_client('lambda').invoke(
+        FunctionName='vajraopz-agent-worker',
+        InvocationType='Event',  # Async
+        Payload=json.dumps(payload)
+    )
 
 
 # ─── GitHub OAuth Config ─────────────────────────────────────────────
@@ -71,68 +166,272 @@ def lambda_handler(event, context):
     if event.get('httpMethod') == 'OPTIONS':
         return create_response(200, {})
 
+    # API Gateway WebSocket routes share this function with the GraphQL URL
+    if (event.get('requestContext') or {}).get('eventType'):
+        return route_websocket(event)
+
+    accept_encoding = _header(event, 'Accept-Encoding')
     try:
-        body = json.loads(event.get('body', '{}'))
-        return route_graphql(body)
+        raw_body = event.get('body') or '{}'
+        if event.get('isBase64Encoded'):
+            raw_body = base64.b64decode(raw_body)
+        body = json.loads(raw_body)
+        return route_graphql(body, accept_encoding)
     except Exception as e:
         print(f"Error: {str(e)}")
-        return create_response(500, {'errors': [{'message': 'Internal server error'}]})
-
-
-def route_graphql(body: Dict[str, Any]) -> Dict[str, Any]:
-    """Route GraphQL queries/mutations to resolvers"""
-    query = body.get('query', '')
-    variables = body.get('variables', {})
-
-    # Remove whitespace and newlines for easier matching
-    query_normalized = ' '.join(query.split())
-
-    if 'githubCallback' in query_normalized:
-        return handle_github_callback(variables)
-    elif 'githubAuth' in query_normalized:
-        return handle_github_auth(variables)
-    elif 'createProject' in query_normalized:
-        return handle_create_project(variables)
-    elif 'triggerAgent' in query_normalized:
-        return handle_trigger_agent(variables)
-    elif 'getProjects' in query_normalized:
-        return handle_get_projects(variables)
-    elif 'getDeployment' in query_normalized:
-        return handle_get_deployment(variables)
-    elif 'getCommits' in query_normalized:
-        return handle_get_commits(variables)
-    elif 'getFixes' in query_normalized:
-        return handle_get_fixes(variables)
-    elif 'triggerFix' in query_normalized:
-        return handle_trigger_fix(variables)
-    else:
-        print(f"Unknown query: {query_normalized[:200]}")
-        return create_response(400, {'errors': [{'message': 'Unknown query or mutation'}]})
+        return create_response(500, {'errors': [{'message': 'Internal server error'}]}, accept_encoding)
+
+
+def _header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """Case-insensitive request header (Function URLs lower-case them)"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def route_graphql(body: Dict[str, Any], accept_encoding: Optional[str] = None) -> Dict[str, Any]:
+    """Execute a GraphQL request against the resolver schema"""
+    extensions = body.get('extensions')
+    if isinstance(extensions, str):
+        extensions = json.loads(extensions)
+
+    # Fresh loader per request so memoized items never leak between callers
+    _request.loader = _new_loader()
+    _request.deadline = Deadline(REQUEST_DEADLINE)
+    try:
+        status_code, result = SCHEMA.execute(
+            body.get('query'),
+            body.get('variables') or {},
+            body.get('operationName'),
+            extensions,
+        )
+    finally:
+        _request.loader = None
+        _request.deadline = None
+    return create_response(status_code, result, accept_encoding)
+
+
+# =====================================================================
+#  WEBSOCKET SUBSCRIPTIONS
+# =====================================================================
+# Routes of the WebSocket API (route selection expression $request.body.action):
+#   $connect     wss://...?token=<jwt>   registers the connection for the user
+#   subscribe    {"action": "subscribe", "deploymentId": "..."}
+#   unsubscribe  {"action": "unsubscribe"}
+#   $disconnect                          drops the connection record
+def route_websocket(event: Dict[str, Any]) -> Dict[str, Any]:
+    context = event['requestContext']
+    connection_id = context['connectionId']
+    route = context.get('routeKey')
+    publisher = _websocket(f"https://{context['domainName']}/{context['stage']}")
+
+    try:
+        if route == '$connect':
+            token = (event.get('queryStringParameters') or {}).get('token')
+            user_id = _get_user_from_token(token)
+            if not user_id:
+                return {'statusCode': 401}
+            publisher.connect(connection_id, user_id, int(time.time()))
+            return {'statusCode': 200}
+
+        if route == '$disconnect':
+            publisher.disconnect(connection_id)
+            return {'statusCode': 200}
+
+        connection_item = store.connections.get(connection_id, attributes=['connection_id', 'user_id'])
+        if connection_item is None:
+            return {'statusCode': 410}
+        message = json.loads(event.get('body') or '{}')
+
+        if route == 'subscribe':
+            snapshot = deployment_snapshot(connection_item['user_id'], message.get('deploymentId'))
+            publisher.subscribe(connection_id, snapshot['deploymentId'])
+            publisher.send(connection_id, snapshot)
+            return {'statusCode': 200}
+
+        if route == 'unsubscribe':
+            publisher.unsubscribe(connection_id)
+            return {'statusCode': 200}
+
+        return {'statusCode': 400, 'body': json.dumps({'message': f'Unknown action: {route}'})}
+    except GraphQLError as e:
+        return {'statusCode': e.status_code, 'body': json.dumps({'message': e.message})}
+    except Exception as e:
+        print(f'[WebSocket] {route} failed for {connection_id}: {e}')
+        return {'statusCode': 500}
+
+
+def deployment_snapshot(user_id: Optional[str], deployment_id: Optional[str]) -> Dict[str, Any]:
+    """Authorize a subscription and describe where the deployment is now"""
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
+    if not deployment_id:
+        raise GraphQLError('Missing deployment ID', 400)
+    deployment = store.deployments.get(
+        deployment_id, attributes=['deployment_id', 'project_id', 'status', 'stage', 'progress', 'updated_at'])
+    if deployment is None:
+        raise GraphQLError('Deployment not found', 404)
+    project = store.projects.get(deployment['project_id'], attributes=['project_id', 'user_id'])
+    if project is None or project.get('user_id') != user_id:
+        raise GraphQLError('Deployment not found', 404)
+    return snapshot_event(deployment)
+
+
+# ─── Request-scoped data loading ─────────────────────────────────────
+_request = threading.local()
+
+
+# Whole-request budget for outbound calls; stays under the 30 s Lambda timeout
+REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE', '25'))
+# Upper bound for any single GitHub call
+GITHUB_TIMEOUT = float(os.environ.get('GITHUB_TIMEOUT', '10'))
+
+
+def _deadline() -> Deadline:
+    """The current request's deadline (a fresh one outside route_graphql)"""
+    return getattr(_request, 'deadline', None) or Deadline(REQUEST_DEADLINE)
+
+
+def _new_loader() -> DataLoader:
+    if store.kind != 'dynamodb':
+        return DataLoader({}, local_stores={
+            'users': store.users,
+            'projects': store.projects,
+            'deployments': store.deployments,
+        }, warm={'users': _user_cache})
+    return DataLoader({
+        'users': (USERS_TABLE, 'user_id'),
+        'projects': (PROJECTS_TABLE, 'project_id'),
+        'deployments': (DEPLOYMENTS_TABLE, 'deployment_id'),
+    }, dynamodb=_dynamodb(), warm={'users': _user_cache})
+
+
+def _loader() -> DataLoader:
+    """Loader of the current request (a throwaway one outside route_graphql)"""
+    loader = getattr(_request, 'loader', None)
+    if loader is None:
+        loader = _new_loader()
+    return loader
+
+
+def _prefetch_user(variables: Dict[str, Any], field: Optional[Field] = None):
+    _loader().defer('users', _get_user_from_token(variables.get('token')))
 
 
-def decimal_to_native(obj):
-    if isinstance(obj, list):
-        return [decimal_to_native(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: decimal_to_native(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    return obj
+def _prefetch_project(variables: Dict[str, Any], field: Optional[Field] = None):
+    _loader().defer('projects', variables.get('projectId'))
 
 
-def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
-    """Create standardized API response"""
+def _prefetch_project_and_user(variables: Dict[str, Any], field: Optional[Field] = None):
+    _prefetch_project(variables)
+    _prefetch_user(variables)
+
+
+def _prefetch_deployment(variables: Dict[str, Any], field: Optional[Field] = None):
+    _loader().defer('deployments', variables.get('deploymentId'),
+                    _attributes(field, ('deployment_id',), computed=('agent_runs',)))
+
+
+def _attributes(field: Optional[Field], keys: Tuple[str, ...],
+                computed: Tuple[str, ...] = ()) -> Optional[List[str]]:
+    """Item attributes a selection set needs, for a ProjectionExpression.
+    None (read the whole item) when there is no selection to go by; the key
+    attributes are always included."""
+    if field is None or not field.selection:
+        return None
+    names = set(field.field_names()) - set(computed)
+    names.discard('__typename')
+    return sorted(names.union(keys))
+
+
+class _DecimalEncoder(json.JSONEncoder):
+    """DynamoDB hands back numbers as Decimal; convert them while encoding so
+    the body is serialized in one pass instead of copied first"""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj % 1 == 0 else float(obj)
+        return super().default(obj)
+
+
+_json_encoder = _DecimalEncoder(separators=(',', ':'))
+
+
+def encode_json(body: Any) -> str:
+    return _json_encoder.encode(body)
+
+
+# ─── Response compression ───────────────────────────────────────────
+# Bodies at least this large are compressed when the client accepts it
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+
+def _negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best of br/gzip by the client's q-values (br wins ties)"""
+    if not accept_encoding:
+        return None
+    offered = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[coding.strip().lower()] = q
+    wildcard = offered.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in ('br', 'gzip'):
+        if coding == 'br' and brotli is None:
+            continue
+        q = offered.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _compress(data: bytes, coding: str) -> bytes:
+    if coding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def create_response(status_code: int, body: Dict[str, Any],
+                    accept_encoding: Optional[str] = None) -> Dict[str, Any]:
+    """Create standardized API response, compressed when it pays off"""
+    encoded = encode_json(body)
     if status_code >= 400:
-        print(f"API ERROR {status_code}: {json.dumps(body)}")
-    
-    body = decimal_to_native(body)
-        
+        print(f"API ERROR {status_code}: {encoded}")
+
+    headers = {
+        'Content-Type': 'application/json'
+    }
+    if len(encoded) >= COMPRESSION_MIN_BYTES:
+        headers['Vary'] = 'Accept-Encoding'
+        coding = _negotiate_encoding(accept_encoding)
+        if coding:
+            raw = encoded.encode('utf-8')
+            compressed = _compress(raw, coding)
+            if len(compressed) < len(raw):
+                headers['Content-Encoding'] = coding
+                return {
+                    'statusCode': status_code,
+                    'headers': headers,
+                    'body': base64.b64encode(compressed).decode('ascii'),
+                    'isBase64Encoded': True,
+                }
+
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json'
-        },
-        'body': json.dumps(body)
+        'headers': headers,
+        'body': encoded,
+        'isBase64Encoded': False,
     }
 
 
@@ -145,570 +444,641 @@ def _get_github_credentials():
     return GITHUB_CLIENT_ID, GITHUB_CLIENT_SECRET
 
 
-def handle_github_auth(variables: Dict[str, Any]) -> Dict[str, Any]:
+def handle_github_auth(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Initiate GitHub OAuth flow — returns the authorization URL"""
-    try:
-        client_id, _ = _get_github_credentials()
-
-        # Generate CSRF state token
-        state = str(uuid.uuid4())
-        _oauth_states[state] = datetime.now(timezone.utc).isoformat()
-
-        redirect_uri = CALLBACK_URL
-        github_url = (
-            f"https://github.com/login/oauth/authorize"
-            f"?client_id={client_id}"
-            f"&redirect_uri={redirect_uri}"
-            f"&scope=repo,user:email"
-            f"&state={state}"
-        )
+    client_id, _ = _get_github_credentials()
 
-        return create_response(200, {
-            'data': {
-                'githubAuth': {
-                    'url': github_url,
-                    'state': state
-                }
-            }
-        })
-    except Exception as e:
-        print(f"GitHub auth error: {e}")
-        return create_response(500, {'errors': [{'message': f'GitHub auth error: {str(e)}'}]})
+    # Generate CSRF state token
+    state = str(uuid.uuid4())
+    _oauth_states[state] = datetime.now(timezone.utc).isoformat()
 
+    redirect_uri = CALLBACK_URL
+    github_url = (
+        f"https://github.com/login/oauth/authorize"
+        f"?client_id={client_id}"
+        f"&redirect_uri={redirect_uri}"
+        f"&scope=repo,user:email"
+        f"&state={state}"
+    )
 
-def handle_github_callback(variables: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'url': github_url,
+        'state': state
+    }
+
+
+def handle_github_callback(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Handle GitHub OAuth callback — exchange code for token, create user"""
+    code = variables.get('code')
+    state = variables.get('state')
+
+    if not code:
+        raise GraphQLError('Missing authorization code', 400)
+
+    client_id, client_secret = _get_github_credentials()
+
+    if not client_secret:
+        raise GraphQLError('GitHub client secret not configured. Set GITHUB_CLIENT_SECRET env var.', 500)
+
+    deadline = _deadline()
+
+    # Exchange code for access token
+    token_response = github.post(
+        'https://github.com/login/oauth/access_token',
+        json={
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'code': code,
+            'redirect_uri': CALLBACK_URL,
+        },
+        headers={'Accept': 'application/json'},
+        timeout=deadline.timeout(GITHUB_TIMEOUT),
+    )
+    token_data = token_response.json()
+    access_token = token_data.get('access_token')
+
+    if not access_token:
+        error_desc = token_data.get('error_description', 'Unknown error')
+        raise GraphQLError(f'GitHub token exchange failed: {error_desc}', 400)
+
+    # Fetch the profile and the emails (in case primary email is private)
+    # together; fresh token, nothing to revalidate
+    timeout = deadline.timeout(GITHUB_TIMEOUT)
     try:
-        code = variables.get('code')
-        state = variables.get('state')
-
-        if not code:
-            return create_response(400, {'errors': [{'message': 'Missing authorization code'}]})
-
-        client_id, client_secret = _get_github_credentials()
-
-        if not client_secret:
-            return create_response(500, {'errors': [{'message': 'GitHub client secret not configured. Set GITHUB_CLIENT_SECRET env var.'}]})
-
-        # Exchange code for access token
-        token_response = requests.post(
-            'https://github.com/login/oauth/access_token',
-            json={
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'code': code,
-                'redirect_uri': CALLBACK_URL,
-            },
-            headers={'Accept': 'application/json'},
-            timeout=10,
-        )
-        token_data = token_response.json()
-        access_token = token_data.get('access_token')
-
-        if not access_token:
-            error_desc = token_data.get('error_description', 'Unknown error')
-            return create_response(400, {'errors': [{'message': f'GitHub token exchange failed: {error_desc}'}]})
-
-        # Fetch user profile from GitHub
-        user_response = requests.get(
-            'https://api.github.com/user',
-            headers={'Authorization': f'token {access_token}'},
-            timeout=10,
+        user_response, emails_response = gather(
+            lambda: github.get('/user', token=access_token, timeout=timeout, conditional=False),
+            lambda: github.get('/user/emails', token=access_token, timeout=timeout, conditional=False),
+            deadline=deadline,
         )
-        user_data = user_response.json()
+    except DeadlineExceeded:
+        raise GraphQLError('GitHub did not respond in time', 504)
+    user_data = user_response.json()
+    emails = emails_response.json() if emails_response.status_code == 200 else []
+    primary_email = next((e['email'] for e in emails if e.get('primary')), user_data.get('email', ''))
 
-        # Fetch user emails (in case primary email is private)
-        emails_response = requests.get(
-            'https://api.github.com/user/emails',
-            headers={'Authorization': f'token {access_token}'},
-            timeout=10,
-        )
-        emails = emails_response.json() if emails_response.status_code == 200 else []
-        primary_email = next((e['email'] for e in emails if e.get('primary')), user_data.get('email', ''))
-
-        github_id = str(user_data['id'])
-        username = user_data['login']
-        avatar_url = user_data.get('avatar_url', '')
-        now = datetime.now(timezone.utc).isoformat()
-
-        # Create or find user
-        user_id = _upsert_user(github_id, username, primary_email, avatar_url, access_token, now)
-
-        # Generate our app token
-        app_token = _generate_token(user_id)
-
-        return create_response(200, {
-            'data': {
-                'githubCallback': {
-                    'user': {
-                        'id': user_id,
-                        'username': username,
-                        'email': primary_email,
-                        'avatar_url': avatar_url,
-                    },
-                    'token': app_token,
-                }
-            }
-        })
-    except Exception as e:
-        print(f"GitHub callback error: {e}")
-        return create_response(500, {'errors': [{'message': f'GitHub callback error: {str(e)}'}]})
+    github_id = str(user_data['id'])
+    username = user_data['login']
+    avatar_url = user_data.get('avatar_url', '')
+    now = datetime.now(timezone.utc).isoformat()
+
+    # Create or find user
+    user_id = _upsert_user(github_id, username, primary_email, avatar_url, access_token, now)
+
+    # Generate our app token
+    app_token = _generate_token(user_id)
+
+    return {
+        'user': {
+            'id': user_id,
+            'username': username,
+            'email': primary_email,
+            'avatar_url': avatar_url,
+        },
+        'token': app_token,
+    }
 
 
 # =====================================================================
 #  PROJECT MANAGEMENT
 # =====================================================================
-def handle_create_project(variables: Dict[str, Any]) -> Dict[str, Any]:
+def handle_create_project(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Create a new project and branch on GitHub"""
-    try:
-        user_id = _get_user_from_token(variables.get('token'))
-        if not user_id:
-            return create_response(401, {'errors': [{'message': 'Unauthorized'}]})
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
 
-        github_repo = variables.get('githubRepo')
-        team_name = variables.get('teamName')
-        team_leader = variables.get('teamLeader')
+    github_repo = variables.get('githubRepo')
+    team_name = variables.get('teamName')
+    team_leader = variables.get('teamLeader')
 
-        if not all([github_repo, team_name, team_leader]):
-            return create_response(400, {'errors': [{'message': 'Missing required fields: githubRepo, teamName, teamLeader'}]})
+    if not all([github_repo, team_name, team_leader]):
+        raise GraphQLError('Missing required fields: githubRepo, teamName, teamLeader', 400)
 
-        # Get user's access token
-        access_token = None
-        if IS_LOCAL:
-            user_data = _local_users.get(user_id)
-            if user_data:
-                access_token = user_data.get('access_token')
-        else:
-            user = users_table.get_item(Key={'user_id': user_id})
-            if 'Item' in user:
-                access_token = user['Item'].get('access_token')
-        
-        if not access_token:
-            return create_response(400, {'errors': [{'message': 'GitHub access token not found'}]})
+    # Get user's access token
+    user = _loader().load('users', user_id) or {}
+    access_token = user.get('access_token')
+    
+    if not access_token:
+        raise GraphQLError('GitHub access token not found', 400)
 
-        project_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
-        branch_name = _generate_branch_name(team_name, team_leader)
+    project_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    branch_name = _generate_branch_name(team_name, team_leader)
 
-        # Create branch on GitHub using PAT
-        repo_clean = github_repo.replace('https://github.com/', '').replace('http://github.com/', '').rstrip('/').replace('.git', '')
-        parts = repo_clean.split('/')
-        if len(parts) >= 2:
-            owner, repo = parts[0], parts[1]
-            headers = {'Authorization': f'token {access_token}', 'Accept': 'application/vnd.github.v3+json'}
-            
-            try:
-                repo_response = requests.get(f'https://api.github.com/repos/{owner}/{repo}', headers=headers, timeout=10)
-                if repo_response.ok:
-                    default_branch = repo_response.json()['default_branch']
-                    ref_response = requests.get(f'https://api.github.com/repos/{owner}/{repo}/git/ref/heads/{default_branch}', headers=headers, timeout=10)
-                    if ref_response.ok:
-                        sha = ref_response.json()['object']['sha']
-                        create_response_gh = requests.post(
-                            f'https://api.github.com/repos/{owner}/{repo}/git/refs',
-                            headers=headers,
-                            json={'ref': f'refs/heads/{branch_name}', 'sha': sha},
-                            timeout=10
-                        )
-                        if create_response_gh.ok:
-                            print(f'[CreateProject] ✅ Created branch {branch_name}')
-                        elif create_response_gh.status_code == 422:
-                            print(f'[CreateProject] Branch {branch_name} already exists')
-                        else:
-                            print(f'[CreateProject] Failed: {create_response_gh.status_code}')
-            except Exception as e:
-                print(f'[CreateProject] Error: {e}')
-
-        project_data = {
-            'project_id': project_id,
-            'user_id': user_id,
-            'github_repo': github_repo,
-            'team_name': team_name,
-            'team_leader': team_leader,
-            'branch_name': branch_name,
-            'status': 'created',
-            'created_at': now,
-            'updated_at': now,
-        }
+    project_data = {
+        'project_id': project_id,
+        'user_id': user_id,
+        'github_repo': github_repo,
+        'team_name': team_name,
+        'team_leader': team_leader,
+        'branch_name': branch_name,
+        'status': 'created',
+        'created_at': now,
+        'updated_at': now,
+    }
 
-        if IS_LOCAL:
-            _local_projects[project_id] = project_data
+    # Create branch on GitHub using PAT. The project write does not depend on
+    # GitHub, so it runs alongside the repo metadata lookup and a speculative
+    # fetch of the `main` ref (the usual default branch)
+    deadline = _deadline()
+    calls = [lambda: store.projects.put(project_data)]
+    repo_clean = github_repo.replace('https://github.com/', '').replace('http://github.com/', '').rstrip('/').replace('.git', '')
+    parts = repo_clean.split('/')
+    if len(parts) >= 2:
+        owner, repo = parts[0], parts[1]
+        calls.append(lambda: github.repo(owner, repo, access_token, timeout=deadline.timeout(GITHUB_TIMEOUT)))
+        calls.append(lambda: _branch_ref(owner, repo, 'main', access_token, deadline))
+    try:
+        results = gather(*calls, deadline=deadline, return_exceptions=True)
+    except DeadlineExceeded:
+        # The write ran first on this thread; only GitHub can still be pending
+        print(f'[CreateProject] GitHub did not answer in time, skipping branch {branch_name}')
+        results = [None]
+    if isinstance(results[0], Exception):
+        raise results[0]
+    if len(results) == 3:
+        _create_project_branch(owner, repo, branch_name, access_token, deadline, *results[1:])
+    _loader().prime('projects', project_id, project_data)
+
+    return {
+        'id': project_id,
+        'status': 'created',
+        'branch_name': branch_name,
+    }
+
+
+def _branch_ref(owner: str, repo: str, branch: str, access_token: str, deadline: Deadline):
+    return github.get(f'/repos/{owner}/{repo}/git/ref/heads/{branch}', token=access_token,
+                      timeout=deadline.timeout(GITHUB_TIMEOUT))
+
+
+def _create_project_branch(owner: str, repo: str, branch_name: str, access_token: str,
+                           deadline: Deadline, repo_data: Any, main_ref: Any):
+    """Best effort: point `branch_name` at the head of the default branch"""
+    try:
+        if isinstance(repo_data, Exception):
+            raise repo_data
+        default_branch = repo_data['default_branch']
+        if default_branch == 'main' and not isinstance(main_ref, Exception):
+            ref_response = main_ref
         else:
-            projects_table.put_item(Item=project_data)
-
-        return create_response(200, {
-            'data': {
-                'createProject': {
-                    'id': project_id,
-                    'status': 'created',
-                    'branch_name': branch_name,
-                }
-            }
-        })
+            ref_response = _branch_ref(owner, repo, default_branch, access_token, deadline)
+        if ref_response.ok:
+            sha = ref_response.json()['object']['sha']
+            create_response_gh = github.post(
+                f'/repos/{owner}/{repo}/git/refs',
+                token=access_token,
+                json={'ref': f'refs/heads/{branch_name}', 'sha': sha},
+                timeout=deadline.timeout(GITHUB_TIMEOUT)
+            )
+            if create_response_gh.ok:
+                print(f'[CreateProject] ✅ Created branch {branch_name}')
+            elif create_response_gh.status_code == 422:
+                print(f'[CreateProject] Branch {branch_name} already exists')
+            else:
+                print(f'[CreateProject] Failed: {create_response_gh.status_code}')
     except Exception as e:
-        print(f"Create project error: {e}")
-        return create_response(500, {'errors': [{'message': f'Create project error: {str(e)}'}]})
+        print(f'[CreateProject] Error: {e}')
 
 
-def handle_get_projects(variables: Dict[str, Any]) -> Dict[str, Any]:
+def handle_get_projects(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Get all projects for the authenticated user"""
-    try:
-        user_id = _get_user_from_token(variables.get('token'))
-        if not user_id:
-            return create_response(401, {'errors': [{'message': 'Unauthorized'}]})
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
 
-        if IS_LOCAL:
-            projects = [p for p in _local_projects.values() if p['user_id'] == user_id]
-        else:
-            response = projects_table.query(
-                IndexName='user-id-index',
-                KeyConditionExpression='user_id = :user_id',
-                ExpressionAttributeValues={':user_id': user_id}
-            )
-            projects = response.get('Items', [])
+    projects, _ = _list_projects(user_id, attributes=_attributes(field, ('project_id',)))
+    return projects
 
-        return create_response(200, {
-            'data': {
-                'getProjects': projects
-            }
-        })
-    except Exception as e:
-        print(f"Get projects error: {e}")
-        return create_response(500, {'errors': [{'message': f'Get projects error: {str(e)}'}]})
+
+def handle_get_projects_page(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
+    """One page of the user's projects, newest first (`first`, `after` cursor)"""
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
+
+    items = field.child('items') if field is not None else None
+    projects, end_cursor = _list_projects(user_id, variables.get('first'), variables.get('after'), paginate=True,
+                                          attributes=_attributes(items, ('project_id',)))
+    return connection(projects, end_cursor)
+
+
+def _list_projects(user_id: str, first: Optional[int] = None, after: Optional[str] = None,
+                   paginate: bool = False, attributes: Optional[List[str]] = None):
+    if not paginate:
+        return query_all(store.projects, 'user-id-index', user_id, reverse=True, attributes=attributes), None
+    return query_page(store.projects, 'user-id-index', user_id, first, after, reverse=True, attributes=attributes)
 
 
 # =====================================================================
 #  AGENT EXECUTION
 # =====================================================================
-def handle_trigger_agent(variables: Dict[str, Any]) -> Dict[str, Any]:
-    """Trigger multi-agent code analysis"""
+# A project runs one fix deployment at a time: a repeated triggerFix
+# (double-click, client retry) joins the in-flight deployment instead of
+# starting a second worker. The lock lives on the project item, is released
+# by the worker when it finishes, and goes stale after DEPLOYMENT_LOCK_TTL
+# seconds in case a worker dies holding it. triggerAgent starts no worker,
+# so nothing would release its lock: it is only deduplicated by key.
+DEPLOYMENT_LOCK_TTL = int(os.environ.get('DEPLOYMENT_LOCK_TTL', '900'))
+_IDEMPOTENCY_NAMESPACE = uuid.UUID('6f1c9a52-8d0e-4b7a-9a59-3f4e2f6c1d20')
+_IN_FLIGHT = ('processing', 'running')
+
+
+def _idempotent_deployment_id(kind: str, user_id: str, project_id: str,
+                              idempotency_key: Optional[str]) -> str:
+    """Same key from the same user for the same project -> same deployment"""
+    if not idempotency_key:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(_IDEMPOTENCY_NAMESPACE, f'{kind}:{user_id}:{project_id}:{idempotency_key}'))
+
+
+def _try_project_lock(project_id: str, lock: str, deployment_id: str, now: int,
+                      expected: Optional[str] = None) -> Optional[str]:
+    """Conditionally point `lock` at deployment_id. Returns None when taken,
+    otherwise the deployment currently holding it. With `expected`, only
+    succeed if that deployment is still the holder (takeover)."""
+    if expected is not None:
+        condition = attr_equals(lock, expected)
+    else:
+        condition = (attr_missing(lock) | attr_equals(lock, deployment_id)
+                     | attr_below(f'{lock}_at', now - DEPLOYMENT_LOCK_TTL))
     try:
-        user_id = _get_user_from_token(variables.get('token'))
-        if not user_id:
-            return create_response(401, {'errors': [{'message': 'Unauthorized'}]})
-
-        project_id = variables.get('projectId')
-        if not project_id:
-            return create_response(400, {'errors': [{'message': 'Missing project ID'}]})
-
-        # Verify project exists
-        if IS_LOCAL:
-            if project_id not in _local_projects:
-                return create_response(404, {'errors': [{'message': 'Project not found'}]})
-            project_data = _local_projects[project_id]
-        else:
-            project = projects_table.get_item(Key={'project_id': project_id})
-            if 'Item' not in project:
-                return create_response(404, {'errors': [{'message': 'Project not found'}]})
-            project_data = project['Item']
+        store.projects.update({'project_id': project_id},
+                              {lock: deployment_id, f'{lock}_at': now}, condition=condition)
+        return None
+    except ConditionFailed as e:
+        project = e.item
+    if project is None:
+        project = store.projects.get(project_id, consistent=True) or {}
+    return project.get(lock)
+
+
+def _claim_project(kind: str, project_id: str, deployment_id: str) -> Optional[str]:
+    """Take the project's `kind` lock; returns the deployment to join instead,
+    or None when this request should start deployment_id itself"""
+    lock = f'active_{kind}_deployment'
+    now = int(time.time())
+    holder = _try_project_lock(project_id, lock, deployment_id, now)
+    if holder is None:
+        return None
+    current = _loader().load('deployments', holder)
+    # A missing item means the holder is still between locking and writing it
+    if current is None or current.get('status') in _IN_FLIGHT:
+        return holder
+    # Holder finished without releasing: take over once
+    return _try_project_lock(project_id, lock, deployment_id, now, expected=holder)
+
+
+def _release_project(kind: str, project_id: str, deployment_id: str):
+    lock = f'active_{kind}_deployment'
+    try:
+        store.projects.update({'project_id': project_id}, remove=(lock, f'{lock}_at'),
+                              condition=attr_equals(lock, deployment_id))
+    except ConditionFailed:
+        pass
 
-        deployment_id = str(uuid.uuid4())
-        run_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
 
-        deployment_data = {
-            'deployment_id': deployment_id,
-            'project_id': project_id,
-            'status': 'running',
-            'created_at': now,
-            'updated_at': now,
+def _put_deployment(deployment_data: Dict[str, Any]) -> bool:
+    """Create the deployment item; False if one with this id already exists"""
+    try:
+        store.deployments.put(deployment_data, condition=attr_missing('deployment_id'))
+    except ConditionFailed:
+        return False
+    return True
+
+
+def _start_deployment(kind: str, user_id: str, project_id: str,
+                      idempotency_key: Optional[str],
+                      deployment_data: Dict[str, Any],
+                      single_flight: bool = True) -> Tuple[Dict[str, Any], bool]:
+    """Idempotent creation of a deployment, single-flight per project unless
+    `single_flight` is False. Returns (deployment, started); `started` is
+    False when the request joined an existing deployment."""
+    deployment_id = _idempotent_deployment_id(kind, user_id, project_id, idempotency_key)
+    if idempotency_key:
+        existing = _loader().load('deployments', deployment_id)
+        if existing is not None:
+            return existing, False
+
+    holder = _claim_project(kind, project_id, deployment_id) if single_flight else None
+    if holder is not None and holder != deployment_id:
+        print(f'[{kind}] Joining in-flight deployment {holder} for project {project_id}')
+        existing = _loader().load('deployments', holder)
+        if existing is None:
+            existing = {'deployment_id': holder, 'project_id': project_id, 'status': deployment_data['status']}
+        return existing, False
+
+    deployment_data = dict(deployment_data, deployment_id=deployment_id)
+    try:
+        created = _put_deployment(deployment_data)
+    except Exception:
+        if single_flight:
+            _release_project(kind, project_id, deployment_id)
+        raise
+    if not created:
+        _loader().clear('deployments', deployment_id)
+        existing = _loader().load('deployments', deployment_id)
+        if existing is not None:
+            return existing, False
+    _loader().prime('deployments', deployment_id, deployment_data)
+    return deployment_data, True
+
+
+def handle_trigger_agent(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
+    """Trigger multi-agent code analysis"""
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
+
+    project_id = variables.get('projectId')
+    if not project_id:
+        raise GraphQLError('Missing project ID', 400)
+
+    # Verify project exists
+    project_data = _loader().load('projects', project_id)
+    if project_data is None:
+        raise GraphQLError('Project not found', 404)
+
+    run_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+
+    # No worker runs this deployment, so there is no lock to take: only a
+    # retried request (same idempotency key) joins it
+    deployment_data, started = _start_deployment('agent', user_id, project_id, variables.get('idempotencyKey'), {
+        'project_id': project_id,
+        'run_id': run_id,
+        'status': 'running',
+        'created_at': now,
+        'updated_at': now,
+    }, single_flight=False)
+    deployment_id = deployment_data['deployment_id']
+    if not started:
+        return {
+            'deploymentId': deployment_id,
+            'runId': deployment_data.get('run_id'),
+            'status': deployment_data.get('status'),
         }
 
-        run_data = {
-            'run_id': run_id,
-            'deployment_id': deployment_id,
-            'status': 'initializing',
-            'agents': ['openrouter', 'claude', 'gemini', 'sarvam', 'codeium'],
-            'retry_count': 0,
-            'max_retries': 5,
-            'created_at': now,
-            'updated_at': now,
-        }
+    run_data = {
+        'run_id': run_id,
+        'deployment_id': deployment_id,
+        'status': 'initializing',
+        'agents': ['openrouter', 'claude', 'gemini', 'sarvam', 'codeium'],
+        'retry_count': 0,
+        'max_retries': 5,
+        'created_at': now,
+        'updated_at': now,
+    }
 
-        if IS_LOCAL:
-            _local_deployments[deployment_id] = deployment_data
-            _local_agent_runs[run_id] = run_data
-            # Update project status
-            _local_projects[project_id]['status'] = 'running'
-        else:
-            deployments_table.put_item(Item=deployment_data)
-            agent_runs_table.put_item(Item=run_data)
-            projects_table.update_item(
-                Key={'project_id': project_id},
-                UpdateExpression='SET #status = :status, updated_at = :updated_at',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={':status': 'running', ':updated_at': now}
-            )
+    store.agent_runs.put(run_data)
+    store.projects.update({'project_id': project_id}, {'status': 'running', 'updated_at': now})
 
-            # ECS task disabled - using Lambda worker instead
-            print(f"[TriggerAgent] Skipping ECS task (not configured)")
+    # ECS task disabled - using Lambda worker instead
+    print(f"[TriggerAgent] Skipping ECS task (not configured)")
 
-        return create_response(200, {
-            'data': {
-                'triggerAgent': {
-                    'deploymentId': deployment_id,
-                    'runId': run_id,
-                    'status': 'running',
-                }
-            }
-        })
-    except Exception as e:
-        print(f"Trigger agent error: {e}")
-        return create_response(500, {'errors': [{'message': f'Trigger agent error: {str(e)}'}]})
+    _loader().clear('projects', project_id)
+
+    return {
+        'deploymentId': deployment_id,
+        'runId': run_id,
+        'status': 'running',
+    }
 
 
-def handle_get_deployment(variables: Dict[str, Any]) -> Dict[str, Any]:
+def handle_get_deployment(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Get deployment details with analysis results"""
-    try:
-        user_id = _get_user_from_token(variables.get('token'))
-        if not user_id:
-            return create_response(401, {'errors': [{'message': 'Unauthorized'}]})
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
 
-        deployment_id = variables.get('deploymentId')
-        if not deployment_id:
-            return create_response(400, {'errors': [{'message': 'Missing deployment ID'}]})
+    deployment_id = variables.get('deploymentId')
+    if not deployment_id:
+        raise GraphQLError('Missing deployment ID', 400)
 
-        if IS_LOCAL:
-            if deployment_id not in _local_deployments:
-                return create_response(404, {'errors': [{'message': 'Deployment not found'}]})
-            deployment_data = dict(_local_deployments[deployment_id])
-            deployment_data['agent_runs'] = [
-                r for r in _local_agent_runs.values()
-                if r['deployment_id'] == deployment_id
-            ]
-        else:
-            deployment = deployments_table.get_item(Key={'deployment_id': deployment_id})
-            if 'Item' not in deployment:
-                return create_response(404, {'errors': [{'message': 'Deployment not found'}]})
-            deployment_data = deployment['Item']
-
-            agent_runs = agent_runs_table.query(
-                IndexName='deployment-id-index',
-                KeyConditionExpression='deployment_id = :deployment_id',
-                ExpressionAttributeValues={':deployment_id': deployment_id}
-            )
-            deployment_data['agent_runs'] = agent_runs.get('Items', [])
+    # Read only what was selected: a status poll skips issues, fixes and runs
+    deployment_data = _loader().load('deployments', deployment_id,
+                                     _attributes(field, ('deployment_id',), computed=('agent_runs',)))
+    if deployment_data is None:
+        raise GraphQLError('Deployment not found', 404)
+    deployment_data = dict(deployment_data)
+
+    runs = field.child('agent_runs') if field is not None and field.selection else None
+    if field is None or not field.selection or runs is not None:
+        deployment_data['agent_runs'], _ = _list_agent_runs(
+            deployment_id, attributes=_attributes(runs, ('run_id', 'deployment_id')))
+    return deployment_data
 
-        return create_response(200, {
-            'data': {
-                'getDeployment': deployment_data
-            }
-        })
-    except Exception as e:
-        print(f"Get deployment error: {e}")
-        return create_response(500, {'errors': [{'message': f'Get deployment error: {str(e)}'}]})
 
+def handle_get_agent_runs_page(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
+    """One page of a deployment's agent runs, oldest first"""
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
 
-def handle_get_commits(variables: Dict[str, Any]) -> Dict[str, Any]:
+    deployment_id = variables.get('deploymentId')
+    if not deployment_id:
+        raise GraphQLError('Missing deployment ID', 400)
+
+    items = field.child('items') if field is not None else None
+    runs, end_cursor = _list_agent_runs(deployment_id, variables.get('first'), variables.get('after'), paginate=True,
+                                        attributes=_attributes(items, ('run_id', 'deployment_id')))
+    return connection(runs, end_cursor)
+
+
+def _list_agent_runs(deployment_id: str, first: Optional[int] = None, after: Optional[str] = None,
+                     paginate: bool = False, attributes: Optional[List[str]] = None):
+    if not paginate:
+        return query_all(store.agent_runs, 'deployment-id-index', deployment_id, attributes=attributes), None
+    return query_page(store.agent_runs, 'deployment-id-index', deployment_id, first, after, attributes=attributes)
+
+
+def handle_get_commits(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Fetch commits from GitHub for a repository"""
-    try:
-        user_id = _get_user_from_token(variables.get('token'))
-        github_repo = variables.get('githubRepo')
-        branch = variables.get('branch', 'main')
-        
-        if not github_repo:
-            return create_response(400, {'errors': [{'message': 'Missing githubRepo'}]})
-        
-        # Get user's GitHub access token if authenticated
-        access_token = None
-        if user_id:
-            if IS_LOCAL:
-                user_data = _local_users.get(user_id)
-                if user_data:
-                    access_token = user_data.get('access_token')
-            else:
-                try:
-                    user = users_table.get_item(Key={'user_id': user_id})
-                    if 'Item' in user:
-                        access_token = user['Item'].get('access_token')
-                except Exception as e:
-                    print(f'[GetCommits] Failed to get user token: {e}')
-        
-        # Clean and extract owner and repo from URL
-        repo_clean = github_repo.replace('https://github.com/', '').replace('http://github.com/', '')
-        repo_clean = repo_clean.rstrip('/').replace('.git', '')
-        
-        parts = repo_clean.split('/')
-        if len(parts) < 2:
-            return create_response(400, {'errors': [{'message': 'Invalid GitHub URL'}]})
-        
-        owner, repo = parts[0], parts[1]
-        
-        print(f'[GetCommits] Fetching commits for {owner}/{repo} on branch {branch}')
-        
-        # Prepare headers with auth token if available
-        headers = {'Accept': 'application/vnd.github.v3+json'}
-        if access_token:
-            headers['Authorization'] = f'token {access_token}'
-            print(f'[GetCommits] Using authenticated request')
-        
-        # Try the specified branch first
-        response = requests.get(
-            f'https://api.github.com/repos/{owner}/{repo}/commits',
-            params={'sha': branch, 'per_page': 20},
-            headers=headers,
+    user_id = _get_user_from_token(variables.get('token'))
+    github_repo = variables.get('githubRepo')
+    branch = variables.get('branch', 'main')
+    
+    if not github_repo:
+        raise GraphQLError('Missing githubRepo', 400)
+    
+    # Get user's GitHub access token if authenticated
+    access_token = None
+    if user_id:
+        try:
+            user = _loader().load('users', user_id) or {}
+            access_token = user.get('access_token')
+        except Exception as e:
+            print(f'[GetCommits] Failed to get user token: {e}')
+    
+    # Clean and extract owner and repo from URL
+    repo_clean = github_repo.replace('https://github.com/', '').replace('http://github.com/', '')
+    repo_clean = repo_clean.rstrip('/').replace('.git', '')
+    
+    parts = repo_clean.split('/')
+    if len(parts) < 2:
+        raise GraphQLError('Invalid GitHub URL', 400)
+    
+    owner, repo = parts[0], parts[1]
+    
+    print(f'[GetCommits] Fetching commits for {owner}/{repo} on branch {branch}')
+    
+    if access_token:
+        print(f'[GetCommits] Using authenticated request')
+    
+    # Try the specified branch first
+    response = github.get(
+        f'/repos/{owner}/{repo}/commits',
+        token=access_token,
+        params={'sha': branch, 'per_page': 20},
+        timeout=10
+    )
+    
+    print(f'[GetCommits] GitHub API response status: {response.status_code}')
+    
+    # If branch not found, try default branch
+    if response.status_code == 404 and branch != 'main':
+        print(f'[GetCommits] Branch {branch} not found, trying main branch')
+        response = github.get(
+            f'/repos/{owner}/{repo}/commits',
+            token=access_token,
+            params={'sha': 'main', 'per_page': 20},
             timeout=10
         )
-        
-        print(f'[GetCommits] GitHub API response status: {response.status_code}')
-        
-        # If branch not found, try default branch
-        if response.status_code == 404 and branch != 'main':
-            print(f'[GetCommits] Branch {branch} not found, trying main branch')
-            response = requests.get(
-                f'https://api.github.com/repos/{owner}/{repo}/commits',
-                params={'sha': 'main', 'per_page': 20},
-                headers=headers,
-                timeout=10
-            )
-            print(f'[GetCommits] Main branch response status: {response.status_code}')
-        
-        if not response.ok:
-            error_msg = response.json().get('message', 'Unknown error') if response.text else 'Unknown error'
-            print(f'[GetCommits] GitHub API error: {error_msg}')
-            return create_response(response.status_code, {'errors': [{'message': f'GitHub API error: {response.status_code} - {error_msg}'}]})
-        
-        commits_data = response.json()
-        commits = [{
-            'sha': c['sha'][:7],
-            'message': c['commit']['message'].split('\n')[0],
-            'author': c['commit']['author']['name'],
-            'date': c['commit']['author']['date'],
-            'url': c['html_url']
-        } for c in commits_data]
-        
-        print(f'[GetCommits] Successfully fetched {len(commits)} commits')
-        
-        return create_response(200, {
-            'data': {
-                'getCommits': commits
-            }
-        })
-    except Exception as e:
-        print(f"Get commits error: {e}")
-        return create_response(500, {'errors': [{'message': f'Get commits error: {str(e)}'}]})
+        print(f'[GetCommits] Main branch response status: {response.status_code}')
+    
+    if not response.ok:
+        error_msg = response.json().get('message', 'Unknown error') if response.text else 'Unknown error'
+        print(f'[GetCommits] GitHub API error: {error_msg}')
+        raise GraphQLError(f'GitHub API error: {response.status_code} - {error_msg}', response.status_code)
+    
+    commits_data = response.json()
+    commits = [{
+        'sha': c['sha'][:7],
+        'message': c['commit']['message'].split('\n')[0],
+        'author': c['commit']['author']['name'],
+        'date': c['commit']['author']['date'],
+        'url': c['html_url']
+    } for c in commits_data]
+    
+    print(f'[GetCommits] Successfully fetched {len(commits)} commits')
+    
+    return commits
 
 
-def handle_get_fixes(variables: Dict[str, Any]) -> Dict[str, Any]:
+def handle_get_fixes(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Get fixes for a deployment"""
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
+    
+    deployment_id = variables.get('deploymentId')
+    if not deployment_id:
+        raise GraphQLError('Missing deploymentId', 400)
+    
+    fixes, _ = _list_fixes(deployment_id, attributes=_attributes(field, ('deployment_id', 'fix_id')))
+    return fixes
+
+
+def handle_get_fixes_page(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
+    """One page of a deployment's fixes, in fix_id order"""
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
+
+    deployment_id = variables.get('deploymentId')
+    if not deployment_id:
+        raise GraphQLError('Missing deploymentId', 400)
+
+    items = field.child('items') if field is not None else None
+    fixes, end_cursor = _list_fixes(deployment_id, variables.get('first'), variables.get('after'), paginate=True,
+                                    attributes=_attributes(items, ('deployment_id', 'fix_id')))
+    return connection(fixes, end_cursor)
+
+
+def _list_fixes(deployment_id: str, first: Optional[int] = None, after: Optional[str] = None,
+                paginate: bool = False, attributes: Optional[List[str]] = None):
     try:
-        user_id = _get_user_from_token(variables.get('token'))
-        if not user_id:
-            return create_response(401, {'errors': [{'message': 'Unauthorized'}]})
-        
-        deployment_id = variables.get('deploymentId')
-        if not deployment_id:
-            return create_response(400, {'errors': [{'message': 'Missing deploymentId'}]})
-        
-        if not IS_LOCAL:
-            try:
-                fixes_table = dynamodb.Table('vajraopz-fixes')
-                response = fixes_table.query(
-                    KeyConditionExpression='deployment_id = :did',
-                    ExpressionAttributeValues={':did': deployment_id}
-                )
-                fixes = response.get('Items', [])
-            except Exception as e:
-                print(f'[GetFixes] DynamoDB error: {e}')
-                fixes = []
-        else:
-            fixes = []
-        
-        return create_response(200, {
-            'data': {
-                'getFixes': fixes
-            }
-        })
+        if not paginate:
+            return query_all(store.fixes, None, deployment_id, attributes=attributes), None
+        return query_page(store.fixes, None, deployment_id, first, after, attributes=attributes)
+    except GraphQLError:
+        raise
     except Exception as e:
-        print(f"Get fixes error: {e}")
-        return create_response(500, {'errors': [{'message': f'Get fixes error: {str(e)}'}]})
+        print(f'[GetFixes] DynamoDB error: {e}')
+        return [], None
 
 
-def handle_trigger_fix(variables: Dict[str, Any]) -> Dict[str, Any]:
+def handle_trigger_fix(variables: Dict[str, Any], field: Optional[Field] = None) -> Any:
     """Trigger multi-agent fix workflow - invokes Lambda worker"""
-    try:
-        user_id = _get_user_from_token(variables.get('token'))
-        if not user_id:
-            return create_response(401, {'errors': [{'message': 'Unauthorized'}]})
-        
-        project_id = variables.get('projectId')
-        if not project_id:
-            return create_response(400, {'errors': [{'message': 'Missing projectId'}]})
-        
-        # Get project and user data
-        if IS_LOCAL:
-            if project_id not in _local_projects:
-                return create_response(404, {'errors': [{'message': 'Project not found'}]})
-            project = _local_projects[project_id]
-            user = _local_users.get(user_id, {})
-        else:
-            project_response = projects_table.get_item(Key={'project_id': project_id})
-            if 'Item' not in project_response:
-                return create_response(404, {'errors': [{'message': 'Project not found'}]})
-            project = project_response['Item']
-            
-            user_response = users_table.get_item(Key={'user_id': user_id})
-            user = user_response.get('Item', {})
-        
-        access_token = user.get('access_token')
-        if not access_token:
-            return create_response(400, {'errors': [{'message': 'GitHub access token not found'}]})
-        
-        # Create deployment record
-        deployment_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
-        
-        deployment_data = {
+    user_id = _get_user_from_token(variables.get('token'))
+    if not user_id:
+        raise GraphQLError('Unauthorized', 401)
+    
+    project_id = variables.get('projectId')
+    if not project_id:
+        raise GraphQLError('Missing projectId', 400)
+    
+    # Get project and user data (one BatchGetItem for both)
+    _loader().defer('users', user_id)
+    project = _loader().load('projects', project_id)
+    if project is None:
+        raise GraphQLError('Project not found', 404)
+    user = _loader().load('users', user_id) or {}
+    
+    access_token = user.get('access_token')
+    if not access_token:
+        raise GraphQLError('GitHub access token not found', 400)
+    
+    # Create deployment record, or join the one already running
+    now = datetime.now(timezone.utc).isoformat()
+    
+    deployment_data, started = _start_deployment('fix', user_id, project_id, variables.get('idempotencyKey'), {
+        'project_id': project_id,
+        'status': 'processing',
+        'stage': 'queued',
+        'progress': 0,
+        'created_at': now,
+        'updated_at': now
+    })
+    deployment_id = deployment_data['deployment_id']
+    if not started:
+        return {
+            'status': deployment_data.get('status'),
             'deployment_id': deployment_id,
-            'project_id': project_id,
-            'status': 'processing',
-            'created_at': now,
-            'updated_at': now
+            'message': 'Analysis already in progress. Check deployment status for results.'
         }
-        
-        if IS_LOCAL:
-            _local_deployments[deployment_id] = deployment_data
-        else:
-            deployments_table.put_item(Item=deployment_data)
-            
-            # Store access token in project for worker
-            projects_table.update_item(
-                Key={'project_id': project_id},
-                UpdateExpression='SET access_token = :token',
-                ExpressionAttributeValues={':token': access_token}
-            )
-            
-            # Invoke Lambda worker asynchronously
-            import boto3
-            lambda_client = boto3.client('lambda')
-            
-            try:
-                lambda_client.invoke(
-                    FunctionName='vajraopz-agent-worker',
-                    InvocationType='Event',  # Async
-                    Payload=json.dumps({
-                        'project_id': project_id,
-                        'deployment_id': deployment_id
-                    })
-                )
-                print(f'[TriggerFix] Invoked worker for deployment {deployment_id}')
-            except Exception as e:
-                print(f'[TriggerFix] Worker invocation failed: {e}')
-        
-        return create_response(200, {
-            'data': {
-                'triggerFix': {
-                    'status': 'processing',
-                    'deployment_id': deployment_id,
-                    'message': 'Analysis started. Check deployment status for results.'
-                }
-            }
+    
+    # Store access token in project for worker
+    store.projects.update({'project_id': project_id}, {'access_token': access_token})
+    _loader().clear('projects', project_id)
+    
+    # Invoke Lambda worker asynchronously
+    try:
+        _invoke_worker({
+            'project_id': project_id,
+            'deployment_id': deployment_id
         })
+        print(f'[TriggerFix] Invoked worker for deployment {deployment_id}')
+        _publish(deployment_id, 'queued')
     except Exception as e:
-        print(f"Trigger fix error: {e}")
-        import traceback
-        traceback.print_exc()
-        return create_response(500, {'errors': [{'message': f'Trigger fix error: {str(e)}'}]})
+        print(f'[TriggerFix] Worker invocation failed: {e}')
+        # Nothing will finish this deployment; let the next trigger start afresh
+        store.deployments.update({'deployment_id': deployment_id},
+                                 {'status': 'failed', 'stage': 'failed', 'progress': 100, 'updated_at': now})
+        _release_project('fix', project_id, deployment_id)
+        _loader().clear('deployments', deployment_id)
+        _publish(deployment_id, 'failed', message='Could not start the analysis worker')
+        return {
+            'status': 'failed',
+            'deployment_id': deployment_id,
+            'message': 'Could not start the analysis worker. Please try again.'
+        }
+    
+    return {
+        'status': 'processing',
+        'deployment_id': deployment_id,
+        'message': 'Analysis started. Check deployment status for results.'
+    }
 
 
 # =====================================================================
@@ -717,7 +1087,6 @@ def handle_trigger_fix(variables: Dict[str, Any]) -> Dict[str, Any]:
 def _analyze_and_fix_code(repo_url: str, branch_name: str, access_token: str, team_name: str, team_leader: str) -> Dict[str, Any]:
     """Analyze code and create GitHub branch with fixes using GitHub API"""
     from datetime import datetime
-    import base64
     
     start_time = datetime.now()
     issues = []
@@ -731,65 +1100,44 @@ def _analyze_and_fix_code(repo_url: str, branch_name: str, access_token: str, te
             raise ValueError('Invalid GitHub URL')
         owner, repo = parts[0], parts[1]
         
-        headers = {
-            'Authorization': f'token {access_token}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
-        
         print(f'[Analysis] Fetching repository {owner}/{repo}...')
         
-        # Get default branch
-        repo_response = requests.get(f'https://api.github.com/repos/{owner}/{repo}', headers=headers, timeout=10)
-        if not repo_response.ok:
-            raise Exception(f'Failed to fetch repository: {repo_response.status_code}')
-        default_branch = repo_response.json()['default_branch']
+        # Default branch and size (KB) decide how the snapshot is fetched
+        try:
+            repo_data = github.repo(owner, repo, access_token)
+        except Exception as e:
+            raise Exception(f'Failed to fetch repository: {e}')
+        default_branch = repo_data['default_branch']
         
-        # Get repository tree
-        tree_response = requests.get(
-            f'https://api.github.com/repos/{owner}/{repo}/git/trees/{default_branch}?recursive=1',
-            headers=headers,
-            timeout=30
+        # Skip node_modules, etc.
+        wanted = path_filter(
+            {'.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.go', '.rb', '.php'},
+            ['node_modules', 'dist', 'build', '.next', 'venv'],
         )
-        if not tree_response.ok:
-            raise Exception(f'Failed to fetch repository tree: {tree_response.status_code}')
         
-        tree_data = tree_response.json()
-        files = [f for f in tree_data.get('tree', []) if f['type'] == 'blob']
+        # Results are cached per blob SHA: only files that changed since any
+        # earlier run are downloaded and scanned
+        deadline = _deadline()
+        files = list_files(github, owner, repo, default_branch, access_token, wanted, deadline)
+        rules_cache = AnalysisCache(store.analysis_cache, 'rules', ruleset_version())
+        cached = rules_cache.get_many(sha for _, sha in files)
+        by_file = {path: load_issues(path, cached[sha]) for path, sha in files if sha in cached}
+        changed = [(path, sha) for path, sha in files if sha not in cached]
         
-        print(f'[Analysis] Analyzing {len(files)} files...')
-        
-        # Analyze files
-        code_extensions = {'.js', '.jsx', '.ts', '.tsx', '.py', '.java', '.go', '.rb', '.php'}
-        for file_info in files[:50]:  # Limit to 50 files
-            file_path = file_info['path']
-            ext = '.' + file_path.split('.')[-1] if '.' in file_path else ''
-            
-            if ext not in code_extensions:
-                continue
-            
-            # Skip node_modules, etc.
-            if any(skip in file_path for skip in ['node_modules', 'dist', 'build', '.next', 'venv']):
-                continue
-            
-            # Get file content
-            try:
-                content_response = requests.get(
-                    f'https://api.github.com/repos/{owner}/{repo}/contents/{file_path}?ref={default_branch}',
-                    headers=headers,
-                    timeout=10
-                )
-                if content_response.ok:
-                    content_data = content_response.json()
-                    content = base64.b64decode(content_data['content']).decode('utf-8', errors='ignore')
-                    lines = content.split('\n')
-                    
-                    for line_num, line in enumerate(lines, 1):
-                        file_issues = _check_line_for_issues(line, line_num, file_path, ext)
-                        issues.extend(file_issues)
-            except Exception as e:
-                print(f'[Analysis] Error reading {file_path}: {e}')
+        # One streamed tarball, or concurrent raw blobs for huge repos and for
+        # a handful of changed files
+        sha_of = dict(changed)
+        fresh = {}
+        for file_path, content in iter_repo_files(github, owner, repo, default_branch, access_token, wanted,
+                                                  size_kb=repo_data.get('size'), deadline=deadline, files=changed):
+            by_file[file_path] = scan_issues(file_path, content)
+            fresh[sha_of[file_path]] = dump_issues(by_file[file_path])
+        rules_cache.put_many(fresh)
         
-        print(f'[Analysis] Found {len(issues)} issues')
+        for path, _ in files:
+            issues.extend(by_file.get(path, ()))
+        print(f'[Analysis] Found {len(issues)} issues in {len(by_file)} files '
+              f'({len(by_file) - len(fresh)} from cache)')
         
         # For now, return analysis without creating branch (git not available in Lambda)
         # In production, you'd use GitHub API to create branch and commits
@@ -804,11 +1152,11 @@ def _analyze_and_fix_code(repo_url: str, branch_name: str, access_token: str, te
             'branch_url': f"{repo_url}/tree/{branch_name}",
             'score': score,
             'issues': [{
-                'file': i['file'],
-                'line': i['line'],
-                'type': i['type'],
-                'severity': i['severity'],
-                'message': i['message']
+                'file': i.file,
+                'line': i.line,
+                'type': i.type,
+                'severity': i.severity,
+                'message': i.message
             } for i in issues[:20]]
         }
             
@@ -829,83 +1177,15 @@ def _analyze_and_fix_code(repo_url: str, branch_name: str, access_token: str, te
 
 
 def _check_line_for_issues(line: str, line_num: int, file_path: str, ext: str) -> list:
-    """Check a line of code for common issues"""
+    """Check a line of code for common issues (see rules.py; whole files
+    should go through rules.scan, which compiles each language once)"""
     issues = []
-    
-    # JavaScript/TypeScript checks
-    if ext in {'.js', '.jsx', '.ts', '.tsx'}:
-        if 'console.log' in line:
-            issues.append({
-                'file': file_path,
-                'line': line_num,
-                'type': 'LINTING',
-                'severity': 'Low',
-                'message': 'Remove console.log statement',
-                'fixable': True,
-                'fix': line.replace('console.log', '// console.log')
-            })
-        
-        if 'var ' in line and not line.strip().startswith('//'):
-            issues.append({
-                'file': file_path,
-                'line': line_num,
-                'type': 'LINTING',
-                'severity': 'Medium',
-                'message': 'Use const or let instead of var',
-                'fixable': True,
-                'fix': line.replace('var ', 'const ')
-            })
-        
-        if '==' in line and '===' not in line and not line.strip().startswith('//'):
-            issues.append({
-                'file': file_path,
-                'line': line_num,
-                'type': 'LINTING',
-                'severity': 'Medium',
-                'message': 'Use === instead of ==',
-                'fixable': True,
-                'fix': line.replace('==', '===')
-            })
-    
-    # Python checks
-    elif ext == '.py':
-        if 'print(' in line and not line.strip().startswith('#'):
-            issues.append({
-                'file': file_path,
-                'line': line_num,
-                'type': 'LINTING',
-                'severity': 'Low',
-                'message': 'Remove debug print statement',
-                'fixable': True,
-                'fix': '# ' + line
-            })
-    
-    # Common checks for all languages
-    if len(line) > 120 and not line.strip().startswith(('//', '#', '/*', '*')):
-        issues.append({
-            'file': file_path,
-            'line': line_num,
-            'type': 'STYLE',
-            'severity': 'Low',
-            'message': f'Line too long ({len(line)} characters)',
-            'fixable': False
-        })
-    
-    if line.rstrip() != line.rstrip(' \t'):
-        issues.append({
-            'file': file_path,
-            'line': line_num,
-            'type': 'STYLE',
-            'severity': 'Low',
-            'message': 'Trailing whitespace',
-            'fixable': True,
-            'fix': line.rstrip() + '\n'
-        })
-    
+    for issue in scan_issues(file_path, line, ext):
+        issue.line = line_num
+        issues.append(issue.to_dict())
     return issues
 
 
-
 def _calculate_score(total_issues: int, fixes_applied: int, commits: int, elapsed_minutes: float) -> dict:
     """Calculate quality score (max 100)"""
     # Base score starts at 100
@@ -951,56 +1231,30 @@ def _calculate_score(total_issues: int, fixes_applied: int, commits: int, elapse
 # =====================================================================
 def _upsert_user(github_id, username, email, avatar_url, access_token, now):
     """Create or update user record"""
-    if IS_LOCAL:
-        # Check if user exists by github_id
-        for uid, user in _local_users.items():
-            if user.get('github_id') == github_id:
-                user.update({
-                    'username': username,
-                    'email': email,
-                    'avatar_url': avatar_url,
-                    'access_token': access_token,
-                    'updated_at': now,
-                })
-                return uid
+    profile = {
+        'github_id': github_id,
+        'username': username,
+        'email': email,
+        'avatar_url': avatar_url,
+        'access_token': access_token,
+        'updated_at': now,
+    }
 
-        user_id = str(uuid.uuid4())
-        _local_users[user_id] = {
-            'user_id': user_id,
-            'github_id': github_id,
-            'username': username,
-            'email': email,
-            'avatar_url': avatar_url,
-            'access_token': access_token,
-            'created_at': now,
-            'updated_at': now,
-        }
-        return user_id
+    # Check if user exists by github_id
+    existing = []
+    try:
+        existing, _ = store.users.query('github-id-index', github_id, limit=1)
+    except Exception as e:
+        print(f'[Auth] github-id-index lookup failed: {e}')
+
+    if existing:
+        user_id = existing[0]['user_id']
+        store.users.update({'user_id': user_id}, profile)
     else:
-        # Check if user exists in DynamoDB
         user_id = str(uuid.uuid4())
-        try:
-            existing = users_table.query(
-                IndexName='github-id-index',
-                KeyConditionExpression='github_id = :gid',
-                ExpressionAttributeValues={':gid': github_id}
-            )
-            if existing.get('Items'):
-                user_id = existing['Items'][0]['user_id']
-        except Exception:
-            pass
-
-        users_table.put_item(Item={
-            'user_id': user_id,
-            'github_id': github_id,
-            'username': username,
-            'email': email,
-            'avatar_url': avatar_url,
-            'access_token': access_token,
-            'created_at': now,
-            'updated_at': now,
-        })
-        return user_id
+        store.users.put(dict(profile, user_id=user_id, created_at=now))
+    _user_cache.pop(user_id)
+    return user_id
 
 
 def _generate_branch_name(team_name: str, team_leader: str) -> str:
@@ -1027,31 +1281,74 @@ def _generate_token(user_id: str) -> str:
 
 
 def _get_user_from_token(token: str) -> Optional[str]:
-    """Validate token and extract user_id"""
-    try:
-        if not token:
-            return None
+    """Validate token and extract user_id (verified tokens are cached until they expire)"""
+    if not token:
+        return None
 
+    user_id = _token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    user_id, exp = _verify_token(token)
+    if user_id:
+        _token_cache.set(token, user_id, expires_at=exp)
+    return user_id
+
+
+def _verify_token(token: str) -> Tuple[Optional[str], float]:
+    """Check signature and expiry; returns (user_id, exp) or (None, 0)"""
+    try:
         parts = token.split('.')
         if len(parts) != 2:
             # Legacy base64-only token fallback
             try:
                 payload = json.loads(base64.b64decode(token).decode())
                 if payload.get('exp', 0) < time.time():
-                    return None
-                return payload.get('user_id')
+                    return None, 0
+                return payload.get('user_id'), payload.get('exp', 0)
             except Exception:
-                return None
+                return None, 0
 
         payload_b64, signature = parts
         # Verify signature
         expected_sig = hmac.new(JWT_SECRET.encode(), payload_b64.encode(), hashlib.sha256).hexdigest()
         if not hmac.compare_digest(signature, expected_sig):
-            return None
+            return None, 0
 
         payload = json.loads(base64.urlsafe_b64decode(payload_b64).decode())
         if payload.get('exp', 0) < time.time():
-            return None
-        return payload.get('user_id')
+            return None, 0
+        return payload.get('user_id'), payload.get('exp', 0)
     except Exception:
-        return None
\ No newline at end of file
+        return None, 0
+
+
+# =====================================================================
+#  SCHEMA
+# =====================================================================
+SCHEMA = Schema(
+    query={
+        'getProjects': Resolver(handle_get_projects, 'Get projects'),
+        'getDeployment': Resolver(handle_get_deployment, 'Get deployment', _prefetch_deployment),
+        'getCommits': Resolver(handle_get_commits, 'Get commits', _prefetch_user),
+        'getFixes': Resolver(handle_get_fixes, 'Get fixes'),
+        'getProjectsPage': Resolver(handle_get_projects_page, 'Get projects'),
+        'getAgentRunsPage': Resolver(handle_get_agent_runs_page, 'Get agent runs'),
+        'getFixesPage': Resolver(handle_get_fixes_page, 'Get fixes'),
+    },
+    mutation={
+        'githubAuth': Resolver(handle_github_auth, 'GitHub auth'),
+        'githubCallback': Resolver(handle_github_callback, 'GitHub callback'),
+        'createProject': Resolver(handle_create_project, 'Create project', _prefetch_user),
+        'triggerAgent': Resolver(handle_trigger_agent, 'Trigger agent', _prefetch_project),
+        'triggerFix': Resolver(handle_trigger_fix, 'Trigger fix', _prefetch_project_and_user),
+    },
+)
+
+# Optional manifest of known documents ({"<sha256>": "<query>"}) so clients can
+# send hashes from the very first request of a cold container
+PERSISTED_QUERIES_PATH = os.environ.get('PERSISTED_QUERIES_PATH', '')
+if PERSISTED_QUERIES_PATH and os.path.exists(PERSISTED_QUERIES_PATH):
+    with open(PERSISTED_QUERIES_PATH) as f:
+        for _query in json.load(f).values():
+            SCHEMA.register(_query)
@@ -0,0 +1,188 @@
+"""
+VajraOpz request-scoped data loaders
+Resolvers ask for items by key; keys queued by every root field of a request
+are fetched together with DynamoDB BatchGetItem (100 keys per call, with
+UnprocessedKeys retried) and memoized until the request ends.
+
+Callers may name the attributes they need; a batch then reads only the union
+of what was asked for that table (ProjectionExpression), and a later request
+for more attributes of the same key fetches it again.
+
+Kinds that are read on almost every request (users) can also be backed by a
+warm-container TTL cache shared across requests.
+
+In local dev the same API reads straight from the local repository tables.
+"""
+
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from cache import TTLCache
+
+
+MAX_BATCH_KEYS = 100
+MAX_UNPROCESSED_RETRIES = 5
+RETRY_BASE_DELAY = 0.05
+
+# Attribute set meaning "the whole item"
+ALL = None
+Attributes = Optional[FrozenSet[str]]
+
+
+def _merge(a: Attributes, b: Attributes) -> Attributes:
+    return ALL if a is ALL or b is ALL else a | b
+
+
+def _covers(have: Attributes, want: Attributes) -> bool:
+    return have is ALL or (want is not ALL and want <= have)
+
+
+def project(item: Optional[Dict[str, Any]], attributes: Optional[Iterable[str]]) -> Optional[Dict[str, Any]]:
+    if item is None or attributes is None:
+        return item
+    return {k: v for k, v in item.items() if k in attributes}
+
+
+class DataLoader:
+    """Memoizing multi-table loader for one GraphQL request.
+
+    `tables` maps a logical kind ('users', 'projects', ...) to a
+    `(table_name, key_attribute)` pair. When `local_stores` is given the kind
+    is looked up in those dicts instead of DynamoDB. `warm` maps kinds to
+    cross-request caches consulted before, and filled after, each batch.
+    """
+
+    def __init__(self, tables: Dict[str, Tuple[str, str]],
+                 dynamodb: Any = None,
+                 local_stores: Optional[Dict[str, Dict[str, Any]]] = None,
+                 warm: Optional[Dict[str, TTLCache]] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.tables = tables
+        self.dynamodb = dynamodb
+        self.local_stores = local_stores
+        self.warm = warm or {}
+        self.sleep = sleep
+        self.round_trips = 0
+        self._cache: Dict[Tuple[str, str], Any] = {}
+        self._fetched: Dict[Tuple[str, str], Attributes] = {}
+        self._queue: Dict[Tuple[str, str], Attributes] = {}
+
+    # ─── public API ─────────────────────────────────────────────────
+    def defer(self, kind: str, key: Optional[str], attributes: Optional[Iterable[str]] = None):
+        """Queue a key for the next batch without fetching it yet"""
+        if not key:
+            return
+        want = frozenset(attributes) if attributes is not None else ALL
+        kind_key = (kind, key)
+        if kind_key in self._fetched and _covers(self._fetched[kind_key], want):
+            return
+        if kind_key in self._queue:
+            want = _merge(self._queue[kind_key], want)
+        if kind_key in self._fetched:
+            # Re-read with what we had plus what is missing
+            want = _merge(self._fetched[kind_key], want)
+        self._queue[kind_key] = want
+
+    def load(self, kind: str, key: Optional[str],
+             attributes: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Return the item for `key` (None if absent), flushing queued keys.
+        With `attributes`, only those are guaranteed to be present."""
+        if not key:
+            return None
+        return self.load_many(kind, [key], attributes)[0]
+
+    def load_many(self, kind: str, keys: Iterable[str],
+                  attributes: Optional[Iterable[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        keys = list(keys)
+        for key in keys:
+            self.defer(kind, key, attributes)
+        if self._queue:
+            self.dispatch()
+        return [self._cache.get((kind, key)) if key else None for key in keys]
+
+    def prime(self, kind: str, key: str, item: Optional[Dict[str, Any]]):
+        """Seed or overwrite the memo after a write in this request"""
+        self._cache[(kind, key)] = item
+        self._fetched[(kind, key)] = ALL
+        self._queue.pop((kind, key), None)
+
+    def clear(self, kind: str, key: str):
+        self._cache.pop((kind, key), None)
+        self._fetched.pop((kind, key), None)
+
+    # ─── batching ───────────────────────────────────────────────────
+    def dispatch(self):
+        """Fetch every queued key, BatchGetItem-sized chunk at a time"""
+        pending = []
+        for (kind, key), want in self._queue.items():
+            warm = self.warm.get(kind)
+            item = warm.get(key) if warm is not None else None
+            if item is not None:
+                self._cache[(kind, key)] = item
+                self._fetched[(kind, key)] = ALL
+            else:
+                pending.append((kind, key, want))
+        self._queue.clear()
+        if not pending:
+            return
+
+        if self.local_stores is not None:
+            for kind, key, want in pending:
+                item = self.local_stores[kind].get(key)
+                self._cache[(kind, key)] = project(dict(item), want) if item is not None else None
+                self._fetched[(kind, key)] = want
+        else:
+            for start in range(0, len(pending), MAX_BATCH_KEYS):
+                chunk = pending[start:start + MAX_BATCH_KEYS]
+                for kind, key, _ in chunk:
+                    # Drop a narrower copy being re-read, so a vanished item reads as None
+                    self._cache.pop((kind, key), None)
+                    self._fetched.pop((kind, key), None)
+                fetched = self._batch_get(chunk)
+                for kind, key, _ in chunk:
+                    self._cache.setdefault((kind, key), None)
+                    self._fetched[(kind, key)] = fetched[kind]
+
+        for kind, key, want in pending:
+            warm = self.warm.get(kind)
+            item = self._cache.get((kind, key))
+            if warm is not None and item is not None and want is ALL:
+                warm.set(key, item)
+
+    def _batch_get(self, chunk: List[Tuple[str, str, Attributes]]) -> Dict[str, Attributes]:
+        """Fetch one chunk; returns the attribute set actually read per kind"""
+        by_table: Dict[str, str] = {}
+        wanted: Dict[str, Attributes] = {}
+        request_items: Dict[str, Dict[str, Any]] = {}
+        for kind, key, want in chunk:
+            table_name, key_attr = self.tables[kind]
+            by_table[table_name] = kind
+            wanted[kind] = _merge(wanted[kind], want) if kind in wanted else want
+            request_items.setdefault(table_name, {'Keys': []})['Keys'].append({key_attr: key})
+
+        # BatchGetItem takes one projection per table: the union of requests
+        for table_name, request in request_items.items():
+            kind = by_table[table_name]
+            if wanted[kind] is not ALL:
+                names = {f'#p{i}': attr for i, attr in enumerate(sorted(wanted[kind] | {self.tables[kind][1]}))}
+                request['ProjectionExpression'] = ', '.join(names)
+                request['ExpressionAttributeNames'] = names
+
+        attempt = 0
+        while request_items:
+            self.round_trips += 1
+            response = self.dynamodb.batch_get_item(RequestItems=request_items)
+            for table_name, items in response.get('Responses', {}).items():
+                kind = by_table[table_name]
+                key_attr = self.tables[kind][1]
+                for item in items:
+                    self._cache[(kind, item[key_attr])] = item
+
+            request_items = response.get('UnprocessedKeys') or {}
+            if request_items:
+                attempt += 1
+                if attempt > MAX_UNPROCESSED_RETRIES:
+                    left = sum(len(v['Keys']) for v in request_items.values())
+                    raise RuntimeError(f'BatchGetItem left {left} keys unprocessed after {MAX_UNPROCESSED_RETRIES} retries')
+                self.sleep(RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+        return wanted
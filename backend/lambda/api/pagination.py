@@ -0,0 +1,77 @@
+"""
+VajraOpz cursor pagination
+Opaque `after` cursors are the URL-safe base64 of a DynamoDB LastEvaluatedKey,
+fed back as ExclusiveStartKey, so every page is one bounded Query call. The
+local repository backends return the same kind of key, so cursors work
+unchanged in local dev.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from graphql_engine import GraphQLError
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(last_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not last_key:
+        return None
+    raw = json.dumps(last_key, sort_keys=True, default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise GraphQLError('Invalid cursor', 400)
+    if not isinstance(key, dict):
+        raise GraphQLError('Invalid cursor', 400)
+    return key
+
+
+def page_size(first: Optional[int]) -> int:
+    if first is None:
+        return DEFAULT_PAGE_SIZE
+    if not isinstance(first, int) or first < 1 or first > MAX_PAGE_SIZE:
+        raise GraphQLError(f'`first` must be between 1 and {MAX_PAGE_SIZE}', 400)
+    return first
+
+
+def query_page(table, index: Optional[str], value: Any, first: Optional[int],
+               after: Optional[str], reverse: bool = False,
+               attributes: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One bounded query against a repository table; returns (items, end_cursor)"""
+    items, last_key = table.query(index, value, limit=page_size(first), start_key=decode_cursor(after),
+                                  reverse=reverse, attributes=attributes)
+    return items, encode_cursor(last_key)
+
+
+def query_all(table, index: Optional[str], value: Any, reverse: bool = False,
+              attributes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Follow the last key until the result set is exhausted"""
+    items = []
+    start_key = None
+    while True:
+        page, start_key = table.query(index, value, start_key=start_key, reverse=reverse,
+                                      attributes=attributes)
+        items.extend(page)
+        if not start_key:
+            return items
+
+
+def connection(items: List[Dict[str, Any]], end_cursor: Optional[str]) -> Dict[str, Any]:
+    return {
+        'items': items,
+        'pageInfo': {
+            'endCursor': end_cursor,
+            'hasNextPage': end_cursor is not None,
+        },
+    }
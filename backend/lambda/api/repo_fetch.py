@@ -0,0 +1,173 @@
+"""
+VajraOpz repository snapshot reader
+Yields (path, text) for the code files of a repository at a ref, choosing the
+cheapest way to get them from the `size` GitHub reports for the repo (in KB):
+
+  tarball - one streamed GET of /tarball/{ref}, unpacked member by member
+            straight from the socket (tarfile stream mode, nothing on disk)
+  blobs   - the recursive tree plus one raw-media-type GET per wanted file,
+            fetched concurrently; used for very large repos, where most of
+            the tarball would be thrown away, and as the fallback when the
+            tarball stream fails
+
+list_files() returns the (path, blob SHA) pairs from the tree without any
+contents. Callers with a per-file cache can pass just the changed files back
+to iter_repo_files; when only a few changed, those are read as blobs instead
+of downloading the whole tarball.
+"""
+
+import os
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from concurrency import Deadline, DeadlineExceeded, gather
+from github_client import GitHubClient
+
+RAW_ACCEPT = 'application/vnd.github.raw'
+
+# Repos up to this size (KB, as in the metadata's `size`) are read from the tarball
+TARBALL_MAX_KB = int(os.environ.get('TARBALL_MAX_KB', str(200 * 1024)))
+# Larger files are skipped either way (generated bundles, fixtures, ...)
+MAX_FILE_BYTES = int(os.environ.get('MAX_FILE_BYTES', str(1024 * 1024)))
+BLOB_BATCH = int(os.environ.get('BLOB_BATCH', '8'))
+# A known list of at most this many files is read blob by blob
+BLOB_FILES_MAX = int(os.environ.get('BLOB_FILES_MAX', '40'))
+
+
+def choose_strategy(size_kb: Optional[int], file_count: Optional[int] = None) -> str:
+    if size_kb is not None and size_kb > TARBALL_MAX_KB:
+        return 'blobs'
+    if file_count is not None and file_count <= BLOB_FILES_MAX:
+        return 'blobs'
+    return 'tarball'
+
+
+def iter_repo_files(client: GitHubClient, owner: str, repo: str, ref: str, token: Optional[str],
+                    wanted: Callable[[str], bool], size_kb: Optional[int] = None,
+                    deadline: Optional[Deadline] = None,
+                    files: Optional[List[Tuple[str, str]]] = None) -> Iterator[Tuple[str, str]]:
+    """(path, text) for every file `wanted(path)` accepts, or only for the
+    (path, sha) pairs in `files` when the caller already listed the tree"""
+    paths = None
+    if files is not None:
+        paths = [path for path, _ in files]
+        only = frozenset(paths)
+        wanted = lambda path, accept=wanted: path in only and accept(path)
+    strategy = choose_strategy(size_kb, len(paths) if paths is not None else None)
+    print(f'[RepoFetch] {owner}/{repo}@{ref}: {size_kb} KB, '
+          f'{"all" if paths is None else len(paths)} files, using {strategy}')
+    if paths is not None and not paths:
+        return
+    if strategy == 'tarball':
+        seen = set()
+        try:
+            for path, text in _iter_tarball(client, owner, repo, ref, token, wanted, deadline):
+                seen.add(path)
+                yield path, text
+            return
+        except Exception as e:
+            print(f'[RepoFetch] Tarball failed after {len(seen)} files ({e}), falling back to blobs')
+        wanted_rest = lambda path: path not in seen and wanted(path)
+        rest = [path for path in paths if path not in seen] if paths is not None else None
+        yield from _iter_blobs(client, owner, repo, ref, token, wanted_rest, deadline, rest)
+        return
+    yield from _iter_blobs(client, owner, repo, ref, token, wanted, deadline, paths)
+
+
+def list_files(client: GitHubClient, owner: str, repo: str, ref: str, token: Optional[str],
+               wanted: Callable[[str], bool], deadline: Optional[Deadline] = None) -> List[Tuple[str, str]]:
+    """(path, blob sha) for every file `wanted(path)` accepts, from one tree request"""
+    response = client.get(f'/repos/{owner}/{repo}/git/trees/{ref}', token=token,
+                          params={'recursive': 1}, timeout=_timeout(deadline, 30))
+    if not response.ok:
+        raise Exception(f'Failed to fetch repository tree: {response.status_code}')
+    tree = response.json()
+    if tree.get('truncated'):
+        print(f'[RepoFetch] Tree of {owner}/{repo} is truncated; only listed files are analyzed')
+    return [
+        (entry['path'], entry['sha']) for entry in tree.get('tree', [])
+        if entry['type'] == 'blob' and entry.get('size', 0) <= MAX_FILE_BYTES and wanted(entry['path'])
+    ]
+
+
+def _timeout(deadline: Optional[Deadline], cap: float) -> float:
+    return deadline.timeout(cap) if deadline is not None else cap
+
+
+def _decode(data: bytes) -> str:
+    return data.decode('utf-8', errors='ignore')
+
+
+# ─── tarball ────────────────────────────────────────────────────────
+def _iter_tarball(client: GitHubClient, owner: str, repo: str, ref: str, token: Optional[str],
+                  wanted: Callable[[str], bool], deadline: Optional[Deadline]) -> Iterator[Tuple[str, str]]:
+    import tarfile
+    response = client.stream(f'/repos/{owner}/{repo}/tarball/{ref}', token=token,
+                             timeout=_timeout(deadline, 30))
+    try:
+        if not response.ok:
+            raise OSError(f'tarball request returned {response.status_code}')
+        response.raw.decode_content = True
+        with tarfile.open(fileobj=response.raw, mode='r|gz') as archive:
+            for member in archive:
+                if not member.isfile() or member.size > MAX_FILE_BYTES:
+                    continue
+                # Members live under a single "{owner}-{repo}-{sha}/" directory
+                path = member.name.split('/', 1)[1] if '/' in member.name else member.name
+                if not wanted(path):
+                    continue
+                f = archive.extractfile(member)
+                if f is not None:
+                    yield path, _decode(f.read())
+                if deadline is not None and deadline.expired:
+                    print('[RepoFetch] Deadline reached, stopping tarball read')
+                    return
+    finally:
+        response.close()
+
+
+# ─── tree + raw blobs ───────────────────────────────────────────────
+def _iter_blobs(client: GitHubClient, owner: str, repo: str, ref: str, token: Optional[str],
+                wanted: Callable[[str], bool], deadline: Optional[Deadline],
+                paths: Optional[List[str]] = None) -> Iterator[Tuple[str, str]]:
+    if paths is None:
+        paths = [path for path, _ in list_files(client, owner, repo, ref, token, wanted, deadline)]
+
+    for start in range(0, len(paths), BLOB_BATCH):
+        batch = paths[start:start + BLOB_BATCH]
+        results = None
+        if deadline is None or not deadline.expired:
+            try:
+                results = gather(*[_blob_fetcher(client, owner, repo, ref, token, path, deadline)
+                                   for path in batch], deadline=deadline, return_exceptions=True)
+            except DeadlineExceeded:
+                pass
+        if results is None:
+            # Like the tarball read: stop with what was yielded, so the caller keeps it
+            print(f'[RepoFetch] Deadline reached, stopping blob reads after {start} of {len(paths)} files')
+            return
+        for path, result in zip(batch, results):
+            if isinstance(result, Exception):
+                print(f'[RepoFetch] Error reading {path}: {result}')
+            elif result is not None:
+                yield path, result
+
+
+def _blob_fetcher(client: GitHubClient, owner: str, repo: str, ref: str, token: Optional[str],
+                  path: str, deadline: Optional[Deadline]) -> Callable[[], Optional[str]]:
+    def fetch() -> Optional[str]:
+        response = client.get(f'/repos/{owner}/{repo}/contents/{path}', token=token,
+                              params={'ref': ref}, headers={'Accept': RAW_ACCEPT},
+                              timeout=_timeout(deadline, 10))
+        return _decode(response.content) if response.ok else None
+    return fetch
+
+
+def path_filter(extensions: Iterable[str], skip: Iterable[str]) -> Callable[[str], bool]:
+    """Accept paths with one of `extensions` that contain none of `skip`"""
+    extensions = frozenset(extensions)
+    skip = tuple(skip)
+
+    def wanted(path: str) -> bool:
+        ext = '.' + path.split('.')[-1] if '.' in path else ''
+        return ext in extensions and not any(s in path for s in skip)
+    return wanted
@@ -0,0 +1,606 @@
+"""
+VajraOpz repository layer
+One storage interface for every table the API touches, mirroring the DynamoDB
+key schema and GSIs so resolvers are written once:
+
+  DynamoRepository  - the real tables (production)
+  MemoryRepository  - thread-safe dicts with O(1) secondary indexes (local dev)
+  SQLiteRepository  - persistent local store in WAL mode (LOCAL_STORE=sqlite)
+
+Queries return DynamoDB-style `(items, last_key)` pairs, so cursors and
+pagination behave the same against every backend. Reads take an optional
+`attributes` list, sent to DynamoDB as a ProjectionExpression.
+batch_get/batch_put move many items per round trip (BatchGetItem takes 100
+keys, BatchWriteItem 25 items).
+"""
+
+import bisect
+import copy
+import json
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class TableSpec:
+    """Key schema of one table: partition/sort key and GSIs (hash, range)"""
+
+    def __init__(self, key: str, sort_key: Optional[str] = None,
+                 indexes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None):
+        self.key = key
+        self.sort_key = sort_key
+        self.indexes = indexes or {}
+
+    def key_of(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        key = {self.key: item[self.key]}
+        if self.sort_key:
+            key[self.sort_key] = item[self.sort_key]
+        return key
+
+    def key_tuple(self, key: Dict[str, Any]) -> Tuple:
+        return (key[self.key], key[self.sort_key]) if self.sort_key else (key[self.key],)
+
+    def partition(self, index: Optional[str]) -> Tuple[str, Optional[str]]:
+        """(hash, range) attributes of the base table (index=None) or a GSI"""
+        if index is None:
+            return self.key, self.sort_key
+        return self.indexes[index]
+
+
+# Mirrors backend/infrastructure/main.tf
+TABLE_SPECS = {
+    'users': TableSpec('user_id', indexes={'github-id-index': ('github_id', None)}),
+    'projects': TableSpec('project_id', indexes={'user-id-index': ('user_id', 'created_at')}),
+    'deployments': TableSpec('deployment_id', indexes={'project-id-index': ('project_id', None)}),
+    'agent_runs': TableSpec('run_id', indexes={'deployment-id-index': ('deployment_id', 'created_at')}),
+    'fixes': TableSpec('deployment_id', sort_key='fix_id'),
+    'connections': TableSpec('connection_id', indexes={'deployment-id-index': ('deployment_id', None)}),
+    'analysis_cache': TableSpec('cache_key'),
+}
+
+BATCH_GET_SIZE = 100
+
+
+# =====================================================================
+#  CONDITIONS
+# =====================================================================
+class ConditionFailed(Exception):
+    """A conditional write was rejected; `item` is the stored item, if any"""
+
+    def __init__(self, item: Optional[Dict[str, Any]] = None):
+        super().__init__('Conditional check failed')
+        self.item = item
+
+
+class Condition:
+    """Disjunction of simple attribute tests, e.g.
+    `attr_missing('lock') | attr_equals('lock', did)`"""
+
+    def __init__(self, clauses: List[Tuple[str, str, Any]]):
+        self.clauses = clauses
+
+    def __or__(self, other: 'Condition') -> 'Condition':
+        return Condition(self.clauses + other.clauses)
+
+    def matches(self, item: Optional[Dict[str, Any]]) -> bool:
+        item = item or {}
+        for op, name, value in self.clauses:
+            if op == 'missing' and name not in item:
+                return True
+            if op == 'eq' and name in item and item[name] == value:
+                return True
+            if op == 'lt' and name in item and item[name] < value:
+                return True
+        return False
+
+    def expression(self, names: Dict[str, str], values: Dict[str, Any]) -> str:
+        parts = []
+        for op, name, value in self.clauses:
+            ref = _name_ref(names, name)
+            if op == 'missing':
+                parts.append(f'attribute_not_exists({ref})')
+            else:
+                symbol = '=' if op == 'eq' else '<'
+                parts.append(f'{ref} {symbol} {_value_ref(values, value)}')
+        return ' OR '.join(parts)
+
+
+def attr_missing(name: str) -> Condition:
+    return Condition([('missing', name, None)])
+
+
+def attr_equals(name: str, value: Any) -> Condition:
+    return Condition([('eq', name, value)])
+
+
+def attr_below(name: str, value: Any) -> Condition:
+    return Condition([('lt', name, value)])
+
+
+def _name_ref(names: Dict[str, str], name: str) -> str:
+    for ref, existing in names.items():
+        if existing == name:
+            return ref
+    ref = f'#n{len(names)}'
+    names[ref] = name
+    return ref
+
+
+def _value_ref(values: Dict[str, Any], value: Any) -> str:
+    ref = f':v{len(values)}'
+    values[ref] = value
+    return ref
+
+
+def _projection(attributes: Iterable[str], names: Dict[str, str]) -> str:
+    return ', '.join(_name_ref(names, a) for a in attributes)
+
+
+def _project(item: Dict[str, Any], attributes: Optional[Iterable[str]]) -> Dict[str, Any]:
+    if attributes is None:
+        return copy.deepcopy(item)
+    return {k: copy.deepcopy(item[k]) for k in attributes if k in item}
+
+
+def _apply_update(item: Dict[str, Any], values: Optional[Dict[str, Any]],
+                  remove: Iterable[str]) -> Dict[str, Any]:
+    item.update(copy.deepcopy(values or {}))
+    for name in remove:
+        item.pop(name, None)
+    return item
+
+
+# =====================================================================
+#  DYNAMODB
+# =====================================================================
+class DynamoTable:
+    """Thin adapter over a boto3 Table resource (created on first use)"""
+
+    def __init__(self, name: str, spec: TableSpec, resource: Callable[[], Any]):
+        self.name = name
+        self.spec = spec
+        self._resource = resource
+
+    @property
+    def table(self):
+        return self._resource()
+
+    def get(self, key: Any, consistent: bool = False,
+            attributes: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        key = key if isinstance(key, dict) else {self.spec.key: key}
+        kwargs = {'Key': key, 'ConsistentRead': consistent}
+        if attributes is not None:
+            names = {}
+            kwargs['ProjectionExpression'] = _projection(attributes, names)
+            kwargs['ExpressionAttributeNames'] = names
+        return self.table.get_item(**kwargs).get('Item')
+
+    def put(self, item: Dict[str, Any], condition: Optional[Condition] = None):
+        kwargs = {'Item': item}
+        if condition is not None:
+            names, values = {}, {}
+            kwargs['ConditionExpression'] = condition.expression(names, values)
+            kwargs['ExpressionAttributeNames'] = names
+            if values:
+                kwargs['ExpressionAttributeValues'] = values
+            kwargs['ReturnValuesOnConditionCheckFailure'] = 'ALL_OLD'
+        self._write('put_item', kwargs)
+
+    def update(self, key: Dict[str, Any], values: Optional[Dict[str, Any]] = None,
+               remove: Iterable[str] = (), condition: Optional[Condition] = None):
+        names, expr_values = {}, {}
+        clauses = []
+        if values:
+            clauses.append('SET ' + ', '.join(
+                f'{_name_ref(names, k)} = {_value_ref(expr_values, v)}' for k, v in values.items()))
+        remove = list(remove)
+        if remove:
+            clauses.append('REMOVE ' + ', '.join(_name_ref(names, k) for k in remove))
+        kwargs = {
+            'Key': key,
+            'UpdateExpression': ' '.join(clauses),
+            'ExpressionAttributeNames': names,
+        }
+        if condition is not None:
+            kwargs['ConditionExpression'] = condition.expression(names, expr_values)
+            kwargs['ReturnValuesOnConditionCheckFailure'] = 'ALL_OLD'
+        if expr_values:
+            kwargs['ExpressionAttributeValues'] = expr_values
+        self._write('update_item', kwargs)
+
+    def delete(self, key: Any):
+        key = key if isinstance(key, dict) else {self.spec.key: key}
+        self.table.delete_item(Key=key)
+
+    def batch_get(self, keys: Iterable[Any],
+                  attributes: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Items that exist for `keys`, in no particular order"""
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+        serializer, deserializer = TypeSerializer(), TypeDeserializer()
+        client = self.table.meta.client
+        keys = [key if isinstance(key, dict) else {self.spec.key: key} for key in keys]
+        items = []
+        for start in range(0, len(keys), BATCH_GET_SIZE):
+            request: Dict[str, Any] = {'Keys': [
+                {k: serializer.serialize(v) for k, v in key.items()}
+                for key in keys[start:start + BATCH_GET_SIZE]
+            ]}
+            if attributes is not None:
+                names = {}
+                request['ProjectionExpression'] = _projection(attributes, names)
+                request['ExpressionAttributeNames'] = names
+            pending = {self.name: request}
+            for attempt in range(5):
+                response = client.batch_get_item(RequestItems=pending)
+                items.extend({k: deserializer.deserialize(v) for k, v in item.items()}
+                             for item in response.get('Responses', {}).get(self.name, []))
+                pending = response.get('UnprocessedKeys')
+                if not pending:
+                    break
+                time.sleep(0.05 * 2 ** attempt)  # throttled: back off, retry the rest
+        return items
+
+    def batch_put(self, items: Iterable[Dict[str, Any]]):
+        # batch_writer groups BatchWriteItem calls and resends unprocessed items
+        with self.table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+
+    def _write(self, method: str, kwargs: Dict[str, Any]):
+        table = self.table
+        try:
+            getattr(table, method)(**kwargs)
+        except table.meta.client.exceptions.ConditionalCheckFailedException as e:
+            old = e.response.get('Item')
+            if old is not None:
+                from boto3.dynamodb.types import TypeDeserializer
+                deserializer = TypeDeserializer()
+                old = {k: deserializer.deserialize(v) for k, v in old.items()}
+            raise ConditionFailed(old)
+
+    def query(self, index: Optional[str], value: Any, limit: Optional[int] = None,
+              start_key: Optional[Dict[str, Any]] = None, reverse: bool = False,
+              attributes: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        hash_attr, _ = self.spec.partition(index)
+        kwargs = {
+            'KeyConditionExpression': '#h = :h',
+            'ExpressionAttributeNames': {'#h': hash_attr},
+            'ExpressionAttributeValues': {':h': value},
+            'ScanIndexForward': not reverse,
+        }
+        if index is not None:
+            kwargs['IndexName'] = index
+        if attributes is not None:
+            kwargs['ProjectionExpression'] = _projection(attributes, kwargs['ExpressionAttributeNames'])
+        if limit is not None:
+            kwargs['Limit'] = limit
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        response = self.table.query(**kwargs)
+        return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+# =====================================================================
+#  IN-MEMORY
+# =====================================================================
+class MemoryTable:
+    """Dict-backed table. Each GSI is a hash -> {primary key: None} map, so a
+    query touches only its own partition instead of scanning every item."""
+
+    def __init__(self, name: str, spec: TableSpec):
+        self.name = name
+        self.spec = spec
+        self._items: Dict[Tuple, Dict[str, Any]] = {}
+        self._indexes: Dict[Optional[str], Dict[Any, Dict[Tuple, None]]] = {
+            index: {} for index in [None] + list(spec.indexes)
+        }
+        self._lock = threading.RLock()
+
+    def _key(self, key: Any) -> Tuple:
+        return self.spec.key_tuple(key) if isinstance(key, dict) else (key,)
+
+    def get(self, key: Any, consistent: bool = False,
+            attributes: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(self._key(key))
+            return _project(item, attributes) if item is not None else None
+
+    def put(self, item: Dict[str, Any], condition: Optional[Condition] = None):
+        with self._lock:
+            pk = self.spec.key_tuple(item)
+            old = self._items.get(pk)
+            if condition is not None and not condition.matches(old):
+                raise ConditionFailed(copy.deepcopy(old))
+            self._store(pk, old, copy.deepcopy(item))
+
+    def update(self, key: Dict[str, Any], values: Optional[Dict[str, Any]] = None,
+               remove: Iterable[str] = (), condition: Optional[Condition] = None):
+        with self._lock:
+            pk = self.spec.key_tuple(key)
+            old = self._items.get(pk)
+            if condition is not None and not condition.matches(old):
+                raise ConditionFailed(copy.deepcopy(old))
+            item = copy.deepcopy(old) if old is not None else dict(key)
+            self._store(pk, old, _apply_update(item, values, remove))
+
+    def delete(self, key: Any):
+        with self._lock:
+            pk = self._key(key)
+            old = self._items.get(pk)
+            if old is not None:
+                self._store(pk, old, None)
+
+    def batch_get(self, keys: Iterable[Any],
+                  attributes: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [self._items.get(self._key(key)) for key in keys]
+            return [_project(item, attributes) for item in items if item is not None]
+
+    def batch_put(self, items: Iterable[Dict[str, Any]]):
+        for item in items:
+            self.put(item)
+
+    def _store(self, pk: Tuple, old: Optional[Dict[str, Any]], item: Optional[Dict[str, Any]]):
+        for index, partitions in self._indexes.items():
+            hash_attr, _ = self.spec.partition(index)
+            if old is not None and hash_attr in old:
+                members = partitions.get(old[hash_attr])
+                if members is not None:
+                    members.pop(pk, None)
+                    if not members:
+                        del partitions[old[hash_attr]]
+            if item is not None and hash_attr in item:
+                partitions.setdefault(item[hash_attr], {})[pk] = None
+        if item is None:
+            del self._items[pk]
+        else:
+            self._items[pk] = item
+
+    def query(self, index: Optional[str], value: Any, limit: Optional[int] = None,
+              start_key: Optional[Dict[str, Any]] = None, reverse: bool = False,
+              attributes: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        _, range_attr = self.spec.partition(index)
+
+        def position(m):
+            return (m.get(range_attr, '') if range_attr else '', self.spec.key_tuple(m))
+
+        with self._lock:
+            members = [self._items[pk] for pk in self._indexes[index].get(value, ())]
+            if range_attr:
+                # Like a GSI, items without the range attribute are not indexed
+                members = [m for m in members if range_attr in m]
+            members.sort(key=position)
+            if start_key:
+                # Resume strictly after the cursor's sort position, like the
+                # SQLite row-value comparison: the cursor's item may be gone
+                positions = [position(m) for m in members]
+                cursor = position(start_key)
+                if reverse:
+                    members = members[:bisect.bisect_left(positions, cursor)]
+                else:
+                    members = members[bisect.bisect_right(positions, cursor):]
+            if reverse:
+                members.reverse()
+            page = members if limit is None else members[:limit]
+            last_key = None
+            if page and len(page) < len(members):
+                last_key = _last_key(self.spec, index, page[-1])
+            return [_project(m, attributes) for m in page], last_key
+
+
+def _last_key(spec: TableSpec, index: Optional[str], item: Dict[str, Any]) -> Dict[str, Any]:
+    """LastEvaluatedKey as DynamoDB builds it: table key plus index key"""
+    last_key = spec.key_of(item)
+    for attr in spec.partition(index):
+        if attr:
+            last_key[attr] = item[attr]
+    return last_key
+
+
+# =====================================================================
+#  SQLITE
+# =====================================================================
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+
+
+class SQLiteTable:
+    """One SQLite table per DynamoDB table: the item as JSON plus an indexed
+    column for every key attribute, so GSI queries are index range scans"""
+
+    def __init__(self, name: str, spec: TableSpec, db: 'SQLiteRepository'):
+        self.name = name
+        self.spec = spec
+        self.db = db
+        self.columns = []
+        for attr in [spec.key, spec.sort_key] + [a for pair in spec.indexes.values() for a in pair]:
+            if attr and attr not in self.columns:
+                self.columns.append(attr)
+        self._create()
+
+    def _col(self, attr: str) -> str:
+        return 'c_' + attr
+
+    def _create(self):
+        cols = ', '.join(f'{self._col(c)} TEXT' for c in self.columns)
+        pk = ', '.join(self._col(a) for a in (self.spec.key, self.spec.sort_key) if a)
+        with self.db.transaction() as conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.name}" ({cols}, item TEXT NOT NULL, PRIMARY KEY ({pk}))')
+            for index, (hash_attr, range_attr) in self.spec.indexes.items():
+                index_cols = ', '.join(self._col(a) for a in (hash_attr, range_attr) if a)
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "{self.name}__{index}" ON "{self.name}" ({index_cols})')
+
+    def _key_clause(self, key: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        attrs = [a for a in (self.spec.key, self.spec.sort_key) if a]
+        return ' AND '.join(f'{self._col(a)} = ?' for a in attrs), [key[a] for a in attrs]
+
+    def _read(self, conn, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        where, params = self._key_clause(key)
+        row = conn.execute(f'SELECT item FROM "{self.name}" WHERE {where}', params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, conn, item: Dict[str, Any]):
+        cols = [self._col(c) for c in self.columns] + ['item']
+        params = [item.get(c) for c in self.columns] + [json.dumps(item, default=_json_default)]
+        conn.execute(
+            f'INSERT OR REPLACE INTO "{self.name}" ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})',
+            params,
+        )
+
+    def get(self, key: Any, consistent: bool = False,
+            attributes: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        key = key if isinstance(key, dict) else {self.spec.key: key}
+        with self.db.transaction() as conn:
+            item = self._read(conn, key)
+        return _project(item, attributes) if item is not None else None
+
+    def put(self, item: Dict[str, Any], condition: Optional[Condition] = None):
+        with self.db.transaction() as conn:
+            if condition is not None:
+                old = self._read(conn, self.spec.key_of(item))
+                if not condition.matches(old):
+                    raise ConditionFailed(old)
+            self._write(conn, item)
+
+    def update(self, key: Dict[str, Any], values: Optional[Dict[str, Any]] = None,
+               remove: Iterable[str] = (), condition: Optional[Condition] = None):
+        with self.db.transaction() as conn:
+            old = self._read(conn, key)
+            if condition is not None and not condition.matches(old):
+                raise ConditionFailed(old)
+            self._write(conn, _apply_update(old if old is not None else dict(key), values, remove))
+
+    def delete(self, key: Any):
+        key = key if isinstance(key, dict) else {self.spec.key: key}
+        where, params = self._key_clause(key)
+        with self.db.transaction() as conn:
+            conn.execute(f'DELETE FROM "{self.name}" WHERE {where}', params)
+
+    def batch_get(self, keys: Iterable[Any],
+                  attributes: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        keys = [key if isinstance(key, dict) else {self.spec.key: key} for key in keys]
+        with self.db.transaction() as conn:
+            items = [self._read(conn, key) for key in keys]
+        return [_project(item, attributes) for item in items if item is not None]
+
+    def batch_put(self, items: Iterable[Dict[str, Any]]):
+        with self.db.transaction() as conn:
+            for item in items:
+                self._write(conn, item)
+
+    def query(self, index: Optional[str], value: Any, limit: Optional[int] = None,
+              start_key: Optional[Dict[str, Any]] = None, reverse: bool = False,
+              attributes: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        hash_attr, range_attr = self.spec.partition(index)
+        order_attrs = [a for a in (range_attr, self.spec.key, self.spec.sort_key) if a]
+        direction = 'DESC' if reverse else 'ASC'
+        where = [f'{self._col(hash_attr)} = ?']
+        params: List[Any] = [value]
+        if range_attr:
+            where.append(f'{self._col(range_attr)} IS NOT NULL')
+        if start_key:
+            # Row-value comparison resumes strictly after the cursor
+            op = '<' if reverse else '>'
+            cols = ', '.join(self._col(a) for a in order_attrs)
+            where.append(f'({cols}) {op} ({", ".join("?" * len(order_attrs))})')
+            params.extend(start_key[a] for a in order_attrs)
+        sql = (f'SELECT item FROM "{self.name}" WHERE {" AND ".join(where)} '
+               f'ORDER BY {", ".join(f"{self._col(a)} {direction}" for a in order_attrs)}')
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit + 1)
+        with self.db.transaction() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        items = [json.loads(row[0]) for row in rows]
+        last_key = None
+        if limit is not None and len(items) > limit:
+            items = items[:limit]
+            last_key = _last_key(self.spec, index, items[-1])
+        return [_project(item, attributes) for item in items], last_key
+
+
+# =====================================================================
+#  REPOSITORIES
+# =====================================================================
+class Repository:
+    """Attribute access to every table: repo.users, repo.projects, ..."""
+
+    kind = 'base'
+
+    def __init__(self, tables: Dict[str, Any]):
+        self.tables = tables
+        for logical, table in tables.items():
+            setattr(self, logical, table)
+
+
+class DynamoRepository(Repository):
+    kind = 'dynamodb'
+
+    def __init__(self, table_names: Dict[str, str], table_factory: Callable[[str], Any]):
+        super().__init__({
+            logical: DynamoTable(name, TABLE_SPECS[logical], lambda name=name: table_factory(name))
+            for logical, name in table_names.items()
+        })
+
+
+class MemoryRepository(Repository):
+    kind = 'memory'
+
+    def __init__(self, table_names: Dict[str, str]):
+        super().__init__({
+            logical: MemoryTable(name, TABLE_SPECS[logical])
+            for logical, name in table_names.items()
+        })
+
+
+class SQLiteRepository(Repository):
+    kind = 'sqlite'
+
+    def __init__(self, table_names: Dict[str, str], path: str):
+        import sqlite3
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._lock = threading.RLock()
+        super().__init__({
+            logical: SQLiteTable(name, TABLE_SPECS[logical], self)
+            for logical, name in table_names.items()
+        })
+
+    def transaction(self):
+        return _Transaction(self)
+
+
+class _Transaction:
+    """Serializes access to the shared connection; reads and conditional
+    writes inside one block see a consistent snapshot"""
+
+    def __init__(self, db: SQLiteRepository):
+        self.db = db
+
+    def __enter__(self):
+        self.db._lock.acquire()
+        self.db.conn.execute('BEGIN IMMEDIATE')
+        return self.db.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.db.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.db._lock.release()
+        return False
+
+
+def open_repository(backend: str, table_names: Dict[str, str],
+                    table_factory: Optional[Callable[[str], Any]] = None,
+                    path: Optional[str] = None) -> Repository:
+    if backend == 'dynamodb':
+        return DynamoRepository(table_names, table_factory)
+    if backend == 'sqlite':
+        return SQLiteRepository(table_names, path or 'vajraopz-local.db')
+    if backend == 'memory':
+        return MemoryRepository(table_names)
+    raise ValueError(f'Unknown repository backend: {backend}')
@@ -0,0 +1,360 @@
+"""
+VajraOpz lint rule engine
+Rules live in a registry keyed by file extension. scan() checks a whole file
+buffer in one of two ways.
+
+By default, code rules run as the language's per-line checks: the substring
+tests the analyzer has always used, inlined over the split buffer and
+emitting Issue records directly. They still flag `==` inside a string or a
+commented-out `console.log`, but they are what keeps whole-repo
+scans cheap: benchmarks/bench_rule_engine.py measures them at 1.1-1.2x the
+throughput of the per-line function they replaced.
+
+With exact=True, every code rule plus the language's string and comment
+syntax is compiled into one alternation, and the buffer is scanned with a
+single finditer(): string and comment tokens are consumed and ignored, so
+`==` inside a string, `var ` inside an identifier, or a commented-out
+`console.log` produce no hits. Every alternative starts with a literal
+character, so the regex engine can skip ahead to candidate positions. Rule
+patterns must therefore begin with a plain literal; word-boundary checks go
+in a trailing lookbehind. That leading literal doubles as a prefilter: a rule
+whose literal does not occur in the file is left out of its pattern, and a
+file that contains none of them skips the tokenizing pass entirely. The same
+benchmark puts this at 0.4x on hit-dense input and 0.7-0.8x on typical code,
+so it is for callers that act on individual hits.
+
+Line-level rules (length, trailing whitespace) are anchored on newlines and
+run over the raw buffer in both modes.
+
+Issues come out as slotted Issue records: type, severity and message stay on
+the shared Rule and file paths are interned, so a repo with hundreds of
+thousands of hits holds a few pointers per hit rather than a dict each.
+Issue.to_dict() gives the shape the API has always returned:
+{file, line, type, severity, message, fixable[, fix]}
+
+dump()/load() turn a file's issues into compact rows for the analysis cache.
+ruleset_version() changes whenever a rule does, so cached rows from an older
+rule set are never reused.
+"""
+
+import re
+import sys
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+MAX_LINE_LENGTH = 120
+# Bump when scanning or a fixer changes in a way the rule definitions don't show
+ENGINE_REVISION = 2
+_REGEX_SYNTAX = set('\\.^$*+?{}[]|()')
+_LINE = attrgetter('line')
+
+
+class Rule:
+    """One check. `pattern` is a regex fragment without capture groups that
+    starts with a literal character.
+    `fix(line, columns)` gets the offending line and the start/end columns of
+    every hit on it and returns the corrected line (None: not fixable)."""
+
+    __slots__ = ('name', 'pattern', 'type', 'severity', 'message', 'fix', 'literal')
+
+    def __init__(self, name: str, pattern: str, type: str, severity: str,
+                 message: str, fix: Optional[Callable[[str, List[Tuple[int, int]]], str]] = None):
+        self.name = name
+        self.pattern = pattern
+        self.type = type
+        self.severity = severity
+        self.message = message
+        self.fix = fix
+        self.literal = _leading_literal(pattern)
+
+
+class Issue:
+    """One rule hit; `length` is only set for rules whose message needs it"""
+
+    __slots__ = ('file', 'line', 'rule', 'fix', 'length')
+
+    def __init__(self, file: str, line: int, rule: Rule, fix: Optional[str] = None, length: int = 0):
+        self.file = file
+        self.line = line
+        self.rule = rule
+        self.fix = fix
+        self.length = length
+
+    @property
+    def type(self) -> str:
+        return self.rule.type
+
+    @property
+    def severity(self) -> str:
+        return self.rule.severity
+
+    @property
+    def message(self) -> str:
+        message = self.rule.message
+        return message.format(length=self.length) if '{' in message else message
+
+    def to_dict(self) -> dict:
+        issue = {
+            'file': self.file,
+            'line': self.line,
+            'type': self.rule.type,
+            'severity': self.rule.severity,
+            'message': self.message,
+            'fixable': self.rule.fix is not None,
+        }
+        if self.rule.fix is not None:
+            issue['fix'] = self.fix
+        return issue
+
+    def __repr__(self):
+        return f'Issue({self.file}:{self.line} {self.rule.name})'
+
+
+def _leading_literal(pattern: str) -> str:
+    """Longest plain-text prefix every match of `pattern` starts with"""
+    literal = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\' and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            ch, step = pattern[i + 1], 2
+        elif ch in _REGEX_SYNTAX:
+            break
+        else:
+            step = 1
+        if i + step < len(pattern) and pattern[i + step] in '*+?{':
+            break  # quantified: may not be there at all
+        literal.append(ch)
+        i += step
+    return ''.join(literal)
+
+
+class Language:
+    """Code rules for a set of extensions, plus the tokens to skip over.
+    `lines(file_path, text)` is the language's cheap per-line check, which
+    scan() runs unless asked for exact results; without one, every scan of
+    the language is exact."""
+
+    def __init__(self, name: str, extensions: Iterable[str], skip: Iterable[str], rules: Iterable[Rule],
+                 lines: Optional[Callable[[str, str], List[Issue]]] = None):
+        self.name = name
+        self.extensions = tuple(extensions)
+        self.skip = tuple(skip)
+        self.rules = list(rules)
+        self.lines = lines
+        for rule in self.rules:
+            if not rule.literal:
+                raise ValueError(f'Rule {rule.name} must start with a literal character')
+        self._patterns: Dict[Tuple[int, ...], 're.Pattern'] = {}
+
+    def pattern(self, active: Tuple[int, ...]) -> 're.Pattern':
+        """Matcher for the rules at indexes `active`, compiled once per subset.
+        Each match runs from the end of the previous hit to the next one:
+        plain text, strings and comments are consumed inside the regex, so
+        Python only ever sees actual hits (plus one empty match at the end)."""
+        compiled = self._patterns.get(active)
+        if compiled is None:
+            patterns = [self.rules[i].pattern for i in active]
+            starts = re.escape(''.join(sorted({p[0] for p in patterns} | {s[0] for s in self.skip})))
+            skip = '|'.join(self.skip)
+            any_rule = '|'.join(patterns)
+            # The literal stays outside each group so the alternation keeps
+            # its first-character prefix
+            hit = '|'.join(f'{p[0]}(?P<r{i}>{p[1:]})' for i, p in zip(active, patterns))
+            compiled = self._patterns[active] = re.compile(
+                f'(?:[^{starts}]++|{skip}|(?!{any_rule})[{starts}])*+(?:{hit}|\\Z)')
+        return compiled
+
+
+def _replace_spans(replacement: str) -> Callable[[str, List[Tuple[int, int]]], str]:
+    """Fixer that swaps exactly the matched spans, leaving the rest of the line alone"""
+    def fix(line: str, spans: List[Tuple[int, int]]) -> str:
+        for start, end in reversed(spans):
+            line = line[:start] + replacement + line[end:]
+        return line
+    return fix
+
+
+# ─── syntax ─────────────────────────────────────────────────────────
+_DQ = r'"(?:[^"\\\n]|\\.)*"'
+_SQ = r"'(?:[^'\\\n]|\\.)*'"
+JS_SKIP = (
+    r'//[^\n]*',
+    r'/\*[\s\S]*?(?:\*/|\Z)',
+    _DQ,
+    _SQ,
+    r'`(?:[^`\\]|\\[\s\S])*`',
+)
+# String prefixes (r, b, f, ...) need no handling: the token starts at the quote
+PY_SKIP = (
+    r'#[^\n]*',
+    r'"""[\s\S]*?(?:"""|\Z)',
+    r"'''[\s\S]*?(?:'''|\Z)",
+    _DQ,
+    _SQ,
+)
+
+
+# ─── per-line checks ───────────────────────────────────────────────
+# The analyzer's original substring tests, one line at a time. They can't
+# tell code from strings or comments, but cost little more than reading the
+# file. Issues point at the registry's rules; fixes are computed here.
+def _javascript_lines(file_path: str, text: str) -> List[Issue]:
+    if 'console.log' not in text and 'var ' not in text and '==' not in text:
+        return []
+    no_console, no_var, eqeqeq = RULES_BY_NAME['no-console'], RULES_BY_NAME['no-var'], RULES_BY_NAME['eqeqeq']
+    issues = []
+    for line_num, line in enumerate(text.split('\n'), 1):
+        if 'console.log' in line:
+            issues.append(Issue(file_path, line_num, no_console, line.replace('console.log', '// console.log')))
+        if 'var ' in line and not line.lstrip().startswith('//'):
+            issues.append(Issue(file_path, line_num, no_var, line.replace('var ', 'const ')))
+        if '==' in line and '===' not in line and not line.lstrip().startswith('//'):
+            issues.append(Issue(file_path, line_num, eqeqeq, line.replace('==', '===')))
+    return issues
+
+
+def _python_lines(file_path: str, text: str) -> List[Issue]:
+    if 'print(' not in text:
+        return []
+    no_print = RULES_BY_NAME['no-print']
+    issues = []
+    for line_num, line in enumerate(text.split('\n'), 1):
+        if 'print(' in line and not line.lstrip().startswith('#'):
+            issues.append(Issue(file_path, line_num, no_print, '# ' + line))
+    return issues
+
+
+# ─── registry ───────────────────────────────────────────────────────
+REGISTRY: Dict[str, Language] = {}
+
+
+def register(language: Language):
+    for ext in language.extensions:
+        REGISTRY[ext] = language
+
+
+register(Language('javascript', ('.js', '.jsx', '.ts', '.tsx'), JS_SKIP, [
+    Rule('no-console', r'console\.log\b(?<![\w$.]console\.log)', 'LINTING', 'Low', 'Remove console.log statement',
+         lambda line, spans: line.replace('console.log', '// console.log')),
+    Rule('no-var', r'var(?=\s)(?<![\w$.]var)', 'LINTING', 'Medium', 'Use const or let instead of var',
+         _replace_spans('const')),
+    Rule('eqeqeq', r'==(?!=)(?<![=!<>]==)', 'LINTING', 'Medium', 'Use === instead of ==',
+         _replace_spans('===')),
+], _javascript_lines))
+
+register(Language('python', ('.py',), PY_SKIP, [
+    Rule('no-print', r'print\((?<![\w.]print\()', 'LINTING', 'Low', 'Remove debug print statement',
+         lambda line, spans: '# ' + line),
+], _python_lines))
+
+# Every extension, on the raw text framed by a newline at each end. Each
+# pattern matches one newline: max-len looks ahead at the line it opens
+# (comment-start lines are exempt, as before), trailing-whitespace looks back
+# at the line it closes.
+LINE_RULES = [
+    Rule('max-len', r'\n(?![ \t]*(?://|#|/\*|\*))(?=[^\n]{%d})' % (MAX_LINE_LENGTH + 1),
+         'STYLE', 'Low', 'Line too long ({length} characters)'),
+    Rule('trailing-whitespace', r'\n(?:(?<=[ \t]\n)|(?<=[ \t]\r\n))', 'STYLE', 'Low', 'Trailing whitespace',
+         lambda line, spans: line.rstrip() + '\n'),
+]
+_LINE_PATTERNS = [re.compile(rule.pattern) for rule in LINE_RULES]
+# Matches wherever either line rule could; one search spares clean files both passes
+_LINE_GATE = re.compile(r'\n(?:(?<=[ \t]\n)|(?<=[ \t]\r\n)|(?=[^\n]{%d}))' % (MAX_LINE_LENGTH + 1))
+
+RULES_BY_NAME: Dict[str, Rule] = {rule.name: rule for rule in LINE_RULES}
+for _language in REGISTRY.values():
+    RULES_BY_NAME.update((rule.name, rule) for rule in _language.rules)
+
+_version: Optional[str] = None
+
+
+def ruleset_version() -> str:
+    """Short digest of every rule definition plus ENGINE_REVISION"""
+    global _version
+    if _version is None:
+        import hashlib
+        spec = [ENGINE_REVISION] + [
+            (rule.name, rule.pattern, rule.type, rule.severity, rule.message)
+            for _, rule in sorted(RULES_BY_NAME.items())
+        ]
+        _version = hashlib.sha1(repr(spec).encode()).hexdigest()[:12]
+    return _version
+
+
+# =====================================================================
+#  SCANNING
+# =====================================================================
+def _collect(pattern, text: str, order: int,
+             hits: Dict[Tuple[int, int], List[Tuple[int, int]]]):
+    """Record every rule match as (line, rule order) -> [(start, end) offsets]"""
+    line = 1
+    counted = 0
+    for match in pattern.finditer(text):
+        group = match.lastgroup
+        if group is None:
+            continue  # end of text
+        start = match.start(group) - 1
+        line += text.count('\n', counted, start)
+        counted = start
+        hits.setdefault((line, order + int(group[1:])), []).append((start, match.end()))
+
+
+def _collect_lines(text: str, order: int, hits: Dict[Tuple[int, int], List[Tuple[int, int]]]):
+    framed = '\n' + text + '\n'
+    first = _LINE_GATE.search(framed)
+    if first is None:
+        return
+    for i, pattern in enumerate(_LINE_PATTERNS):
+        line = 1
+        counted = 0
+        for match in pattern.finditer(framed, first.start()):
+            # Offset in `text` of a character on the offending line: the
+            # start of the line that opens here, or the newline that closes it
+            pos = match.start() if i == 0 else match.start() - 1
+            line += text.count('\n', counted, pos)
+            counted = pos
+            hits.setdefault((line, order + i), []).append((pos, pos))
+
+
+def dump(issues: Iterable[Issue]) -> List[list]:
+    """[line, rule, fix, length] rows for one file's issues"""
+    return [[issue.line, issue.rule.name, issue.fix, issue.length] for issue in issues]
+
+
+def load(file_path: str, rows: Iterable[list]) -> List[Issue]:
+    file_path = sys.intern(file_path)
+    return [Issue(file_path, line, RULES_BY_NAME[name], fix, length) for line, name, fix, length in rows]
+
+
+def scan(file_path: str, text: str, ext: Optional[str] = None, exact: bool = False) -> List[Issue]:
+    """Every issue in one file, ordered by line and then by rule.
+    Code rules come from the language's per-line checks; exact=True runs the
+    tokenizing pass instead, so nothing inside a string or comment is flagged."""
+    if ext is None:
+        ext = '.' + file_path.split('.')[-1] if '.' in file_path else ''
+    language = REGISTRY.get(ext)
+    rules = (language.rules if language else []) + LINE_RULES
+    file_path = sys.intern(file_path)
+
+    hits: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    per_line = language is not None and language.lines is not None and not exact
+    if language is not None and not per_line:
+        active = tuple(i for i, rule in enumerate(language.rules) if rule.literal in text)
+        if active:
+            _collect(language.pattern(active), text, 0, hits)
+    _collect_lines(text, len(rules) - len(LINE_RULES), hits)
+
+    issues = []
+    for (line_num, order), spans in sorted(hits.items()):
+        rule = rules[order]
+        line_start = text.rfind('\n', 0, spans[0][0]) + 1
+        line_end = text.find('\n', line_start)
+        line = text[line_start:] if line_end < 0 else text[line_start:line_end]
+        fix = rule.fix(line, [(s - line_start, e - line_start) for s, e in spans]) if rule.fix else None
+        issues.append(Issue(file_path, line_num, rule, fix, len(line) if '{' in rule.message else 0))
+    if per_line:
+        code_issues = language.lines(file_path, text)
+        # Stable: on a shared line, code rules keep their place ahead of line rules
+        issues = sorted(code_issues + issues, key=_LINE) if issues else code_issues
+    return issues
@@ -0,0 +1,60 @@
+"""ItemParser: finding the issue array in a streamed response"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'agents'))
+
+from json_stream import ItemParser  # noqa: E402
+
+ISSUES = '[{"line": 1, "message": "a [b] c"}, {"line": 2, "message": "d"}]'
+
+
+def parse(*chunks):
+    parser = ItemParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+def test_bare_and_keyed_arrays():
+    assert [item['line'] for item in parse(ISSUES).items] == [1, 2]
+    parser = parse('{"issues": ' + ISSUES + '}')
+    assert len(parser.items) == 2 and parser.complete
+
+
+def test_prose_with_brackets_before_the_array():
+    for prose in ('I found [3] issues:\n', 'See [docs](https://example.com).\n```json\n',
+                  'Checklist: [x] done\n'):
+        parser = parse(prose + ISSUES)
+        assert [item['line'] for item in parser.items] == [1, 2], prose
+        assert parser.complete
+
+
+def test_bracket_split_across_chunks():
+    text = 'I found [3] issues:\n' + ISSUES
+    for cut in range(len(text)):
+        parser = parse(text[:cut], text[cut:])
+        assert len(parser.items) == 2 and parser.complete, cut
+
+
+def test_fenced_array():
+    parser = parse('```json\n[\n  {"line": 4}\n]\n```')
+    assert parser.items == [{'line': 4}] and parser.complete
+
+
+def test_empty_array():
+    assert parse('[]').complete
+    assert parse('{"issues": []}').complete
+
+
+def test_empty_array_before_objects_is_not_complete():
+    parser = parse('[]\nActually: {"line": 1}')
+    assert parser.items == [] and not parser.complete
+    parser = parse('Empty: [ ]', ' then ' + ISSUES)
+    assert len(parser.items) == 2 and parser.complete
+
+
+def test_truncated_stream_is_not_complete():
+    parser = parse(ISSUES[:40])
+    assert len(parser.items) == 1 and not parser.complete
@@ -143,7 +143,7 @@ export const NewProjectPage = () => {
       const project = await backendApi.createProject(token, githubRepo, teamName, teamLeader);
       
       // Trigger agent execution
-      const deployment = await backendApi.triggerAgent(token, project.id);
+      const deployment = await backendApi.triggerAgent(token, project.id, backendApi.idempotencyKey());
       
       // Navigate to deployment page with repo name and deployment ID
       navigate(`/deploy/${repoName}/${deployment.deploymentId}`);
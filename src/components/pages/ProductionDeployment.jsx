@@ -225,7 +225,7 @@ export default function ProductionDeployment() {
       }
 
       // Trigger backend fix
-      const result = await backendApi.triggerFix(token, projectId);
+      const result = await backendApi.triggerFix(token, projectId, backendApi.idempotencyKey());
       console.log('[Fix] Backend response:', result);
       
       // Store score data if available
@@ -501,7 +501,7 @@ export default function ProductionDeployment() {
               if (!token) throw new Error('Not authenticated');
               
               // Trigger backend fix for all issues
-              const result = await backendApi.triggerFix(token, projectId);
+              const result = await backendApi.triggerFix(token, projectId, backendApi.idempotencyKey());
               console.log('[Fix All] Backend response:', result);
               
               // Simulate processing
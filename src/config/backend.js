@@ -4,11 +4,17 @@ const isDev = typeof import.meta !== 'undefined'
   : typeof process !== 'undefined' && process.env?.NODE_ENV !== 'production';
 
 const PROD_API_URL = import.meta.env?.VITE_API_BASE_URL || 'https://7qwlci3xodqqlvvtupdlhrcume0xntdd.lambda-url.ap-south-1.on.aws';
+// WebSocket API for deployment progress (wss://.../prod); unset disables push in production
+const PROD_EVENTS_URL = import.meta.env?.VITE_EVENTS_URL || '';
 
 export const backendConfig = {
   apiUrl: isDev
     ? 'http://localhost:3001/graphql'
     : PROD_API_URL,
+  // Dev streams progress over SSE; production uses the WebSocket API
+  eventsUrl: isDev
+    ? 'http://localhost:3001/events'
+    : PROD_EVENTS_URL,
   githubOAuthUrl: 'https://github.com/login/oauth/authorize',
   environment: isDev ? 'development' : 'production',
   region: 'ap-south-1',
@@ -52,8 +58,8 @@ export const GRAPHQL_QUERIES = {
   `,
 
   TRIGGER_AGENT: `
-    mutation triggerAgent($token: String!, $projectId: String!) {
-      triggerAgent(token: $token, projectId: $projectId) {
+    mutation triggerAgent($token: String!, $projectId: String!, $idempotencyKey: String) {
+      triggerAgent(token: $token, projectId: $projectId, idempotencyKey: $idempotencyKey) {
         deploymentId
         runId
         status
@@ -81,6 +87,8 @@ export const GRAPHQL_QUERIES = {
         deployment_id
         project_id
         status
+        stage
+        progress
         created_at
         agent_runs {
           run_id
@@ -122,8 +130,8 @@ export const GRAPHQL_QUERIES = {
   `,
 
   TRIGGER_FIX: `
-    mutation triggerFix($token: String!, $projectId: String!) {
-      triggerFix(token: $token, projectId: $projectId) {
+    mutation triggerFix($token: String!, $projectId: String!, $idempotencyKey: String) {
+      triggerFix(token: $token, projectId: $projectId, idempotencyKey: $idempotencyKey) {
         status
         message
         deployment_id
@@ -3,22 +3,25 @@ import { backendConfig, GRAPHQL_QUERIES } from '../config/backend';
 class BackendApiService {
   constructor() {
     this.baseURL = backendConfig.apiUrl;
+    this._hashes = new Map();
   }
 
-  async graphqlRequest(query, variables = {}) {
+  // `retries`: resend this many times after a network error or a 5xx, with
+  // the same variables. Only for requests that are safe to repeat, such as
+  // mutations carrying an idempotencyKey.
+  async graphqlRequest(query, variables = {}, { retries = 0 } = {}) {
     try {
-      const response = await fetch(this.baseURL, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          query,
-          variables
-        })
-      });
-
-      const result = await response.json();
+      // Automatic persisted queries: send only the document hash and fall
+      // back to the full text the first time the server hasn't seen it
+      const sha256Hash = await this._queryHash(query);
+      const extensions = sha256Hash ? { persistedQuery: { version: 1, sha256Hash } } : undefined;
+
+      let { response, result } = await this._postWithRetries(
+        extensions ? { variables, extensions } : { query, variables }, retries
+      );
+      if (result.errors?.[0]?.extensions?.code === 'PERSISTED_QUERY_NOT_FOUND') {
+        ({ response, result } = await this._postWithRetries({ query, variables, extensions }, retries));
+      }
       
       if (!response.ok) {
         console.error('Backend error:', result);
@@ -37,6 +40,49 @@ class BackendApiService {
     }
   }
 
+  async _post(body) {
+    const response = await fetch(this.baseURL, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(body)
+    });
+    const result = await response.json();
+    return { response, result };
+  }
+
+  async _postWithRetries(body, retries) {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        const posted = await this._post(body);
+        if (posted.response.status < 500 || attempt >= retries) return posted;
+      } catch (error) {
+        // fetch rejects on network failure; a bad JSON body is not retried
+        if (!(error instanceof TypeError) || attempt >= retries) throw error;
+      }
+      await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+    }
+  }
+
+  async _queryHash(query) {
+    if (!globalThis.crypto?.subtle) return null;
+    if (!this._hashes.has(query)) {
+      const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(query));
+      const hex = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+      this._hashes.set(query, hex);
+    }
+    return this._hashes.get(query);
+  }
+
+  // Create one key per user action (a click) and pass it to triggerFix /
+  // triggerAgent: the server joins requests carrying the same key, so
+  // resending it cannot start a second run
+  idempotencyKey() {
+    if (globalThis.crypto?.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+  }
+
   // Authentication methods
   async initiateGitHubAuth() {
     const data = await this.graphqlRequest(GRAPHQL_QUERIES.GITHUB_AUTH);
@@ -70,11 +116,12 @@ class BackendApiService {
   }
 
   // Agent methods
-  async triggerAgent(token, projectId) {
+  async triggerAgent(token, projectId, idempotencyKey) {
     const data = await this.graphqlRequest(GRAPHQL_QUERIES.TRIGGER_AGENT, {
       token,
-      projectId
-    });
+      projectId,
+      idempotencyKey
+    }, { retries: idempotencyKey ? 2 : 0 });
     return data.triggerAgent;
   }
 
@@ -86,6 +133,35 @@ class BackendApiService {
     return data.getDeployment;
   }
 
+  // Push updates for a deployment instead of polling getDeployment.
+  // Returns an unsubscribe function, or null when no event endpoint is configured.
+  subscribeToDeployment(token, deploymentId, onEvent) {
+    const url = backendConfig.eventsUrl;
+    if (!url) return null;
+    const done = (event) => event.status === 'completed' || event.status === 'failed';
+
+    if (url.startsWith('http')) {
+      const source = new EventSource(`${url}/${encodeURIComponent(deploymentId)}?token=${encodeURIComponent(token)}`);
+      const handle = (message) => {
+        const event = JSON.parse(message.data);
+        onEvent(event);
+        if (done(event)) source.close();
+      };
+      source.addEventListener('snapshot', handle);
+      source.addEventListener('progress', handle);
+      return () => source.close();
+    }
+
+    const socket = new WebSocket(`${url}?token=${encodeURIComponent(token)}`);
+    socket.onopen = () => socket.send(JSON.stringify({ action: 'subscribe', deploymentId }));
+    socket.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      onEvent(event);
+      if (done(event)) socket.close();
+    };
+    return () => socket.close();
+  }
+
   async getCommits(token, githubRepo, branch = 'main') {
     const data = await this.graphqlRequest(GRAPHQL_QUERIES.GET_COMMITS, {
       token,
@@ -103,11 +179,12 @@ class BackendApiService {
     return data.getFixes;
   }
 
-  async triggerFix(token, projectId) {
+  async triggerFix(token, projectId, idempotencyKey) {
     const data = await this.graphqlRequest(GRAPHQL_QUERIES.TRIGGER_FIX, {
       token,
-      projectId
-    });
+      projectId,
+      idempotencyKey
+    }, { retries: idempotencyKey ? 2 : 0 });
     return data.triggerFix;
   }
 